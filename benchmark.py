@@ -0,0 +1,416 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+import threading
+import contextlib
+import subprocess
+import tracemalloc
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark_standins import FakeChatModel, StandInConfig, StandInServer, FIRST_MEETING, GRAPHQL_PATH, WORDPRESS_PATH, meeting_id
+
+SCENARIOS = ("listing", "single", "batch", "api")
+FIREFLIES_DATE_FORMAT = "%d-%m-%Y %H:%M"
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def stage_statistics(samples):
+    """
+    Returns the count, mean, p50, p90, p99 and max of a list of durations in seconds.
+    """
+
+    values = sorted(samples)
+    if not values:
+        return {"count": 0}
+
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 0.50),
+        "p90": percentile(values, 0.90),
+        "p99": percentile(values, 0.99),
+        "max": values[-1],
+    }
+
+
+class Recorder:
+    """
+    Collects the durations of every stage of a scenario and its wall time and peak memory.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.items = 0
+        self.failures = 0
+        self.seconds = 0.0
+        self.peak_memory = None
+
+    def add(self, stage, seconds):
+        self.stages.setdefault(stage, []).append(seconds)
+
+    @contextlib.contextmanager
+    def measure(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds = time.perf_counter() - started
+            if self.trace_memory:
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+    def report(self):
+        return {
+            "items": self.items,
+            "failures": self.failures,
+            "seconds": self.seconds,
+            "throughput_per_second": self.items / self.seconds if self.seconds else None,
+            "peak_memory_mb": self.peak_memory / (1024 * 1024) if self.peak_memory is not None else None,
+            "stages": {stage: stage_statistics(samples) for stage, samples in self.stages.items()},
+        }
+
+
+def meeting_range(meetings):
+    """
+    Returns the Fireflies ISO range covering the first meetings synthetic meetings.
+    """
+
+    end = FIRST_MEETING + timedelta(hours=max(meetings - 1, 0))
+    return FIRST_MEETING.isoformat() + 'Z', end.isoformat() + 'Z'
+
+
+def run_listing(args, recorder, workdir):
+    """
+    Lists every synthetic meeting from a cold transcript store, then again from the warm store.
+    """
+
+    import fireflies
+    from transcript_store import TranscriptStore
+
+    from_timestamp, to_timestamp = meeting_range(args.meetings)
+    listing_store = fireflies.transcript_store
+
+    try:
+        for iteration in range(args.iterations):
+            fireflies.transcript_store = TranscriptStore(path=os.path.join(workdir, f"listing-{iteration}.db"))
+
+            for stage in ("list_cold", "list_warm"):
+                started = time.perf_counter()
+                meetings = fireflies.fetch_meetings(from_timestamp, to_timestamp)
+                recorder.add(stage, time.perf_counter() - started)
+                recorder.items += 1
+                if len(meetings) != args.meetings:
+                    recorder.failures += 1
+    finally:
+        fireflies.transcript_store = listing_store
+
+
+def run_single(args, recorder):
+    """
+    Generates and publishes one meeting at a time, as an API job does, timing each stage.
+    """
+
+    from job_queue import SUCCEEDED, Job, JobQueue
+
+    job_queue = JobQueue(workers=1)
+
+    async def run_jobs():
+        for iteration in range(args.iterations):
+            job = Job(meeting_id(iteration), platforms=args.platform or [])
+            started = time.perf_counter()
+            await job_queue.run(job)
+            recorder.add("total", time.perf_counter() - started)
+            recorder.items += 1
+
+            if job.status != SUCCEEDED:
+                recorder.failures += 1
+            for stage, seconds in job.stages.items():
+                recorder.add(stage, seconds)
+
+    asyncio.run(run_jobs())
+
+
+def run_batch(args, recorder, workdir):
+    """
+    Runs the batch mode of main.py over every synthetic meeting, publishing drafts.
+    """
+
+    import main
+
+    from_timestamp, to_timestamp = meeting_range(args.meetings)
+    batch_args = main.parse_batch_args([
+        "--from", datetime.fromisoformat(from_timestamp.rstrip('Z')).strftime(FIREFLIES_DATE_FORMAT),
+        "--to", datetime.fromisoformat(to_timestamp.rstrip('Z')).strftime(FIREFLIES_DATE_FORMAT),
+        "--output-dir", os.path.join(workdir, "batch"),
+        "--publish", "draft",
+        "--concurrency", str(args.concurrency),
+    ] + (["--include-transcript"] if args.include_transcript else [])
+      + [option for platform in args.platform or [] for option in ("--platform", platform)])
+
+    for iteration in range(args.iterations):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            rows = asyncio.run(main.run_batch_async(batch_args))
+
+        for meeting, title, status, published, policy, tokens, seconds in rows:
+            recorder.add("meeting", seconds)
+            recorder.items += 1
+            # Later iterations find the drafts published by the first one instead of creating them again
+            if status != "ok" or published not in ("draft", "draft (existing)"):
+                recorder.failures += 1
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def run_api(args, recorder):
+    """
+    Starts the FastAPI app, submits meetings from concurrent clients and polls their jobs
+    until they finish, timing the submissions and the jobs end to end.
+    """
+
+    import requests
+    import uvicorn
+    import main2
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main2.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    base_url = f"http://127.0.0.1:{port}"
+
+    def submit_and_wait(index):
+        with requests.Session() as session:
+            started = time.perf_counter()
+            response = session.post(f"{base_url}/blog/post-meeting", json={"meeting_id": meeting_id(index), "platforms": args.platform or []})
+            recorder.add("submit", time.perf_counter() - started)
+            if response.status_code != 202:
+                return False
+
+            job_id = response.json()["job_id"]
+            while True:
+                job = session.get(f"{base_url}/jobs/{job_id}").json()
+                if job["status"] in ("succeeded", "failed"):
+                    recorder.add("job", time.perf_counter() - started)
+                    return job["status"] == "succeeded"
+                time.sleep(args.poll_interval)
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.clients) as executor:
+            # Every request is a different meeting, so none is answered from an earlier job
+            for succeeded in executor.map(submit_and_wait, range(args.iterations * args.clients)):
+                recorder.items += 1
+                if not succeeded:
+                    recorder.failures += 1
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def configure_environment(workdir, standins, args):
+    """
+    Points the repository's clients at the stand-ins and keeps every file the benchmark
+    writes in workdir. Must run before the repository's modules are imported.
+    """
+
+    os.environ.update({
+        "FIREFLIES_API_URL": standins.url + GRAPHQL_PATH,
+        "WORDPRESS_POSTS_URL": standins.url + WORDPRESS_PATH,
+        "FIREFLIES_API_KEY": "benchmark",
+        "WORDPRESS_USERNAME": "benchmark",
+        "WORDPRESS_APPLICATION_PASSWORD": "benchmark",
+        "TRANSCRIPT_STORE_PATH": os.path.join(workdir, "transcripts.db"),
+        "CHECKPOINT_PATH": os.path.join(workdir, "checkpoints.db"),
+        "TOKEN_LEDGER_PATH": os.path.join(workdir, "token_usage.json"),
+        "RATE_LIMIT_PATH": os.path.join(workdir, "rate_limits.db"),
+        "PUBLISH_QUEUE_PATH": os.path.join(workdir, "publish_queue.db"),
+        "GROQ_REQUESTS_PER_MINUTE": str(args.groq_rpm),
+        "GROQ_TOKENS_PER_MINUTE": str(args.groq_tpm),
+        "FIREFLIES_REQUESTS_PER_MINUTE": str(args.fireflies_rpm),
+        "LLM_HEDGE_AFTER": str(args.hedge_after),
+        "LLM_CACHE": "0",
+        "JOB_WORKERS": str(args.concurrency),
+        "MAX_CONCURRENT_MEETINGS": str(args.concurrency),
+    })
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(report, baseline):
+    """
+    Prints the change in p50 and throughput of every stage against a previous report.
+    """
+
+    print(f"\n{'Scenario':<10} {'Stage':<12} {'p50 (s)':>10} {'Baseline':>10} {'Change':>8}")
+    for name, scenario in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+
+        for stage, statistics in scenario["stages"].items():
+            old = previous["stages"].get(stage, {}).get("p50")
+            new = statistics.get("p50")
+            if old and new is not None:
+                print(f"{name:<10} {stage:<12} {new:>10.3f} {old:>10.3f} {(new - old) / old:>+8.1%}")
+
+        old, new = previous.get("throughput_per_second"), scenario.get("throughput_per_second")
+        if old and new is not None:
+            print(f"{name:<10} {'throughput':<12} {new:>10.2f} {old:>10.2f} {(new - old) / old:>+8.1%}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pipeline offline against local Fireflies, LLM and WordPress stand-ins."
+    )
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="Scenario to run. Repeatable (default: all).")
+    parser.add_argument("--iterations", type=int, default=5,
+                        help="Runs of every scenario; the API scenario submits --clients meetings per run (default: 5).")
+    parser.add_argument("--meetings", type=int, default=20, help="Synthetic meetings in the Fireflies account (default: 20).")
+    parser.add_argument("--sentences", type=int, default=600, help="Sentences per synthetic transcript (default: 600).")
+    parser.add_argument("--speakers", type=int, default=4, help="Speakers per synthetic meeting (default: 4, max 6).")
+    parser.add_argument("--include-transcript", action="store_true", help="Let the summarizer read the transcripts in the batch scenario.")
+    parser.add_argument("--platform", action="append",
+                        help="Also write this platform variant of every blog post, e.g. linkedin. Repeatable (default: none).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Meetings processed at once by the batch mode and the API (default: 4).")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent API clients (default: 8).")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Seconds between job status polls (default: 0.05).")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds before the fake model's first token (default: 0.3).")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=250.0, help="Fake model output rate (default: 250).")
+    parser.add_argument("--llm-completion-tokens", type=int, default=300, help="Tokens in every fake model answer (default: 300).")
+    parser.add_argument("--small-llm-tokens-per-second", type=float, default=750.0,
+                        help="Output rate of the fake small model, e.g. the anonymizer's (default: 750).")
+    parser.add_argument("--llm-slow-fraction", type=float, default=0.0, help="Share of fake model calls that are slow (default: 0).")
+    parser.add_argument("--llm-slow-latency", type=float, default=5.0, help="Extra seconds a slow fake model call waits (default: 5).")
+    parser.add_argument("--hedge-after", type=float, default=0,
+                        help="Seconds before a slow LLM call is also sent to the next model (default: 0, no hedged requests).")
+    parser.add_argument("--fireflies-latency", type=float, default=0.02, help="Seconds the Fireflies stand-in waits per request (default: 0.02).")
+    parser.add_argument("--wordpress-latency", type=float, default=0.05, help="Seconds the WordPress stand-in waits per post (default: 0.05).")
+    parser.add_argument("--groq-rpm", type=float, default=0, help="Groq requests per minute to rate limit the fake model to (default: 0, no limit).")
+    parser.add_argument("--groq-tpm", type=float, default=0, help="Groq tokens per minute to rate limit the fake model to (default: 0, no limit).")
+    parser.add_argument("--fireflies-rpm", type=float, default=0, help="Fireflies requests per minute to rate limit to (default: 0, no limit).")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Do not trace peak memory. tracemalloc slows Python code down, so use this for timing-only runs.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of standard output.")
+    parser.add_argument("--baseline", help="A previous JSON report to compare the p50 of every stage against.")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = args.scenario or list(SCENARIOS)
+
+    standin_config = StandInConfig(
+        meetings=args.meetings, sentences_per_meeting=args.sentences, speakers_per_meeting=args.speakers,
+        fireflies_latency=args.fireflies_latency, wordpress_latency=args.wordpress_latency
+    )
+    standins = StandInServer(standin_config).start()
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as workdir:
+        configure_environment(workdir, standins, args)
+
+        import blog_agent
+        from llm_usage import LLMRateLimiter
+        for model in blog_agent.configured_models():
+            limiter = blog_agent.llm_limiter(model)
+            blog_agent.llms[model] = FakeChatModel(
+                latency=args.llm_latency,
+                tokens_per_second=args.small_llm_tokens_per_second if model == blog_agent.SMALL_MODEL else args.llm_tokens_per_second,
+                completion_tokens=args.llm_completion_tokens, slow_fraction=args.llm_slow_fraction,
+                slow_latency=args.llm_slow_latency, cache=False,
+                rate_limiter=LLMRateLimiter(limiter) if limiter.enabled else None
+            )
+        # Import LangGraph and compile the graph up front, so the first run of a scenario is not slower
+        blog_agent.get_agent()
+
+        report = {
+            "revision": git_revision(),
+            "timestamp": datetime.utcnow().isoformat() + 'Z',
+            "python": platform.python_version(),
+            "config": {
+                "standins": standin_config.as_dict(),
+                "llm": {
+                    "latency": args.llm_latency,
+                    "tokens_per_second": args.llm_tokens_per_second,
+                    "completion_tokens": args.llm_completion_tokens,
+                    "small_model_tokens_per_second": args.small_llm_tokens_per_second,
+                    "slow_fraction": args.llm_slow_fraction,
+                    "slow_latency": args.llm_slow_latency,
+                    "hedge_after": args.hedge_after,
+                    "models": blog_agent.NODE_MODELS,
+                },
+                "iterations": args.iterations,
+                "concurrency": args.concurrency,
+                "clients": args.clients,
+                "include_transcript": args.include_transcript,
+                "platforms": args.platform or [],
+                "rate_limits": {
+                    "groq_requests_per_minute": args.groq_rpm,
+                    "groq_tokens_per_minute": args.groq_tpm,
+                    "fireflies_requests_per_minute": args.fireflies_rpm,
+                },
+                "trace_memory": not args.no_memory,
+            },
+            "scenarios": {},
+        }
+
+        for name in scenarios:
+            print(f"Running the {name} scenario...", file=sys.stderr)
+            recorder = Recorder(trace_memory=not args.no_memory)
+            with recorder.measure():
+                if name == "listing":
+                    run_listing(args, recorder, workdir)
+                elif name == "single":
+                    run_single(args, recorder)
+                elif name == "batch":
+                    run_batch(args, recorder, workdir)
+                else:
+                    run_api(args, recorder)
+            report["scenarios"][name] = recorder.report()
+
+    report["config"]["standins"]["requests"] = dict(standins.counters, wordpress_posts=standins.posts)
+    standins.stop()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            print_comparison(report, json.load(baseline_file))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
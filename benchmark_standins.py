@@ -0,0 +1,284 @@
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+WORDS = (
+    "we agreed to ship the next release after the review and the team will follow up on "
+    "the budget timeline customer feedback roadmap pilot integration hiring and metrics"
+).split()
+SPEAKERS = ["Alice Johnson", "Bob Smith", "Carol Diaz", "David Lee", "Eva Berg", "Frank Moore"]
+FIRST_MEETING = datetime(2025, 4, 1, 9, 0)
+GRAPHQL_PATH = "/graphql"
+WORDPRESS_PATH = "/wp-json/wp/v2/posts"
+TOKENS_PER_STREAMED_CHUNK = 8
+JSON_KEYS_REQUEST = re.compile(r"return a JSON object with the keys (.+?):")
+
+
+class StandInConfig:
+    """
+    Size and speed of the synthetic Fireflies account and WordPress site.
+    """
+
+    def __init__(self, meetings=50, sentences_per_meeting=600, speakers_per_meeting=4, words_per_sentence=14,
+                 fireflies_latency=0.02, wordpress_latency=0.05):
+        self.meetings = meetings
+        self.sentences_per_meeting = sentences_per_meeting
+        self.speakers_per_meeting = speakers_per_meeting
+        self.words_per_sentence = words_per_sentence
+        self.fireflies_latency = fireflies_latency
+        self.wordpress_latency = wordpress_latency
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def meeting_id(index):
+    return f"bench{index:05d}"
+
+
+def parse_timestamp(timestamp):
+    # Fireflies accepts ISO timestamps with or without milliseconds; compare them as UTC datetimes
+    if not timestamp:
+        return None
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def meeting_metadata(index):
+    # One meeting per hour, newest first like the Fireflies listing
+    return {
+        "id": meeting_id(index),
+        "title": f"Benchmark meeting {index}",
+        "transcript_url": f"https://app.fireflies.ai/view/{meeting_id(index)}",
+        "dateString": (FIRST_MEETING + timedelta(hours=index)).isoformat() + ".000Z",
+        "audio_url": None,
+        "video_url": None,
+    }
+
+
+@lru_cache(maxsize=256)
+def synthetic_transcript(transcript_id, sentences, speakers, words_per_sentence):
+    """
+    Returns the JSON of a deterministic synthetic transcript with sentences and a summary.
+    """
+
+    generator = random.Random(transcript_id)
+    participants = SPEAKERS[:speakers]
+
+    lines = []
+    speaker = participants[0]
+    for index in range(sentences):
+        if generator.random() < 0.3:
+            speaker = generator.choice(participants)
+        words = generator.choices(WORDS, k=max(1, int(generator.gauss(words_per_sentence, 4))))
+        lines.append({
+            "raw_text": " ".join(words).capitalize() + ".",
+            "speaker_name": speaker,
+            "speaker_id": participants.index(speaker),
+        })
+
+    summary = {
+        "keywords": generator.sample(WORDS, 5),
+        "action_items": f"{participants[0]} to send the notes to {participants[-1]}.",
+        "outline": "Review of the release plan and budget.",
+        "shorthand_bullet": "- Release plan\n- Budget\n- Hiring",
+        "overview": f"{participants[0]} and {participants[-1]} reviewed the release plan.",
+        "bullet_gist": "Release plan reviewed.",
+        "gist": "Release planning",
+        "short_summary": "The team reviewed the release plan, the budget and hiring.",
+    }
+
+    return json.dumps({"id": transcript_id, "sentences": lines, "summary": summary})
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Serves the Fireflies GraphQL API and the WordPress posts endpoint from synthetic data.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        body = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config = self.server.config
+
+        if self.path == GRAPHQL_PATH:
+            time.sleep(config.fireflies_latency)
+            self.send_json(200, self.graphql(request, config))
+        elif self.path == WORDPRESS_PATH:
+            time.sleep(config.wordpress_latency)
+            with self.server.lock:
+                self.server.posts += 1
+                post = {
+                    "id": self.server.posts, "slug": request.get("slug") or f"post-{self.server.posts}",
+                    "status": request.get("status"), "title": request.get("title"), "date_gmt": request.get("date_gmt"),
+                }
+                self.server.slugs[post["slug"]] = post
+            self.send_json(201, json.dumps(post))
+        else:
+            self.send_json(404, json.dumps({"message": "Not found"}))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+
+        if url.path == WORDPRESS_PATH:
+            # Post lookup by slug
+            time.sleep(self.server.config.wordpress_latency)
+            self.server.count("wordpress_lookups")
+            slugs = ",".join(parse_qs(url.query).get("slug", [])).split(",")
+            with self.server.lock:
+                posts = [self.server.slugs[slug] for slug in slugs if slug in self.server.slugs]
+            self.send_json(200, json.dumps(posts))
+        else:
+            self.send_json(404, json.dumps({"message": "Not found"}))
+
+    def graphql(self, request, config):
+        variables = request.get("variables") or {}
+        self.server.count("graphql_requests")
+
+        if "skip" in variables:
+            # Listing: meetings in the requested date range, newest first
+            from_date = parse_timestamp(variables.get("fromDate")) or datetime.min
+            to_date = parse_timestamp(variables.get("toDate")) or datetime.max
+            meetings = [
+                meeting_metadata(index) for index in reversed(range(config.meetings))
+                if from_date <= FIRST_MEETING + timedelta(hours=index) <= to_date
+            ]
+            page = meetings[variables["skip"]:variables["skip"] + variables["limit"]]
+            return json.dumps({"data": {"transcripts": page}})
+
+        # Aliased transcript(id:) fields, written out piece by piece so large batches are not built twice
+        fields = ", ".join(
+            f'"{alias}": ' + synthetic_transcript(
+                transcript_id, config.sentences_per_meeting, config.speakers_per_meeting, config.words_per_sentence
+            )
+            for alias, transcript_id in variables.items()
+        )
+        return '{"data": {' + fields + '}}'
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local stand-in for Fireflies and WordPress, run in a background thread.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.config = config
+        self.lock = threading.Lock()
+        self.posts = 0
+        self.slugs = {}  # Created WordPress posts by slug
+        self.counters = {}
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + 1
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model stand-in that answers after a fixed latency and produces tokens at a fixed rate.
+    A random slow_fraction of calls waits slow_latency seconds longer, like a provider's tail latency.
+    Answers start with a title line followed by a blank line, like the Writer's blog posts. A
+    prompt asking to "return a JSON object with the keys ..." is answered with that object,
+    its words shared out between the keys.
+    """
+
+    latency: float = 0.3
+    tokens_per_second: float = 250.0
+    completion_tokens: int = 300
+    slow_fraction: float = 0.0
+    slow_latency: float = 0.0
+
+    @property
+    def _llm_type(self):
+        return "benchmark-fake"
+
+    def answer_tokens(self, messages):
+        generator = random.Random(messages[-1].content[:200])
+        words = generator.choices(WORDS, k=self.completion_tokens - 1)
+
+        request = JSON_KEYS_REQUEST.search(" ".join(message.content for message in messages))
+        if request is None:
+            return ["Benchmark title\n\n"] + [word + " " for word in words]
+
+        keys = re.findall(r'"(\w+)"', request.group(1))
+        share = max(1, len(words) // len(keys))
+        answer = {key: " ".join(words[index * share:(index + 1) * share]) for index, key in enumerate(keys)}
+        if "blog_post" in answer:
+            answer["blog_post"] = "Benchmark title\n\n" + answer["blog_post"]
+        return [word + " " for word in json.dumps(answer).split(" ")]
+
+    def chunks(self, tokens):
+        return ["".join(tokens[start:start + TOKENS_PER_STREAMED_CHUNK])
+                for start in range(0, len(tokens), TOKENS_PER_STREAMED_CHUNK)]
+
+    def generation_seconds(self, token_count):
+        return token_count / self.tokens_per_second
+
+    def first_token_seconds(self):
+        return self.latency + (self.slow_latency if random.random() < self.slow_fraction else 0)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = self.answer_tokens(messages)
+        time.sleep(self.first_token_seconds() + self.generation_seconds(len(tokens)))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = self.answer_tokens(messages)
+        await asyncio.sleep(self.first_token_seconds() + self.generation_seconds(len(tokens)))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.first_token_seconds())
+        for text in self.chunks(self.answer_tokens(messages)):
+            time.sleep(self.generation_seconds(TOKENS_PER_STREAMED_CHUNK))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_seconds())
+        for text in self.chunks(self.answer_tokens(messages)):
+            await asyncio.sleep(self.generation_seconds(TOKENS_PER_STREAMED_CHUNK))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
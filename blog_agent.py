@@ -0,0 +1,1281 @@
+from typing import Annotated, Dict
+from typing_extensions import TypedDict
+
+import os
+import json
+import time
+import asyncio
+import threading
+import concurrent.futures
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from fireflies import group_speaker_text, iter_transcripts
+from model_router import ModelRouter, record_models
+from rate_limits import llm_limiter
+from redaction import Redactor, speaker_names, transcript_speaker_names
+from telemetry import TELEMETRY_MODE, metrics, span, traced
+from token_budget import OVER_BUDGET, plan_transcript
+from transcript_chunks import CHUNK_CONCURRENCY, CHUNK_TOKENS, estimate_tokens, split_transcript
+
+MAX_CONCURRENT_MEETINGS = int(os.getenv('MAX_CONCURRENT_MEETINGS', '4'))  # Meetings processed at once in async mode
+
+# How the anonymizer handles summary-only runs, whose input was already redacted locally:
+# "full" runs the full LLM anonymization, "short" a shorter prompt for what local redaction
+# cannot catch, and "skip" only re-applies local redaction to the overview.
+PRE_REDACTED_ANONYMIZER = os.getenv('PRE_REDACTED_ANONYMIZER', 'full')
+
+# Platform variants written alongside the blog post, in parallel, from the same anonymized summary.
+# Each has its own guidelines and a hard character limit.
+PLATFORM_POSTS = {
+    "linkedin": {
+        "description": "a LinkedIn post",
+        "max_characters": 3000,
+        "guidelines": """- Open with a strong first line, since only the first lines are shown before "see more"
+            - Use short paragraphs and a professional, personal tone
+            - End with a question or a call to action that invites discussion
+            - Add up to three relevant hashtags at the end""",
+    },
+    "x": {
+        "description": "a post on X (Twitter)",
+        "max_characters": 280,
+        "guidelines": """- Make one clear, engaging point in one or two sentences
+            - Use at most two hashtags and no emojis
+            - Write a single post, not a thread""",
+    },
+    "newsletter": {
+        "description": "a section of an email newsletter",
+        "max_characters": 4000,
+        "guidelines": """- Start with a short headline on its own line
+            - Follow with two to four short paragraphs that explain what was discussed and why it matters
+            - Close with a sentence on what comes next""",
+    },
+}
+# Platforms written for every meeting unless a run asks for others, e.g. "linkedin,x"
+PLATFORM_VARIANTS = [platform.strip() for platform in os.getenv('PLATFORM_VARIANTS', '').split(',') if platform.strip()]
+WRITER_NODE = "create_blog_post"
+NO_TRANSCRIPT = "Fireflies returned neither a transcript nor a summary for the meeting"
+
+# How many LLM calls a meeting takes. "standard" summarizes, anonymizes and writes in three calls.
+# "combined" summarizes and anonymizes in one structured call before the writer, and "single" also
+# writes the blog post in that call. Platform variants have their own writers in every profile.
+PIPELINE_PROFILES = {
+    "standard": None,
+    "combined": "summarize_and_anonymize",
+    "single": "summarize_anonymize_and_write",
+}
+PIPELINE_PROFILE = os.getenv('PIPELINE_PROFILE', 'standard')
+
+
+def model_chain(setting, default):
+    return [model.strip() for model in os.getenv(setting, default).split(',') if model.strip()]
+
+
+# Models of each node role as "provider:model", tried in order. A model that times out, is rate
+# limited, cannot fit the prompt in its context or is unavailable hands the call to the next one.
+# The anonymizer is a fairly mechanical rewrite, so it runs on a smaller, faster model first.
+LARGE_MODEL = "groq:llama3-70b-8192"
+SMALL_MODEL = "groq:llama-3.1-8b-instant"  # Also has the larger context window
+NODE_MODELS = {
+    "summarizer": model_chain('SUMMARIZER_MODELS', f"{LARGE_MODEL},{SMALL_MODEL}"),
+    "anonymizer": model_chain('ANONYMIZER_MODELS', f"{SMALL_MODEL},{LARGE_MODEL}"),
+    "writer": model_chain('WRITER_MODELS', f"{LARGE_MODEL},{SMALL_MODEL}"),  # Also writes the platform variants
+}
+# Seconds after which a call that has not been answered is also sent to the next model of its
+# chain, and the first answer is used. 0 turns hedged requests off.
+LLM_HEDGE_AFTER = float(os.getenv('LLM_HEDGE_AFTER', '0'))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))  # Seconds before a model call counts as timed out
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))  # Retries of a model before falling back to the next
+
+# The LLM clients, the compiled graph and its checkpointer are created on first use and shared by the whole process.
+# LangChain and LangGraph are slow to import, so they are only imported when a graph is built or run.
+llms = {}  # "provider:model" -> chat model
+routers = {}  # Node role -> ModelRouter
+llm_cache = None
+agents = {}  # Pipeline profile -> compiled graph
+checkpointer = None
+usage_handler = None
+rate_limit_handler = None
+lazy_init_lock = threading.Lock()
+
+
+def get_llm(model=LARGE_MODEL):
+    """
+    Returns the shared client of a "provider:model" LLM, initializing it on first use.
+    Responses are cached by model, generation parameters and rendered prompt unless LLM_CACHE=0.
+    Calls that miss the cache wait for the model's rate limits (see rate_limits).
+    """
+
+    global llm_cache
+
+    if model not in llms:
+        with lazy_init_lock:
+            if model not in llms:
+                from langchain.chat_models import init_chat_model
+                # from langchain_openai import AzureChatOpenAI
+                from llm_cache import LLM_CACHE_ENABLED, LLMResponseCache
+                from llm_usage import LLMRateLimiter
+
+                # cache=False turns caching off for this model even if a global LangChain cache is set
+                if llm_cache is None and LLM_CACHE_ENABLED:
+                    llm_cache = LLMResponseCache()
+                limiter = llm_limiter(model)
+                llms[model] = init_chat_model(
+                    model, cache=llm_cache or False, rate_limiter=LLMRateLimiter(limiter) if limiter.enabled else None,
+                    timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES
+                )
+                # llm = AzureChatOpenAI(model_name="gpt-35-turbo-16k")
+
+    return llms[model]
+
+
+def node_llm(role):
+    """
+    Returns the runnable that sends the LLM calls of a node role ("summarizer", "anonymizer"
+    or "writer") to its models in NODE_MODELS, with fallback and optional hedged requests.
+    """
+
+    if role not in routers:
+        routers[role] = ModelRouter(role, NODE_MODELS[role], get_llm, LLM_HEDGE_AFTER)
+    return routers[role].runnable()
+
+
+def configured_models():
+    """
+    Returns every model used by a node role.
+    """
+
+    return list(dict.fromkeys(model for models in NODE_MODELS.values() for model in models))
+
+
+def llm_cache_stats():
+    """
+    Returns the hit/miss counters of the LLM response cache, or None if it is disabled or not created yet.
+    """
+
+    return llm_cache.stats() if llm_cache is not None else None
+
+
+def llm_cache_metrics():
+    # Read from the cache's own counters when /metrics is scraped
+    stats = llm_cache_stats() or {}
+    for counter in ("memory_hits", "disk_hits", "misses", "evictions"):
+        if counter in stats:
+            yield "llm_cache_events_total", "counter", "LLM response cache lookups and evictions.", {"event": counter}, stats[counter]
+
+
+metrics.register_collector(llm_cache_metrics)
+
+
+class NodeError(Exception):
+    """
+    Raised when a node of the AI Agent fails, e.g. because its LLM call timed out.
+    With checkpoints enabled, running the meeting again resumes at the failed node.
+    """
+
+
+def merge_dicts(left, right):
+    # Platform writers run in parallel, so each adds its own post (and models) to the dict
+    return {**(left or {}), **(right or {})}
+
+
+def add_messages(left, right):
+    # Defers importing LangGraph until a graph actually merges messages
+    from langgraph.graph.message import add_messages as merge_messages
+    return merge_messages(left, right)
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+    fireflies_summary: Dict[str, any]
+    meeting_transcript: str
+    include_transcript: bool
+    speaker_names: list
+    pre_redacted: bool
+    agent_summary: any
+    agent_summary_anonymized: any
+    blog_post: str
+    platforms: list
+    platform_posts: Annotated[dict, merge_dicts]
+    profile: str
+    models: Annotated[dict, merge_dicts]
+
+
+def state_redactor(state):
+    """
+    Builds the local redactor for the speakers of the meeting in the given state.
+    """
+
+    names = state.get("speaker_names") or transcript_speaker_names(state.get("meeting_transcript") or "")
+    return Redactor(names)
+
+
+def redactor(state):
+    """
+    Function to create the redaction node.
+    Redacts names, organisation terms, emails, phone numbers and money amounts from the
+    Fireflies summary and the transcript locally, before any LLM sees them.
+    """
+
+    meeting_redactor = state_redactor(state)
+
+    return {
+        "fireflies_summary": meeting_redactor.redact_value(state["fireflies_summary"]),
+        "meeting_transcript": meeting_redactor.redact(state.get("meeting_transcript")),
+        "pre_redacted": True
+    }
+
+
+def summarizer_flow(state):
+    """
+    Builds the summarizer chain and its inputs for the given state.
+    """
+
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    include_transcript = state.get("include_transcript", False)
+
+    if include_transcript:
+        summarizer_prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are an expert meeting summarizer. Analyze the meeting summary and full meeting transcript to generate a comprehensive, nuanced overview.
+            
+            Your goal is to:
+            - Capture the key discussion points
+            - Highlight the main objectives and outcomes
+            - Provide insights into the strategic direction
+            - Synthesize information from both the existing summary and the full conversation
+
+            Write a clear, concise, and informative overview that captures the essence of the meeting."""),
+            ("human", """Create a detailed overview based on the following information:
+
+            Existing Summary: {fireflies_summary}
+            Full meeting transcript: {meeting_transcript}
+
+            Please provide a comprehensive and insightful overview of the meeting that goes beyond surface-level details.""")
+        ])
+    else:
+        summarizer_prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are an expert meeting summarizer. Analyze the meeting summary and full meeting transcript to generate a comprehensive, nuanced overview.
+            
+            Your goal is to:
+            - Capture the key discussion points
+            - Highlight the main objectives and outcomes
+            - Provide insights into the strategic direction
+            - Synthesize information from both the existing summary and the full conversation
+
+            Write a clear, concise, and informative overview that captures the essence of the meeting."""),
+            ("human", """Create a detailed overview based on the following information:
+
+            Existing Summary: {fireflies_summary}
+
+            Please provide a comprehensive and insightful overview of the meeting that goes beyond surface-level details.""")
+        ])
+
+    agent_flow = summarizer_prompt | node_llm("summarizer") | StrOutputParser()
+
+    if include_transcript:
+        inputs = {
+            "fireflies_summary": json.dumps(state["fireflies_summary"]),
+            "meeting_transcript": state["meeting_transcript"]
+        }
+    else:
+        inputs = {
+            "fireflies_summary": json.dumps(state["fireflies_summary"])
+        }
+
+    return agent_flow, inputs
+
+
+def transcript_chunks(state):
+    """
+    Returns the transcript chunks to summarize with map-reduce, or None when the summarizer
+    can analyze the state in a single call (no transcript, or one that fits in a chunk).
+    """
+
+    if not state.get("include_transcript", False):
+        return None
+
+    meeting_transcript = state["meeting_transcript"]
+    if estimate_tokens(meeting_transcript) <= CHUNK_TOKENS:
+        return None
+
+    return split_transcript(meeting_transcript, CHUNK_TOKENS)
+
+
+def chunk_summarizer_flow(chunks):
+    """
+    Builds the map step of map-reduce summarization: a chain that summarizes one transcript
+    chunk, and its inputs for every chunk.
+    """
+
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    chunk_prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are an expert meeting summarizer. You are given one section of a longer meeting transcript.
+        
+        Your goal is to:
+        - Capture the key discussion points of this section
+        - Note any decisions, objectives, outcomes and action items
+        - Keep who said what only where it matters for understanding the discussion
+
+        Write concise notes that can later be merged with the notes of the other sections."""),
+        ("human", """Summarize section {chunk_number} of {chunk_count} of the meeting transcript:
+
+        {transcript_chunk}
+
+        Return only the notes for this section.""")
+    ])
+
+    chunk_flow = chunk_prompt | node_llm("summarizer") | StrOutputParser()
+
+    inputs = [
+        {"chunk_number": number, "chunk_count": len(chunks), "transcript_chunk": chunk}
+        for number, chunk in enumerate(chunks, start=1)
+    ]
+
+    return chunk_flow, inputs
+
+
+def reduce_summarizer_flow(state, chunk_summaries):
+    """
+    Builds the reduce step of map-reduce summarization: a chain that merges the Fireflies
+    summary with the notes of every transcript chunk into the final overview.
+    """
+
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    reduce_prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are an expert meeting summarizer. Analyze the meeting summary and the notes taken on each section of the meeting transcript to generate a comprehensive, nuanced overview.
+        
+        Your goal is to:
+        - Capture the key discussion points
+        - Highlight the main objectives and outcomes
+        - Provide insights into the strategic direction
+        - Synthesize information from both the existing summary and the section notes
+
+        Write a clear, concise, and informative overview that captures the essence of the meeting."""),
+        ("human", """Create a detailed overview based on the following information:
+
+        Existing Summary: {fireflies_summary}
+        Notes on each section of the meeting transcript:
+        {chunk_summaries}
+
+        Please provide a comprehensive and insightful overview of the meeting that goes beyond surface-level details.""")
+    ])
+
+    reduce_flow = reduce_prompt | node_llm("summarizer") | StrOutputParser()
+
+    inputs = {
+        "fireflies_summary": json.dumps(state["fireflies_summary"]),
+        "chunk_summaries": "\n\n".join(
+            f"Section {number}:\n{summary.strip()}" for number, summary in enumerate(chunk_summaries, start=1)
+        )
+    }
+
+    return reduce_flow, inputs
+
+
+def with_models(node, output, models):
+    # Records which models answered the node's LLM calls
+    if models:
+        output["models"] = {node: models}
+    return output
+
+
+def summarizer_output(result):
+    # Parse the result into a structured format
+    summary_data = {
+        "overview": result.strip()
+    }
+    
+    return {
+        "agent_summary": [
+            # HumanMessage(content=json.dumps(summary_data, indent=2))
+            summary_data
+        ]
+    }
+
+
+def summarizer(state):
+    """
+    Function to create the summarizer node.
+    """
+
+    try:
+        with record_models() as models:
+            chunks = transcript_chunks(state)
+
+            if chunks:
+                # Long transcript: summarize the chunks in parallel, then merge them with the Fireflies summary
+                chunk_flow, chunk_inputs = chunk_summarizer_flow(chunks)
+                chunk_summaries = chunk_flow.batch(chunk_inputs, config={"max_concurrency": CHUNK_CONCURRENCY})
+                agent_flow, inputs = reduce_summarizer_flow(state, chunk_summaries)
+            else:
+                agent_flow, inputs = summarizer_flow(state)
+
+            result = agent_flow.invoke(inputs)
+
+        return with_models("create_summary", summarizer_output(result), models)
+    
+    except Exception as e:
+        print(f"Error in summarizer: {e}")
+        raise NodeError(f"Failed to generate summary: {str(e)}") from e
+
+
+async def asummarizer(state):
+    """
+    Async version of the summarizer node, used when the graph is run with ainvoke.
+    """
+
+    try:
+        with record_models() as models:
+            chunks = transcript_chunks(state)
+
+            if chunks:
+                # Long transcript: summarize the chunks in parallel, then merge them with the Fireflies summary
+                chunk_flow, chunk_inputs = chunk_summarizer_flow(chunks)
+                chunk_summaries = await chunk_flow.abatch(chunk_inputs, config={"max_concurrency": CHUNK_CONCURRENCY})
+                agent_flow, inputs = reduce_summarizer_flow(state, chunk_summaries)
+            else:
+                agent_flow, inputs = summarizer_flow(state)
+
+            result = await agent_flow.ainvoke(inputs)
+
+        return with_models("create_summary", summarizer_output(result), models)
+    
+    except Exception as e:
+        print(f"Error in summarizer: {e}")
+        raise NodeError(f"Failed to generate summary: {str(e)}") from e
+    
+
+def anonymizer_mode(state):
+    """
+    Returns how the anonymizer handles the given state: "full", "short" or "skip".
+    Only summary-only runs on locally redacted input can use a shorter anonymization.
+    """
+
+    if state.get("pre_redacted", False) and not state.get("include_transcript", False):
+        return PRE_REDACTED_ANONYMIZER
+    return "full"
+
+
+def anonymizer_flow(state):
+    """
+    Builds the anonymizer chain and its inputs for the given state.
+    """
+
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    anonymizer_prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are a data privacy and internal controls assistant. You are an expert at anonymizing sensitive information in meeting summaries.
+        
+        Your task is to:
+        - Remove all personal names and replace them with generic roles
+        - Remove any confidential information, especially related to payments, budgets, or financial figures
+        - Remove any sensitive business information that shouldn't be shared broadly
+        - Preserve the overall meaning and context of the summary
+        - Maintain the same level of detail except for the sensitive information
+        - Ensure data privacy according to GDPR and general internal control standards such as ISO 27001, SOC 2, and HIPAA (where applicable). 
+        
+        The output should be a clean, anonymized version of the input text that protects privacy while maintaining usefulness."""),
+        ("human", """Please anonymize the following meeting summary by removing names and confidential information:
+        
+        {agent_summary}
+        
+        Return only the anonymized text without explanations.""")
+    ])
+
+    if anonymizer_mode(state) == "short":
+        anonymizer_prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are a data privacy assistant. Names, email addresses, phone numbers and amounts in the meeting summary have already been replaced with placeholders such as "Participant 1" or [amount].
+
+            Your task is to:
+            - Remove any remaining personal names, replacing them with generic roles
+            - Remove any remaining confidential business information
+            - Keep everything else unchanged"""),
+            ("human", """Please anonymize the following meeting summary:
+
+            {agent_summary}
+
+            Return only the anonymized text without explanations.""")
+        ])
+
+    anonymize_flow = anonymizer_prompt | node_llm("anonymizer") | StrOutputParser()
+    
+    inputs = {
+        "agent_summary": state["agent_summary"][0]['overview']
+    }
+
+    return anonymize_flow, inputs
+
+
+def anonymizer_output(anonymized_result):
+    response_data = {
+        "anonymized_overview": anonymized_result.strip()
+    }
+    
+    return {
+        "agent_summary_anonymized": [
+            # HumanMessage(content=json.dumps(response_data, indent=2))
+            response_data
+        ]
+    }
+
+
+def anonymizer(state):
+    """
+    Function to create the anonymizer node.
+    """
+    
+    try:
+        if anonymizer_mode(state) == "skip":
+            return anonymizer_output(state_redactor(state).redact(state["agent_summary"][0]['overview']))
+
+        anonymize_flow, inputs = anonymizer_flow(state)
+        with record_models() as models:
+            result = anonymize_flow.invoke(inputs)
+
+        return with_models("anonymize_output", anonymizer_output(result), models)
+    
+    except Exception as e:
+        print(f"Error in anonymizer: {e}")
+        raise NodeError(f"Failed to anonymize the summary: {str(e)}") from e
+
+
+async def aanonymizer(state):
+    """
+    Async version of the anonymizer node, used when the graph is run with ainvoke.
+    """
+    
+    try:
+        if anonymizer_mode(state) == "skip":
+            return anonymizer_output(state_redactor(state).redact(state["agent_summary"][0]['overview']))
+
+        anonymize_flow, inputs = anonymizer_flow(state)
+        with record_models() as models:
+            result = await anonymize_flow.ainvoke(inputs)
+
+        return with_models("anonymize_output", anonymizer_output(result), models)
+    
+    except Exception as e:
+        print(f"Error in anonymizer: {e}")
+        raise NodeError(f"Failed to anonymize the summary: {str(e)}") from e
+    
+
+def writer_flow(state):
+    """
+    Builds the writer chain and its inputs for the given state.
+    """
+
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    blog_post_prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are a skilled content writer tasked with creating an engaging blog post based on an anonymized meeting summary.
+        
+        Your goal is to:
+        - Transform the key points of the summary into a narrative format suitable for a blog.
+        - Make the content informative and interesting for a general audience or relevant stakeholders (without revealing confidential details).
+        - Use a professional yet approachable tone.
+        - Ensure the blog post flows well and is easy to read.
+        
+        Do not include any placeholders like [Role] or [Initiative]; write as if the information is naturally generalized based on the input."""),
+        ("human", """Please write a blog post based on the following anonymized meeting overview:
+
+        {anonymized_summary}
+
+        Generate only the blog post content itself.""")
+    ])
+
+    blog_post_flow = blog_post_prompt | node_llm("writer") | StrOutputParser()
+
+    inputs = {
+        "anonymized_summary": state["agent_summary_anonymized"][0]['anonymized_overview']
+    }
+
+    return blog_post_flow, inputs
+
+
+def writer(state):
+    """
+    Function to create the writer node for blog posts.
+    """
+
+    try:
+        blog_post_flow, inputs = writer_flow(state)
+        with record_models() as models:
+            blog_post_result = blog_post_flow.invoke(inputs)
+
+        return with_models(WRITER_NODE, {"blog_post": blog_post_result.strip()}, models)
+
+    except Exception as e:
+        print(f"Error in writer: {e}")
+        raise NodeError(f"Failed to create blog post: {str(e)}") from e
+
+
+async def awriter(state):
+    """
+    Async version of the writer node, used when the graph is run with ainvoke.
+    """
+
+    try:
+        blog_post_flow, inputs = writer_flow(state)
+        with record_models() as models:
+            blog_post_result = await blog_post_flow.ainvoke(inputs)
+
+        return with_models(WRITER_NODE, {"blog_post": blog_post_result.strip()}, models)
+
+    except Exception as e:
+        print(f"Error in writer: {e}")
+        raise NodeError(f"Failed to create blog post: {str(e)}") from e
+
+
+def pipeline_profile(profile=None):
+    """
+    Returns the pipeline profile to run: the given one, or PIPELINE_PROFILE.
+
+    Raises:
+    ValueError: If the profile is not in PIPELINE_PROFILES.
+    """
+
+    profile = profile or PIPELINE_PROFILE
+    if profile not in PIPELINE_PROFILES:
+        raise ValueError(f"Unknown pipeline profile: {profile}. Choose from: {', '.join(PIPELINE_PROFILES)}.")
+    return profile
+
+
+def fast_path_flow(state, write, chunk_summaries=None):
+    """
+    Builds the chain of the fast path, which summarizes and anonymizes the meeting, and also
+    writes the blog post if write is set, in one call that answers with a JSON object.
+    Long transcripts are passed as the notes of their chunks, like in map-reduce summarization.
+    """
+
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    keys = '"overview", "anonymized_overview" and "blog_post"' if write else '"overview" and "anonymized_overview"'
+    writer_instructions = """
+        "blog_post": an engaging blog post based only on the anonymized overview, for a general audience or relevant stakeholders.
+        - Transform the key points into a narrative format, with a title on the first line followed by an empty line.
+        - Use a professional yet approachable tone and make sure the post flows well and is easy to read.
+        - Do not include any placeholders like [Role] or [Initiative]; write as if the information is naturally generalized.""" if write else ""
+
+    fast_path_prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are an expert meeting summarizer, a data privacy assistant and a skilled content writer.
+        Analyze the meeting summary and the meeting information below, then return a JSON object with the keys {keys}:
+
+        "overview": a clear, concise and informative overview of the meeting that captures the key discussion points,
+        the main objectives and outcomes, and the strategic direction.
+
+        "anonymized_overview": the same overview, anonymized.
+        - Replace all personal names with generic roles.
+        - Remove confidential information, especially payments, budgets and financial figures, and sensitive business information.
+        - Preserve the overall meaning, context and level of detail, following GDPR and standards such as ISO 27001 and SOC 2.
+        {writer_instructions}
+
+        Return only the JSON object, without explanations."""),
+        ("human", """Existing Summary: {fireflies_summary}
+        {meeting_information}""")
+    ])
+
+    if chunk_summaries is not None:
+        meeting_information = "Notes on each section of the meeting transcript:\n" + "\n\n".join(
+            f"Section {number}:\n{summary.strip()}" for number, summary in enumerate(chunk_summaries, start=1)
+        )
+    elif state.get("include_transcript", False):
+        meeting_information = f"Full meeting transcript: {state['meeting_transcript']}"
+    else:
+        meeting_information = ""
+
+    fast_flow = fast_path_prompt | node_llm("summarizer") | JsonOutputParser()
+
+    inputs = {
+        "keys": keys,
+        "writer_instructions": writer_instructions,
+        "fireflies_summary": json.dumps(state["fireflies_summary"]),
+        "meeting_information": meeting_information,
+    }
+
+    return fast_flow, inputs
+
+
+def fast_path_output(state, result, write):
+    """
+    Turns the fast path's JSON answer into the same state updates as the separate nodes.
+    Local redaction is applied again to the anonymized text, since no separate anonymizer reviews it.
+
+    Raises:
+    ValueError: If the answer is missing one of the requested texts.
+    """
+
+    keys = ["overview", "anonymized_overview"] + (["blog_post"] if write else [])
+    missing = [key for key in keys if not isinstance(result, dict) or not str(result.get(key) or "").strip()]
+    if missing:
+        raise ValueError(f"The answer has no {', '.join(missing)}")
+
+    meeting_redactor = state_redactor(state)
+    output = {
+        "agent_summary": [{"overview": str(result["overview"]).strip()}],
+        "agent_summary_anonymized": [{"anonymized_overview": meeting_redactor.redact(str(result["anonymized_overview"]).strip())}],
+    }
+    if write:
+        output["blog_post"] = meeting_redactor.redact(str(result["blog_post"]).strip())
+    return output
+
+
+def fast_path_nodes(profile):
+    """
+    Returns the sync and async node functions of the fast path of a pipeline profile.
+    """
+
+    node = PIPELINE_PROFILES[profile]
+    write = profile == "single"
+    failure = "summarize, anonymize and write the blog post" if write else "summarize and anonymize the meeting"
+
+    def fast_path(state):
+        try:
+            with record_models() as models:
+                chunks = transcript_chunks(state)
+                chunk_summaries = None
+                if chunks:
+                    chunk_flow, chunk_inputs = chunk_summarizer_flow(chunks)
+                    chunk_summaries = chunk_flow.batch(chunk_inputs, config={"max_concurrency": CHUNK_CONCURRENCY})
+
+                fast_flow, inputs = fast_path_flow(state, write, chunk_summaries)
+                result = fast_flow.invoke(inputs)
+
+            return with_models(node, fast_path_output(state, result, write), models)
+
+        except Exception as e:
+            print(f"Error in {node}: {e}")
+            raise NodeError(f"Failed to {failure}: {str(e)}") from e
+
+    async def afast_path(state):
+        try:
+            with record_models() as models:
+                chunks = transcript_chunks(state)
+                chunk_summaries = None
+                if chunks:
+                    chunk_flow, chunk_inputs = chunk_summarizer_flow(chunks)
+                    chunk_summaries = await chunk_flow.abatch(chunk_inputs, config={"max_concurrency": CHUNK_CONCURRENCY})
+
+                fast_flow, inputs = fast_path_flow(state, write, chunk_summaries)
+                result = await fast_flow.ainvoke(inputs)
+
+            return with_models(node, fast_path_output(state, result, write), models)
+
+        except Exception as e:
+            print(f"Error in {node}: {e}")
+            raise NodeError(f"Failed to {failure}: {str(e)}") from e
+
+    return fast_path, afast_path
+
+
+def platform_node(platform):
+    return f"write_{platform}"
+
+
+def platform_names(platforms=None):
+    """
+    Returns the platforms to write variants for: the given ones, or PLATFORM_VARIANTS.
+
+    Raises:
+    ValueError: If a platform is not in PLATFORM_POSTS.
+    """
+
+    platforms = list(dict.fromkeys(PLATFORM_VARIANTS if platforms is None else platforms))
+    unknown = [platform for platform in platforms if platform not in PLATFORM_POSTS]
+    if unknown:
+        raise ValueError(f"Unknown platform(s): {', '.join(unknown)}. Choose from: {', '.join(PLATFORM_POSTS)}.")
+    return platforms
+
+
+def fit_length(text, max_characters):
+    """
+    Shortens text to at most max_characters, cutting at the last whitespace and adding an ellipsis.
+    """
+
+    text = text.strip()
+    if len(text) <= max_characters:
+        return text
+
+    cut = text[:max_characters - 1]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(" ,;:-") + "…"
+
+
+def platform_writer_flow(state, platform):
+    """
+    Builds the writer chain of one platform variant and its inputs for the given state.
+    """
+
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    settings = PLATFORM_POSTS[platform]
+
+    platform_prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are a skilled content writer who adapts insights from meetings for social media and newsletters.
+        
+        Your goal is to:
+        - Turn the key points of an anonymized meeting overview into {description}.
+        - Stay under {max_characters} characters in total.
+        {guidelines}
+        - Use a professional yet approachable tone, without revealing confidential details.
+        
+        Do not include any placeholders like [Role] or [Initiative]; write as if the information is naturally generalized based on the input."""),
+        ("human", """Please write {description} based on the following anonymized meeting overview:
+
+        {anonymized_summary}
+
+        Generate only the post itself.""")
+    ])
+
+    platform_flow = platform_prompt | node_llm("writer") | StrOutputParser()
+
+    inputs = {
+        "description": settings["description"],
+        "max_characters": settings["max_characters"],
+        "guidelines": settings["guidelines"],
+        "anonymized_summary": state["agent_summary_anonymized"][0]['anonymized_overview']
+    }
+
+    return platform_flow, inputs
+
+
+def platform_writer_output(platform, result):
+    return {"platform_posts": {platform: fit_length(result, PLATFORM_POSTS[platform]["max_characters"])}}
+
+
+def platform_writers(platform):
+    """
+    Returns the sync and async node functions that write the variant for one platform.
+    """
+
+    def platform_writer(state):
+        try:
+            platform_flow, inputs = platform_writer_flow(state, platform)
+            with record_models() as models:
+                result = platform_flow.invoke(inputs)
+
+            return with_models(platform_node(platform), platform_writer_output(platform, result), models)
+
+        except Exception as e:
+            print(f"Error in {platform} writer: {e}")
+            raise NodeError(f"Failed to create the {platform} post: {str(e)}") from e
+
+    async def aplatform_writer(state):
+        try:
+            platform_flow, inputs = platform_writer_flow(state, platform)
+            with record_models() as models:
+                result = await platform_flow.ainvoke(inputs)
+
+            return with_models(platform_node(platform), platform_writer_output(platform, result), models)
+
+        except Exception as e:
+            print(f"Error in {platform} writer: {e}")
+            raise NodeError(f"Failed to create the {platform} post: {str(e)}") from e
+
+    return platform_writer, aplatform_writer
+
+
+def route_writers(state):
+    """
+    Sends the anonymized summary to the blog post writer and to the writer of every platform
+    variant the run asks for. LangGraph runs them concurrently.
+    """
+
+    return [WRITER_NODE] + [platform_node(platform) for platform in state.get("platforms") or []]
+
+
+def route_platform_writers(state):
+    """
+    Sends the anonymized summary to the writer of every platform variant the run asks for,
+    when the blog post has already been written. Ends the run if there are none.
+    """
+
+    from langgraph.graph import END
+    return [platform_node(platform) for platform in state.get("platforms") or []] or END
+
+
+def build_summarizer_graph(checkpointer=None, profile="standard"):
+    """
+    Function to create flow graph for the AI Agent.
+    Each node has a sync and an async implementation, so the graph supports both invoke and ainvoke.
+    With a checkpointer, the state is saved after every node.
+    Use get_agent to share a single compiled graph across the process.
+    Every node is timed as a telemetry span.
+    After anonymization, the blog post and the requested platform variants are written in parallel.
+    The "combined" and "single" profiles replace the summarizer and anonymizer, and for "single"
+    the writer, with one fast path node (see PIPELINE_PROFILES).
+    """
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import END, StateGraph
+
+    graph_builder = StateGraph(State)
+    fast_path_node = PIPELINE_PROFILES[profile]
+
+    # Add Nodes
+    graph_builder.add_node("redact_input", traced("node", "redact_input", redactor))
+    if fast_path_node is None:
+        graph_builder.add_node("create_summary", RunnableLambda(
+            traced("node", "create_summary", summarizer), afunc=traced("node", "create_summary", asummarizer)
+        ))
+        graph_builder.add_node("anonymize_output", RunnableLambda(
+            traced("node", "anonymize_output", anonymizer), afunc=traced("node", "anonymize_output", aanonymizer)
+        ))
+    else:
+        fast_path, afast_path = fast_path_nodes(profile)
+        graph_builder.add_node(fast_path_node, RunnableLambda(
+            traced("node", fast_path_node, fast_path), afunc=traced("node", fast_path_node, afast_path)
+        ))
+    if profile != "single":
+        graph_builder.add_node(WRITER_NODE, RunnableLambda(
+            traced("node", WRITER_NODE, writer), afunc=traced("node", WRITER_NODE, awriter)
+        ))
+    for platform in PLATFORM_POSTS:
+        platform_writer, aplatform_writer = platform_writers(platform)
+        graph_builder.add_node(platform_node(platform), RunnableLambda(
+            traced("node", platform_node(platform), platform_writer),
+            afunc=traced("node", platform_node(platform), aplatform_writer)
+        ))
+
+    # Define Flow
+    platform_nodes = [platform_node(platform) for platform in PLATFORM_POSTS]
+    if fast_path_node is None:
+        graph_builder.add_edge("redact_input", "create_summary")
+        graph_builder.add_edge("create_summary", "anonymize_output")
+        graph_builder.add_conditional_edges("anonymize_output", route_writers, [WRITER_NODE] + platform_nodes)
+    elif profile == "combined":
+        graph_builder.add_edge("redact_input", fast_path_node)
+        graph_builder.add_conditional_edges(fast_path_node, route_writers, [WRITER_NODE] + platform_nodes)
+    else:
+        graph_builder.add_edge("redact_input", fast_path_node)
+        graph_builder.add_conditional_edges(fast_path_node, route_platform_writers, platform_nodes + [END])
+
+    # Set entry point
+    graph_builder.set_entry_point("redact_input")
+
+    return graph_builder.compile(checkpointer=checkpointer)
+
+
+def get_agent(profile=None):
+    """
+    Returns the shared compiled graph of the AI Agent for a pipeline profile (default
+    PIPELINE_PROFILE), building it on first use. All profiles share one checkpointer.
+    """
+
+    global checkpointer, usage_handler, rate_limit_handler
+
+    profile = pipeline_profile(profile)
+
+    if profile not in agents:
+        with lazy_init_lock:
+            if profile not in agents:
+                if not agents:
+                    from checkpoints import CHECKPOINTS_ENABLED, MeetingCheckpointer
+
+                    if TELEMETRY_MODE != "off":
+                        from llm_usage import LLMUsageHandler
+                        usage_handler = LLMUsageHandler()
+
+                    from llm_usage import RateLimitHandler
+                    rate_limit_handler = RateLimitHandler()
+
+                    checkpointer = MeetingCheckpointer() if CHECKPOINTS_ENABLED else None
+
+                agents[profile] = build_summarizer_graph(checkpointer, profile)
+
+    return agents[profile]
+
+
+def meeting_config(meeting_id):
+    """
+    Returns the graph config that keys the checkpoints of a run by its meeting id.
+    """
+
+    return {"configurable": {"thread_id": meeting_id}}
+
+
+def run_config(meeting_id=None):
+    """
+    Returns the graph config of a run: the meeting's checkpoint thread, if checkpoints are
+    enabled, the callback that counts LLM tokens per node and the one that estimates LLM calls
+    for the rate limiter, which shares the LLM between meetings by the meeting_id metadata.
+    """
+
+    config = meeting_config(meeting_id) if checkpointer is not None else {}
+    if meeting_id is not None:
+        config["metadata"] = {"meeting_id": meeting_id}
+
+    callbacks = [handler for handler in (usage_handler, rate_limit_handler) if handler is not None]
+    if callbacks:
+        config["callbacks"] = callbacks
+    return config
+
+
+def resume_input(snapshot, state):
+    """
+    Returns the input that continues an unfinished run of the same meeting from its last
+    completed node (None), or state to start a new run. A run that analyzed the transcript
+    differently, asked for other platform variants or used another pipeline profile is not resumed.
+    A new run has to delete the meeting's checkpoints first: the reducers would otherwise merge
+    the posts, models and messages of the earlier run into it.
+    """
+
+    if (
+        snapshot.next
+        and snapshot.values.get("include_transcript") == state["include_transcript"]
+        and snapshot.values.get("platforms", []) == state["platforms"]
+        and snapshot.values.get("profile", "standard") == state["profile"]
+    ):
+        return None
+    return state
+
+
+def run_agent(state, meeting_id):
+    """
+    Runs the AI Agent for one meeting, resuming a previous failed or interrupted run of that
+    meeting where it stopped. Checkpoints of the meeting are removed once the run completes.
+
+    Raises:
+    NodeError: If a node fails. Running the meeting again resumes at that node.
+    """
+
+    agent = get_agent(state["profile"])
+    config = run_config(meeting_id)
+
+    with span("agent_run", "blog_post", meeting_id=meeting_id):
+        if checkpointer is None:
+            return agent.invoke(state, config)
+
+        graph_input = resume_input(agent.get_state(config), state)
+        if graph_input is not None:
+            checkpointer.delete_thread(meeting_id)
+        result = agent.invoke(graph_input, config)
+        checkpointer.delete_thread(meeting_id)
+
+    return result
+
+
+async def arun_agent(state, meeting_id):
+    """
+    Async version of run_agent.
+    """
+
+    agent = get_agent(state["profile"])
+    config = run_config(meeting_id)
+
+    with span("agent_run", "blog_post", meeting_id=meeting_id):
+        if checkpointer is None:
+            return await agent.ainvoke(state, config)
+
+        graph_input = resume_input(await agent.aget_state(config), state)
+        if graph_input is not None:
+            await checkpointer.adelete_thread(meeting_id)
+        result = await agent.ainvoke(graph_input, config)
+        await checkpointer.adelete_thread(meeting_id)
+
+    return result
+
+
+async def astream_agent(state, meeting_id, stream_mode):
+    """
+    Streams a run of the AI Agent for one meeting like arun_agent, yielding what the graph's
+    astream yields for stream_mode. Nodes completed by a resumed run are not streamed again.
+    """
+
+    agent = get_agent(state["profile"])
+    config = run_config(meeting_id)
+
+    if checkpointer is None:
+        async for chunk in agent.astream(state, config, stream_mode=stream_mode):
+            yield chunk
+        return
+
+    graph_input = resume_input(await agent.aget_state(config), state)
+    if graph_input is not None:
+        await checkpointer.adelete_thread(meeting_id)
+    async for chunk in agent.astream(graph_input, config, stream_mode=stream_mode):
+        yield chunk
+    await checkpointer.adelete_thread(meeting_id)
+
+
+def initial_state(fireflies_summary, meeting_transcript, include_transcript=False, speaker_names=None, platforms=None,
+                  profile=None):
+    """
+    Builds the input state of the AI Agent for a single meeting.
+    speaker_names lists the meeting's participants for local redaction; when it is not given,
+    they are read from the "Speaker: text" turns of the transcript.
+    platforms lists the platform variants to write besides the blog post (see PLATFORM_POSTS);
+    it defaults to PLATFORM_VARIANTS.
+    profile is the pipeline profile that runs the meeting (see PIPELINE_PROFILES); it defaults
+    to PIPELINE_PROFILE. Every profile produces the same state.
+
+    Raises:
+    ValueError: If a platform or the profile is unknown.
+    """
+
+    return {
+        "messages": [],
+        "fireflies_summary": fireflies_summary,
+        "meeting_transcript": meeting_transcript,
+        "include_transcript": include_transcript,
+        "speaker_names": speaker_names or [],
+        "pre_redacted": False,
+        "agent_summary": {},
+        "agent_summary_anonymized": {},
+        "blog_post": "",
+        "platforms": platform_names(platforms),
+        "platform_posts": {},
+        "models": {},
+        "profile": pipeline_profile(profile)
+    }
+
+
+async def process_meetings(meeting_ids, include_transcript=False, concurrency=MAX_CONCURRENT_MEETINGS, token_budget=None, platforms=None,
+                           profile=None):
+    """
+    Runs the AI Agent over several meetings concurrently.
+
+    Sentences and summaries are fetched in batched requests that are parsed while they
+    download, and each meeting starts as soon as its transcript has arrived. The graph is run
+    with ainvoke, so each node awaits its LLM call instead of blocking, and at most
+    concurrency meetings are in flight at once. Downloading pauses while all of them are busy,
+    so only a few transcripts are held in memory however many meetings are processed.
+
+    Before a meeting is run, its prompt tokens are estimated and a transcript policy is
+    chosen: the full transcript, a compressed one, or the Fireflies summary only. Without a
+    token_budget the full transcript is used whenever include_transcript is set. Meetings that
+    do not fit in the token_budget at all are not run; their result has the over_budget
+    transcript_policy and an error. Meetings whose transcript and summary both came back
+    empty, e.g. because fetching them failed, are not run either and have an error.
+
+    Parameters:
+    meeting_ids (list): The IDs of the meetings to process.
+    include_transcript (bool): Whether the summarizer also analyzes the full meeting transcripts.
+    concurrency (int): The maximum number of meetings processed at the same time.
+    token_budget (TokenBudget): The per-meeting and per-day token budget to plan transcripts against.
+    platforms (list): The platform variants to write for every meeting; defaults to PLATFORM_VARIANTS.
+    profile (str): The pipeline profile to run every meeting with; defaults to PIPELINE_PROFILE.
+
+    Yields:
+    dict: For each meeting, in the order the meetings finish: meeting_id, meeting_transcript,
+          fireflies_summary, agent_response (None if a node failed), error (the failure, or
+          None), seconds (time spent running the graph), transcript_policy and token_estimates
+          (estimated prompt tokens per node). Failed meetings resume at the failed node when
+          they are processed again.
+    """
+
+    platforms = platform_names(platforms)  # Unknown platforms and profiles fail before any meeting is fetched
+    profile = pipeline_profile(profile)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    arrivals = asyncio.Queue(maxsize=concurrency)
+    results = asyncio.Queue()
+    stopped = threading.Event()
+    finished = object()
+    tasks = []
+
+    def download():
+        # The Fireflies client and transcript store are synchronous; they run in a worker thread
+        # that hands each meeting over to the event loop, waiting while the loop is busy
+        def hand_over(item):
+            future = asyncio.run_coroutine_threadsafe(arrivals.put(item), loop)
+            while not stopped.is_set():
+                try:
+                    return future.result(timeout=0.1)
+                except concurrent.futures.TimeoutError:
+                    pass
+            future.cancel()
+
+        try:
+            for item in iter_transcripts(meeting_ids):
+                if stopped.is_set():
+                    return
+                hand_over(item)
+        finally:
+            hand_over(None)
+
+    async def process(meeting_id, details):
+        try:
+            started = time.perf_counter()
+            # Only the grouped text of the transcript is kept while the meeting is processed
+            sentences = details.pop('sentences')
+            meeting_transcript = group_speaker_text(sentences)
+            speakers = speaker_names(sentences)
+            del sentences
+
+            fetched = bool(meeting_transcript or details['summary'])
+            if token_budget is not None and fetched:
+                plan = token_budget.plan(details['summary'], meeting_transcript, include_transcript)
+            else:
+                plan = plan_transcript(details['summary'], meeting_transcript, include_transcript)
+
+            if not fetched:
+                # An empty or failed fetch would have the agent make a post up
+                agent_response, error = None, details.get('error') or NO_TRANSCRIPT
+            elif plan['policy'] == OVER_BUDGET:
+                # Left for a later run, when the daily budget has room again
+                agent_response, error = None, "Skipped: not even the Fireflies summary fits in the remaining token budget"
+            else:
+                state = initial_state(
+                    details['summary'], plan['meeting_transcript'], plan['include_transcript'],
+                    speakers, platforms, profile
+                )
+
+                try:
+                    agent_response, error = await arun_agent(state, meeting_id), None
+                except NodeError as e:
+                    agent_response, error = None, str(e)
+
+            await results.put({
+                "meeting_id": meeting_id,
+                "meeting_transcript": meeting_transcript,
+                "fireflies_summary": details['summary'],
+                "agent_response": agent_response,
+                "error": error,
+                "seconds": time.perf_counter() - started,
+                "transcript_policy": plan['policy'],
+                "token_estimates": plan['estimates']
+            })
+        except Exception as e:
+            await results.put(e)
+        finally:
+            semaphore.release()
+
+    async def dispatch():
+        while True:
+            await semaphore.acquire()
+            item = await arrivals.get()
+            if item is None:
+                semaphore.release()
+                break
+            tasks.append(asyncio.create_task(process(*item)))
+
+        await asyncio.gather(*tasks)
+        await results.put(finished)
+
+    downloader = asyncio.create_task(asyncio.to_thread(download))
+    dispatcher = asyncio.create_task(dispatch())
+    try:
+        while True:
+            result = await results.get()
+            if result is finished:
+                break
+            if isinstance(result, Exception):
+                raise result
+            yield result
+
+        await downloader
+    finally:
+        stopped.set()
+        for task in [dispatcher, *tasks]:
+            task.cancel()
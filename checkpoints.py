@@ -0,0 +1,47 @@
+import os
+import asyncio
+import sqlite3
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+CHECKPOINTS_ENABLED = os.getenv("GRAPH_CHECKPOINTS", "1") != "0"
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "../output/checkpoints.db")
+
+
+class MeetingCheckpointer(SqliteSaver):
+    """
+    SQLite checkpointer that stores the graph state after every node, one thread per meeting id.
+
+    LangGraph's SqliteSaver only supports invoke and its async counterpart needs a connection
+    bound to one event loop. The shared graph is run both ways, so the async methods run the
+    synchronous ones in a worker thread; SqliteSaver serializes access to its connection.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        super().__init__(connection)
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
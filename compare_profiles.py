@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime
+
+from benchmark import git_revision, stage_statistics
+from benchmark_standins import FakeChatModel, synthetic_transcript
+
+PROFILES = ("standard", "combined", "single")
+
+
+def load_corpus(args):
+    """
+    Returns the meetings to compare the profiles on: the JSON transcripts of args.corpus
+    ({"id", "sentences", "summary"}, as the Fireflies API returns them), or deterministic
+    synthetic meetings.
+    """
+
+    if not args.corpus:
+        return [
+            json.loads(synthetic_transcript(f"meeting-{index:04d}", args.sentences, args.speakers, args.words_per_sentence))
+            for index in range(args.meetings)
+        ]
+
+    meetings = []
+    for name in sorted(os.listdir(args.corpus)):
+        if name.endswith(".json"):
+            with open(os.path.join(args.corpus, name)) as file:
+                meeting = json.load(file)
+            meeting.setdefault("id", name[:-len(".json")])
+            meetings.append(meeting)
+
+    if not meetings:
+        raise SystemExit(f"No .json transcripts in {args.corpus}.")
+    return meetings
+
+
+def leak_counts(meeting_redactor, result):
+    """
+    Returns the names and dictionary terms the local redactor still finds in the anonymized
+    overview, the blog post and the platform posts of a run.
+    """
+
+    texts = {
+        "anonymized_overview": result["agent_summary_anonymized"][0]["anonymized_overview"],
+        "blog_post": result["blog_post"],
+    }
+    texts.update({f"platform_{platform}": post for platform, post in result.get("platform_posts", {}).items()})
+
+    leaks = {name: meeting_redactor.leaked_terms(text) for name, text in texts.items()}
+    return {name: terms for name, terms in leaks.items() if terms}
+
+
+def keyword_coverage(summary, blog_post):
+    # Share of the Fireflies keywords that made it into the blog post
+    keywords = [keyword.lower() for keyword in (summary or {}).get("keywords") or []]
+    if not keywords:
+        return None
+    text = blog_post.lower()
+    return sum(keyword in text for keyword in keywords) / len(keywords)
+
+
+def run_profile(profile, meetings, args):
+    """
+    Runs every meeting of the corpus with the profile and returns its latency, tokens and
+    quality figures.
+    """
+
+    import blog_agent
+    from fireflies import group_speaker_text
+    from redaction import speaker_names
+    from telemetry import span
+
+    latencies, tokens, coverage = [], [], []
+    prompt_tokens = completion_tokens = 0
+    leaks = {}
+    failures = []
+
+    for iteration in range(args.iterations):
+        for meeting in meetings:
+            state = blog_agent.initial_state(
+                meeting["summary"], group_speaker_text(meeting["sentences"]), args.include_transcript,
+                speaker_names(meeting["sentences"]),
+                args.platform or [], profile
+            )
+            # A run id of its own, so no run resumes the checkpoint of another
+            run_id = f"compare-{profile}-{iteration}-{meeting['id']}"
+
+            started = time.perf_counter()
+            try:
+                with span("comparison", profile, meeting_id=meeting["id"]) as current:
+                    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                        result = blog_agent.run_agent(state, run_id)
+            except blog_agent.NodeError as e:
+                failures.append({"meeting_id": meeting["id"], "error": str(e)})
+                continue
+            latencies.append(time.perf_counter() - started)
+
+            usage = current.usage()
+            prompt_tokens += usage["prompt_tokens"]
+            completion_tokens += usage["completion_tokens"]
+            tokens.append(usage["prompt_tokens"] + usage["completion_tokens"])
+
+            found = leak_counts(blog_agent.state_redactor(state), result)
+            if found:
+                leaks[meeting["id"]] = found
+
+            covered = keyword_coverage(meeting["summary"], result["blog_post"])
+            if covered is not None:
+                coverage.append(covered)
+
+    runs = len(latencies)
+    return {
+        "runs": runs,
+        "failures": failures,
+        "seconds": stage_statistics(latencies),
+        "tokens": {
+            "prompt": prompt_tokens,
+            "completion": completion_tokens,
+            "per_meeting": sum(tokens) / runs if runs else None,
+        },
+        "leaked_names": sum(len(terms) for found in leaks.values() for terms in found.values()),
+        "leaks": leaks,
+        "keyword_coverage": sum(coverage) / len(coverage) if coverage else None,
+    }
+
+
+def print_comparison(report):
+    """
+    Prints the latency, tokens and leaked names of every profile next to the standard one's.
+    """
+
+    profiles = report["profiles"]
+    reference = profiles.get("standard")
+
+    print(f"\n{'Profile':<10} {'Runs':>5} {'p50 (s)':>9} {'p90 (s)':>9} {'Tokens':>9} {'Change':>8} {'Leaks':>6} {'Keywords':>9}")
+    for name, result in profiles.items():
+        seconds, per_meeting = result["seconds"], result["tokens"]["per_meeting"]
+        change = ""
+        if reference and reference["tokens"]["per_meeting"] and per_meeting is not None:
+            change = f"{(per_meeting - reference['tokens']['per_meeting']) / reference['tokens']['per_meeting']:+.1%}"
+        coverage = "" if result["keyword_coverage"] is None else f"{result['keyword_coverage']:.0%}"
+
+        print(
+            f"{name:<10} {result['runs']:>5} {seconds.get('p50', 0):>9.2f} {seconds.get('p90', 0):>9.2f} "
+            f"{per_meeting or 0:>9.0f} {change:>8} {result['leaked_names']:>6} {coverage:>9}"
+        )
+
+
+def configure_environment(workdir, args):
+    """
+    Keeps the checkpoints and token ledger of the comparison in workdir, and turns off the
+    LLM response cache unless asked for, so every profile pays for its own calls. Must run
+    before the repository's modules are imported.
+    """
+
+    os.environ.update({
+        "CHECKPOINT_PATH": os.path.join(workdir, "checkpoints.db"),
+        "TOKEN_LEDGER_PATH": os.path.join(workdir, "token_usage.json"),
+        "LLM_CACHE": "1" if args.cache else "0",
+    })
+    # Tokens are counted on telemetry spans
+    if os.getenv("TELEMETRY") == "off":
+        os.environ["TELEMETRY"] = "metrics"
+
+    if args.fake_llm:
+        os.environ.update({
+            "RATE_LIMIT_PATH": "",
+            "GROQ_REQUESTS_PER_MINUTE": "0",
+            "GROQ_TOKENS_PER_MINUTE": "0",
+        })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare the latency, LLM tokens and leaked names of the pipeline profiles over a fixed set of meetings."
+    )
+    parser.add_argument("--profile", action="append", choices=PROFILES,
+                        help="Profile to run. Repeatable (default: all).")
+    parser.add_argument("--corpus",
+                        help="Directory of meeting transcripts as JSON files with the Fireflies \"sentences\" and \"summary\" "
+                             "(default: synthetic meetings).")
+    parser.add_argument("--meetings", type=int, default=5, help="Synthetic meetings to generate without --corpus (default: 5).")
+    parser.add_argument("--sentences", type=int, default=120, help="Sentences per synthetic meeting (default: 120).")
+    parser.add_argument("--speakers", type=int, default=4, help="Speakers per synthetic meeting (default: 4, max 6).")
+    parser.add_argument("--words-per-sentence", type=int, default=14, help="Average words per synthetic sentence (default: 14).")
+    parser.add_argument("--iterations", type=int, default=1, help="Runs of every meeting per profile (default: 1).")
+    parser.add_argument("--include-transcript", action="store_true", help="Let the LLM read the transcripts.")
+    parser.add_argument("--platform", action="append",
+                        help="Also write this platform variant of every blog post, e.g. linkedin. Repeatable (default: none).")
+    parser.add_argument("--cache", action="store_true",
+                        help="Use the LLM response cache. Cached calls cost no tokens, so only use it to repeat a comparison cheaply.")
+    parser.add_argument("--fake-llm", action="store_true",
+                        help="Answer with the benchmark's fake chat model instead of Groq, to check the harness or the "
+                             "latency of the graph itself.")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds before the fake model's first token (default: 0.3).")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=250.0, help="Fake model output rate (default: 250).")
+    parser.add_argument("--llm-completion-tokens", type=int, default=300, help="Tokens in every fake model answer (default: 300).")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of standard output.")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    profiles = args.profile or list(PROFILES)
+    meetings = load_corpus(args)
+
+    with tempfile.TemporaryDirectory(prefix="compare-profiles-") as workdir:
+        configure_environment(workdir, args)
+
+        import blog_agent
+        if args.fake_llm:
+            for model in blog_agent.configured_models():
+                blog_agent.llms[model] = FakeChatModel(
+                    latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second,
+                    completion_tokens=args.llm_completion_tokens, cache=False
+                )
+
+        report = {
+            "revision": git_revision(),
+            "timestamp": datetime.utcnow().isoformat() + 'Z',
+            "config": {
+                "corpus": args.corpus or "synthetic",
+                "meetings": [meeting["id"] for meeting in meetings],
+                "iterations": args.iterations,
+                "include_transcript": args.include_transcript,
+                "platforms": args.platform or [],
+                "cache": args.cache,
+                "llm": "fake" if args.fake_llm else blog_agent.NODE_MODELS,
+            },
+            "profiles": {},
+        }
+
+        for profile in profiles:
+            print(f"Running the {profile} profile...", file=sys.stderr)
+            report["profiles"][profile] = run_profile(profile, meetings, args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+    print_comparison(report)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
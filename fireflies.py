@@ -0,0 +1,446 @@
+import os
+import queue
+import threading
+import contextvars
+import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from fireflies_queries import batch_transcript_ids, build_transcripts_query
+from http_client import fireflies_session
+from json_stream import iter_json_members
+from transcript_store import TranscriptStore
+
+API_KEY = os.getenv('FIREFLIES_API_KEY')
+BASE_URL = os.getenv('FIREFLIES_API_URL', "https://api.fireflies.ai/graphql")
+
+PAGE_SIZE = 50  # Number of transcripts per listing page. Max allowed: 50
+MAX_PAGES_IN_FLIGHT = 4  # Number of listing pages requested concurrently
+STREAM_CHUNK_BYTES = 64 * 1024  # Size of the chunks in which streamed responses are read
+
+# The local transcript store is opened on first use, so importing this module creates no files
+transcript_store = None
+transcript_store_lock = threading.Lock()
+
+
+def get_transcript_store():
+    """
+    Returns the shared local transcript store, opening it on first use.
+    """
+
+    global transcript_store
+
+    if transcript_store is None:
+        with transcript_store_lock:
+            if transcript_store is None:
+                transcript_store = TranscriptStore()
+
+    return transcript_store
+
+
+class GraphQLError(requests.exceptions.RequestException):
+    """Raised when Fireflies answers a GraphQL request with errors instead of data."""
+
+
+def report_request_error(error):
+    print(f"Error: {error}")
+    if hasattr(error, 'response') and error.response is not None:
+        print("Response content:", error.response.text)
+
+
+def post_graphql(data):
+    """
+    Sends a GraphQL request to Fireflies over the shared pooled session.
+
+    Parameters:
+    data (dict): The request body containing the query and its variables.
+
+    Returns:
+    dict: The "data" object of the response.
+
+    Raises:
+    requests.exceptions.RequestException: If the request fails after retries, or the response contains GraphQL errors.
+    """
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {API_KEY}"
+    }
+
+    response = fireflies_session.post(BASE_URL, headers=headers, json=data)
+    response.raise_for_status()
+
+    body = response.json()
+    if body.get("errors"):
+        raise GraphQLError(f"Fireflies returned errors: {body['errors']}", response=response)
+    return body.get("data") or {}
+
+
+def stream_graphql(data, errors=None):
+    """
+    Sends a GraphQL request to Fireflies and parses the response while it downloads.
+
+    Parameters:
+    data (dict): The request body containing the query and its variables.
+    errors (list): Filled with the GraphQL errors of the response instead of raising them, for
+                   requests whose fields can fail on their own, such as the aliases of a batch.
+
+    Yields:
+    tuple: The name (or alias) and value of every field of the response's "data" object, as
+           soon as it has been received. Only the field being parsed is held in memory.
+
+    Raises:
+    requests.exceptions.RequestException: If the request fails after retries, the response is not valid JSON,
+                                          or it contains GraphQL errors and errors is not given.
+    """
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {API_KEY}"
+    }
+
+    with fireflies_session.post(BASE_URL, headers=headers, json=data, stream=True) as response:
+        response.raise_for_status()
+
+        other_members = {}
+        try:
+            yield from iter_json_members(response.iter_content(STREAM_CHUNK_BYTES), "data", other_members)
+        except ValueError as error:
+            raise GraphQLError(f"Fireflies returned an invalid response: {error}", response=response)
+
+        if other_members.get("errors"):
+            if errors is None:
+                raise GraphQLError(f"Fireflies returned errors: {other_members['errors']}", response=response)
+            errors.extend(other_members["errors"])
+
+
+def fetch_transcripts_page(from_timestamp, to_timestamp, skip, limit=PAGE_SIZE):
+    """
+    Fetches a single page of meetings that occurred between from_timestamp and to_timestamp.
+    Only meeting metadata is listed; use fetch_sentences to load a meeting's transcript.
+
+    Parameters:
+    from_timestamp (datetime): The start date and time.
+    to_timestamp (datetime): The end date and time.
+    skip (int): The number of transcripts to skip before this page.
+    limit (int): The number of transcripts to fetch. Max allowed: 50
+
+    Returns:
+    list: A list of JSON objects for the meetings on this page.
+
+    Raises:
+    requests.exceptions.RequestException: If the request fails.
+    """
+
+    data = {
+        "query": """
+        query Transcripts($limit: Int, $skip: Int, $fromDate: DateTime, $toDate: DateTime) {
+            transcripts(limit: $limit, skip: $skip, fromDate: $fromDate, toDate: $toDate) {
+                id
+                title
+                transcript_url
+                dateString
+                audio_url
+                video_url
+            }
+        }
+        """,
+        "variables": {
+            "limit": limit,
+            "skip": skip,
+            "fromDate": from_timestamp,
+            "toDate": to_timestamp
+        }
+    }
+
+    return post_graphql(data).get("transcripts") or []
+
+
+def iter_meetings(from_timestamp, to_timestamp, max_in_flight=MAX_PAGES_IN_FLIGHT):
+    """
+    Streams the meetings that occurred between from_timestamp and to_timestamp, page by page.
+
+    Pages are requested concurrently, with at most max_in_flight requests outstanding at once.
+    Meetings are yielded in the order Fireflies returns them as soon as their page arrives.
+    Listing stops at the first page that comes back with fewer than PAGE_SIZE transcripts;
+    any pages already requested past that point are discarded.
+
+    Parameters:
+    from_timestamp (datetime): The start date and time.
+    to_timestamp (datetime): The end date and time.
+    max_in_flight (int): The maximum number of page requests running at the same time.
+
+    Yields:
+    dict: A JSON object containing the details of a single meeting.
+
+    Raises:
+    requests.exceptions.RequestException: If any page request fails.
+    """
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        pending = deque()
+        next_skip = 0
+
+        while True:
+            while len(pending) < max_in_flight:
+                # Requests run in the caller's context, so their telemetry spans belong to its run
+                pending.append(executor.submit(
+                    contextvars.copy_context().run, fetch_transcripts_page, from_timestamp, to_timestamp, next_skip
+                ))
+                next_skip += PAGE_SIZE
+
+            page = pending.popleft().result()
+            yield from page
+
+            if len(page) < PAGE_SIZE:
+                for future in pending:
+                    future.cancel()
+                return
+
+
+def fetch_meetings(from_timestamp, to_timestamp):
+    """
+    Fetches the details of meetings that occurred between from_timestamp and to_timestamp.
+    Meetings are served from the local transcript store, and only the part of the range
+    that has not been listed before is requested from Fireflies.
+
+    Parameters:
+    from_timestamp (datetime): The start date and time.
+    to_timestamp (datetime): The end date and time.
+
+    Returns:
+    list: A list of JSON objects where each object contains details of meetings that occurred between the given dates.
+          The details include meeting id, title, transcript_url, dateString, audio_url, video_url.
+          Sentences are not included; load them with fetch_sentences.
+    """
+
+    try:
+        return get_transcript_store().list_meetings(
+            from_timestamp, to_timestamp, lambda start, end: list(iter_meetings(start, end))
+        )
+
+    except requests.exceptions.RequestException as error:
+        report_request_error(error)
+        return []
+    
+
+def request_transcripts(transcript_ids, max_in_flight=MAX_PAGES_IN_FLIGHT):
+    """
+    Requests the sentences and summary of several transcripts from Fireflies.
+
+    Transcripts are batched into aliased GraphQL documents of at most MAX_TRANSCRIPTS_PER_REQUEST
+    transcripts each, and the batches are sent concurrently, so N meetings cost about
+    N / MAX_TRANSCRIPTS_PER_REQUEST requests instead of 2 x N. Responses are parsed while they
+    download and every transcript is handed over as soon as it is complete, so at most about
+    2 x max_in_flight transcripts are held in memory however many are requested.
+
+    Parameters:
+    transcript_ids (list): The IDs of the transcripts to fetch.
+    max_in_flight (int): The maximum number of batch requests running at the same time.
+
+    Yields:
+    tuple: The ID and transcript (containing sentences and summary) of every transcript, in the
+           order they arrive. If the batch request failed before a transcript arrived, or
+           Fireflies returned null or an error for it, the transcript only has an "error"; the
+           other transcripts of the batch, and the other batches, are still yielded.
+    """
+
+    results = queue.Queue(maxsize=max_in_flight)
+    stopped = threading.Event()
+    batch_done = object()
+
+    def hand_over(item):
+        # Waits for the consumer, unless it has stopped reading
+        while not stopped.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def request_batch(batch):
+        data, aliases = build_transcripts_query(batch)
+        errors = []
+        delivered = set()
+        failure = None
+
+        try:
+            for alias, transcript in stream_graphql(data, errors):
+                if alias in aliases and transcript:
+                    delivered.add(alias)
+                    if not hand_over((aliases[alias], transcript)):
+                        return
+        except requests.exceptions.RequestException as error:
+            # Only the transcripts of this batch that have not arrived yet are lost
+            report_request_error(error)
+            failure = f"{type(error).__name__}: {error}"
+        except Exception as error:
+            hand_over(error)
+            return
+
+        if errors:
+            # A deleted or unknown meeting fails its own alias, which comes back null
+            print(f"Error: Fireflies returned errors: {errors}")
+        alias_errors = {
+            error["path"][0]: error.get("message") for error in errors if isinstance(error, dict) and error.get("path")
+        }
+
+        for alias, transcript_id in aliases.items():
+            if alias in delivered:
+                continue
+            message = alias_errors.get(alias) or failure or "Fireflies returned no transcript"
+            if not hand_over((transcript_id, {"error": f"Failed to fetch the meeting: {message}"})):
+                return
+        hand_over(batch_done)
+
+    batches = batch_transcript_ids(transcript_ids)
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    try:
+        for batch in batches:
+            executor.submit(contextvars.copy_context().run, request_batch, batch)
+
+        remaining = len(batches)
+        while remaining:
+            item = results.get()
+            if item is batch_done:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stopped.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_transcripts(transcript_ids):
+    """
+    Yields the sentences and Fireflies summary of several meetings one at a time, served from
+    the local transcript store where possible and streamed from Fireflies in batches otherwise.
+    The first meetings are available before the remaining ones have been downloaded.
+
+    Parameters:
+    transcript_ids (list): The IDs of the transcripts to fetch.
+
+    Yields:
+    tuple: The transcript ID and a dict with "sentences" (list) and "summary" (dict). Both are
+           empty for transcripts that could not be fetched, and "error" says why.
+    """
+
+    pending = list(dict.fromkeys(transcript_ids))
+
+    try:
+        # The store iterates over its own copy, since pending shrinks as transcripts arrive
+        for transcript_id, transcript in get_transcript_store().iter_transcripts(list(pending), request_transcripts):
+            pending.remove(transcript_id)
+            yield transcript_id, transcript
+
+    except requests.exceptions.RequestException as error:
+        report_request_error(error)
+        for transcript_id in pending:
+            yield transcript_id, {"sentences": [], "summary": {}, "error": f"Failed to fetch the meeting: {error}"}
+
+
+def fetch_transcripts(transcript_ids):
+    """
+    Fetches the sentences and Fireflies summary of several meetings, served from the local
+    transcript store where possible and requested from Fireflies in batches otherwise.
+    Use iter_transcripts to process meetings as they arrive instead of all at once.
+
+    Parameters:
+    transcript_ids (list): The IDs of the transcripts to fetch.
+
+    Returns:
+    dict: A dict mapping each transcript ID to a dict with "sentences" (list) and "summary" (dict).
+          Both are empty for transcripts that could not be fetched, and "error" says why.
+    """
+
+    return dict(iter_transcripts(transcript_ids))
+
+
+def fetch_sentences(transcript_id):
+    """
+    Fetches the transcript sentences of the meeting whose transcript_id has been provided.
+
+    Listing only returns meeting metadata, so this is called for the meetings that are
+    actually processed. The summary is fetched in the same request and stored, so a
+    following get_summary call does not go to Fireflies again.
+
+    Parameters:
+    transcript_id (string): The ID of the transcript to fetch.
+
+    Returns:
+    list: A list of JSON objects, each containing raw_text, speaker_name and speaker_id.
+    """
+
+    return fetch_transcripts([transcript_id])[transcript_id]["sentences"]
+
+
+def get_summary(transcript_id):
+    """
+    Fetches the meeting summary of the meeting whose transcript_id has been provided.
+    Summaries already in the local transcript store are not requested again.
+    
+    Parameters:
+    transcript_id (string): The ID of the transcript to fetch.
+    
+    Returns:
+    dict: A JSON object containing various components of the summary such as
+          keywords, action_items, outline, shorthand_bullet, overview, bullet_gist, gist, short_summary.
+    """
+
+    return fetch_transcripts([transcript_id])[transcript_id]["summary"]
+    
+
+def group_speaker_text(data):
+    """
+    Groups and formats a list of dialogue entries by speaker.
+
+    This function takes a list of dictionaries, where each dictionary contains the text 
+    of a speaker's message and the speaker's name. It organizes the messages by speaker,
+    grouping all of a speaker's messages together and formatting them into a string, 
+    with each speaker's dialogue displayed on a new line.
+
+    The function assumes that the input data is ordered in the correct sequence, 
+    with each speaker's dialogue appearing in the order they spoke.
+
+    The sentences are read once, in order, so they can also be streamed in from a generator
+    instead of a list.
+
+    Args:
+        data (iterable of dict): The sentences of the transcript, each a dictionary containing:
+            - 'raw_text' (str): The text of the message.
+            - 'speaker_name' (str): The name of the speaker.
+            - 'speaker_id' (int): An identifier for the speaker (not used in the function).
+
+    Returns:
+        str: A string where each speaker's dialogue is printed in order,
+             with their name followed by the messages they spoke, separated by spaces.
+             Each speaker's dialogue is on a new line.
+    """
+
+    result = []
+    
+    current_speaker = None
+    current_text = []
+
+    for entry in data:
+        speaker_name = entry['speaker_name']
+        raw_text = entry['raw_text']
+        
+        if speaker_name != current_speaker:
+            if current_speaker is not None:
+                result.append(f"{current_speaker}: {' '.join(current_text)}")
+            current_speaker = speaker_name
+            current_text = [raw_text]
+        else:
+            current_text.append(raw_text)
+
+    if current_speaker is not None:
+        result.append(f"{current_speaker}: {' '.join(current_text)}")
+
+    return "\n".join(result)
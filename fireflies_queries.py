@@ -0,0 +1,75 @@
+import os
+
+# Number of transcripts fetched in a single GraphQL document
+MAX_TRANSCRIPTS_PER_REQUEST = int(os.getenv("FIREFLIES_MAX_TRANSCRIPTS_PER_REQUEST", "10"))
+
+SENTENCE_FIELDS = """
+                sentences {
+                    raw_text
+                    speaker_name
+                    speaker_id
+                }"""
+
+SUMMARY_FIELDS = """
+                summary {
+                    keywords
+                    action_items
+                    outline
+                    shorthand_bullet
+                    overview
+                    bullet_gist
+                    gist
+                    short_summary
+                }"""
+
+
+def build_transcripts_query(transcript_ids, include_sentences=True, include_summary=True):
+    """
+    Builds a single GraphQL request that fetches several transcripts at once.
+
+    Each transcript is requested through its own aliased `transcript(id:)` field
+    (t0, t1, ...), so sentences and summary for every id come back in one round trip.
+
+    Parameters:
+    transcript_ids (list): The IDs of the transcripts to fetch.
+    include_sentences (bool): Whether to select the transcript sentences.
+    include_summary (bool): Whether to select the Fireflies summary.
+
+    Returns:
+    tuple: The request body (dict with query and variables) and a dict mapping each alias to its transcript id.
+    """
+
+    fields = "\n                id"
+    if include_sentences:
+        fields += SENTENCE_FIELDS
+    if include_summary:
+        fields += SUMMARY_FIELDS
+
+    aliases = {f"t{index}": transcript_id for index, transcript_id in enumerate(transcript_ids)}
+
+    parameters = ", ".join(f"${alias}: String!" for alias in aliases)
+    selections = "".join(
+        f"""
+            {alias}: transcript(id: ${alias}) {{{fields}
+            }}"""
+        for alias in aliases
+    )
+
+    data = {
+        "query": f"""
+        query Transcripts({parameters}) {{{selections}
+        }}
+        """,
+        "variables": {alias: f"{transcript_id}" for alias, transcript_id in aliases.items()}
+    }
+
+    return data, aliases
+
+
+def batch_transcript_ids(transcript_ids, batch_size=MAX_TRANSCRIPTS_PER_REQUEST):
+    """
+    Splits transcript ids into batches of at most batch_size, dropping duplicates while keeping order.
+    """
+
+    unique_ids = list(dict.fromkeys(transcript_ids))
+    return [unique_ids[start:start + batch_size] for start in range(0, len(unique_ids), batch_size)]
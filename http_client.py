@@ -0,0 +1,90 @@
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from rate_limits import fireflies_limiter
+from telemetry import record_http_response, span
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "5"))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))  # Seconds; doubled on every retry
+BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))  # Random seconds added to every backoff
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+
+# Responses that mean the request was not processed and can be sent again
+TRANSIENT_STATUSES = (429, 502, 503, 504)
+
+
+class PooledSession(requests.Session):
+    """
+    A requests session with keep-alive connection pooling, default timeouts and retries.
+
+    Connections are reused across calls and capped at max_connections per host; callers
+    wait for a free connection instead of opening more. Failed connections and responses
+    with a retry status are retried with jittered exponential backoff, waiting for the
+    server's Retry-After header when one is sent. Once retries are exhausted the last
+    response is returned so callers can still use raise_for_status().
+
+    Requests that fail after being sent (read errors) are only retried when retry_reads is set,
+    since the server may already have acted on them.
+
+    With a rate_limiter, every request first waits for the service's requests-per-minute limit,
+    and a 429 response that is still returned after retries empties it, so every process
+    backs off.
+
+    Every request is timed as an "http" telemetry span named after the service, with its
+    status code and the number of retries it took.
+    """
+
+    def __init__(self, service, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_retries=MAX_RETRIES,
+                 retry_statuses=TRANSIENT_STATUSES, retry_methods=("GET", "HEAD", "OPTIONS", "POST"),
+                 retry_reads=True, max_connections=MAX_CONNECTIONS_PER_HOST, rate_limiter=None):
+        super().__init__()
+        self.service = service
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+
+        retry = Retry(
+            total=max_retries,
+            read=None if retry_reads else 0,
+            status_forcelist=retry_statuses,
+            allowed_methods=frozenset(retry_methods),
+            backoff_factor=BACKOFF_FACTOR,
+            backoff_jitter=BACKOFF_JITTER,
+            backoff_max=BACKOFF_MAX,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+
+        adapter = HTTPAdapter(pool_maxsize=max_connections, pool_block=True, max_retries=retry)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+
+        with span("http", self.service, method=method) as current:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            response = super().request(method, url, **kwargs)
+            current.set(status_code=response.status_code, retries=record_http_response(self.service, response))
+            if response.status_code == 429 and self.rate_limiter is not None:
+                self.rate_limiter.drain()
+            if response.status_code >= 400:
+                current.fail(f"HTTP {response.status_code}")
+            return response
+
+
+# GraphQL queries are read-only, so every Fireflies request can safely be retried.
+fireflies_session = PooledSession("fireflies", rate_limiter=fireflies_limiter)
+
+# A WordPress POST creates a post, so only retry responses that guarantee nothing was created.
+wordpress_session = PooledSession("wordpress", retry_statuses=(429, 503), retry_reads=False)
@@ -0,0 +1,222 @@
+import os
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+
+from mcp_logic import stream_blog_post
+from publish_queue import PUBLISHED, get_publish_queue
+from telemetry import span
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Meetings generated at the same time
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", "100"))  # Jobs waiting for a worker before submissions are refused
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "1000"))  # Finished jobs kept for the status API
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Progress events of stream_blog_post that end a stage, and the name of that stage
+STAGE_EVENTS = {
+    "fetched": "fetch",
+    "redacted": "redact",
+    "summarized": "summarize",
+    "anonymized": "anonymize",
+    "done": "write",
+}
+
+
+class QueueFull(Exception):
+    """
+    Raised when a job is submitted while the queue already holds JOB_QUEUE_DEPTH jobs.
+    """
+
+
+class Job:
+    """
+    A request to generate and publish the blog post of one meeting.
+    """
+
+    def __init__(self, meeting_id, include_transcript=False, schedule_time=None, platforms=None, profile=None):
+        self.id = uuid.uuid4().hex
+        self.meeting_id = meeting_id
+        self.include_transcript = include_transcript
+        self.platforms = platforms  # Platform variants written alongside the blog post; None for the default ones
+        self.profile = profile  # Pipeline profile; None for PIPELINE_PROFILE
+        self.schedule_time = schedule_time
+        self.status = QUEUED
+        self.stages = {}  # Seconds spent in each stage, in the order they ran
+        self.result = None
+        self.error = None
+        self.usage = None  # LLM tokens and cost of the blog post
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def as_dict(self):
+        return {
+            "job_id": self.id,
+            "meeting_id": self.meeting_id,
+            "status": self.status,
+            "stages": self.stages,
+            "result": self.result,
+            "error": self.error,
+            "usage": self.usage,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    Runs post-meeting jobs in the background on a fixed pool of async workers.
+
+    Jobs are idempotent by meeting id: submitting a meeting that is already queued, running or
+    published returns the existing job, and only a failed job is replaced by a new one. At most
+    max_depth jobs wait for a worker; beyond that, submit raises QueueFull so that callers can
+    back off instead of piling up work.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_depth=JOB_QUEUE_DEPTH, history=JOB_HISTORY):
+        self.worker_count = workers
+        self.max_depth = max_depth
+        self.history = history
+        self.jobs = OrderedDict()
+        self.meeting_jobs = {}
+        self.queue = None
+        self.workers = []
+
+    def start(self):
+        """
+        Starts the workers on the running event loop.
+        """
+
+        self.queue = asyncio.Queue(maxsize=self.max_depth)
+        self.workers = [asyncio.create_task(self.work()) for _ in range(self.worker_count)]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def submit(self, meeting_id, include_transcript=False, schedule_time=None, platforms=None, profile=None):
+        """
+        Enqueues a job for the meeting unless it already has one.
+
+        Returns:
+        tuple: The job, and whether it was newly created.
+        """
+
+        existing = self.jobs.get(self.meeting_jobs.get(meeting_id))
+        if existing is not None and existing.status != FAILED:
+            return existing, False
+
+        job = Job(meeting_id, include_transcript, schedule_time, platforms, profile)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"{self.max_depth} jobs are already waiting")
+
+        self.jobs[job.id] = job
+        self.meeting_jobs[meeting_id] = job.id
+        self.prune()
+
+        return job, True
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def prune(self):
+        """
+        Forgets the oldest finished jobs once more than history jobs are kept.
+        """
+
+        finished = [job for job in self.jobs.values() if job.status in (SUCCEEDED, FAILED)]
+        for job in finished[:max(0, len(self.jobs) - self.history)]:
+            del self.jobs[job.id]
+            if self.meeting_jobs.get(job.meeting_id) == job.id:
+                del self.meeting_jobs[job.meeting_id]
+
+    def collect_metrics(self):
+        """
+        Yields the queue depth and the number of kept jobs per status for /metrics.
+        """
+
+        yield "job_queue_depth", "gauge", "Jobs waiting for a worker.", {}, self.queue.qsize() if self.queue else 0
+
+        statuses = dict.fromkeys((QUEUED, RUNNING, SUCCEEDED, FAILED), 0)
+        for job in list(self.jobs.values()):
+            statuses[job.status] += 1
+        for status, count in statuses.items():
+            yield "jobs", "gauge", "Kept jobs per status.", {"status": status}, count
+
+    async def work(self):
+        while True:
+            job = await self.queue.get()
+            with span("job", "blog_post", job_id=job.id, meeting_id=job.meeting_id) as current:
+                try:
+                    await self.run(job)
+                except Exception as e:
+                    job.status = FAILED
+                    job.error = str(e)
+                finally:
+                    job.finished_at = time.time()
+                    job.usage = current.usage()
+                    self.queue.task_done()
+
+                if job.status == FAILED:
+                    current.fail(job.error)
+
+    async def run(self, job):
+        """
+        Generates the blog post of the job's meeting and posts it to WordPress, timing each stage.
+        """
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        stage_started = time.perf_counter()
+        blog_post = None
+        platform_posts = {}
+        models = {}
+
+        async for event in stream_blog_post(job.meeting_id, job.include_transcript, job.platforms, job.profile):
+            name, data = event["event"], event["data"]
+
+            if name == "error":
+                job.status = FAILED
+                job.error = data["message"]
+                return
+
+            if name in STAGE_EVENTS:
+                now = time.perf_counter()
+                job.stages[STAGE_EVENTS[name]] = now - stage_started
+                stage_started = now
+
+            if name == "done":
+                blog_post = data["blog_post"]
+                platform_posts = data["platform_posts"]
+                models = data["models"]
+
+        if not blog_post:
+            job.status = FAILED
+            job.error = "The agent finished without a blog post"
+            return
+
+        # The publishing queue finds the post created by an earlier attempt of the meeting instead
+        # of creating a duplicate. Its WordPress client is synchronous; run it off the event loop
+        if job.schedule_time:
+            published = await asyncio.to_thread(get_publish_queue().publish_post, job.meeting_id, blog_post, "future", job.schedule_time)
+        else:
+            published = await asyncio.to_thread(get_publish_queue().publish_post, job.meeting_id, blog_post, "draft")
+        job.stages["publish"] = time.perf_counter() - stage_started
+
+        if published["state"] == PUBLISHED:
+            job.status = SUCCEEDED
+            job.result = {"blog_post": blog_post, "platform_posts": platform_posts, "models": models, "wordpress_response": published["wordpress_post"]}
+        else:
+            job.status = FAILED
+            job.result = {"blog_post": blog_post, "platform_posts": platform_posts, "models": models}
+            job.error = f"Failed to post to WordPress: {published['error']}"
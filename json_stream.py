@@ -0,0 +1,131 @@
+import re
+import json
+import codecs
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+decoder = json.JSONDecoder()
+
+
+class JSONStream:
+    """
+    Reads JSON values one at a time from a stream of text or byte chunks, keeping only the
+    value being read (plus one chunk) in memory.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+
+    def fill(self):
+        """
+        Appends the next chunk to the buffer, dropping everything before pos.
+        Returns False at the end of the stream.
+        """
+
+        for chunk in self.chunks:
+            if isinstance(chunk, bytes):
+                chunk = self.text_decoder.decode(chunk)
+            if chunk:
+                self.buffer = self.buffer[self.pos:] + chunk
+                self.pos = 0
+                return True
+        return False
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character, or "" at the end of the stream.
+        """
+
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at position {self.pos} of the JSON stream.")
+        self.pos += 1
+
+    def read_value(self):
+        """
+        Decodes and returns the next JSON value, reading more chunks until it is complete.
+
+        Decoding is retried each time the buffered part of the value has doubled, so a value
+        is decoded about twice in total however many chunks it spans.
+        """
+
+        if not self.peek():
+            raise ValueError("Unexpected end of the JSON stream.")
+
+        next_attempt = 0
+        exhausted = False
+        while True:
+            buffered = len(self.buffer) - self.pos
+
+            if exhausted or buffered >= next_attempt:
+                try:
+                    value, end = decoder.raw_decode(self.buffer, self.pos)
+                    # A number at the very end of the buffer may continue in the next chunk
+                    if end < len(self.buffer) or exhausted:
+                        self.pos = end
+                        return value
+                except json.JSONDecodeError as error:
+                    if exhausted:
+                        raise ValueError(f"Invalid JSON stream: {error}")
+                next_attempt = 2 * buffered
+
+            exhausted = not self.fill()
+
+    def iter_object(self):
+        """
+        Yields the key of every member of the object starting at pos. The caller must consume
+        each member's value (read_value or iter_object) before asking for the next key.
+        """
+
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+
+        while True:
+            key = self.read_value()
+            self.expect(":")
+            yield key
+
+            separator = self.peek()
+            self.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or '}}' at position {self.pos - 1} of the JSON stream.")
+
+
+def iter_json_members(chunks, field, other_members=None):
+    """
+    Streams the members of one object nested in a top-level JSON object, such as the "data"
+    object of a GraphQL response, one member at a time.
+
+    Parameters:
+    chunks (iterable): The response body as text or byte chunks, e.g. response.iter_content().
+    field (str): The top-level key of the object whose members are streamed.
+    other_members (dict): Filled with the other top-level members, e.g. "errors".
+
+    Yields:
+    tuple: The key and decoded value of every member of the field's object, in document order.
+    """
+
+    stream = JSONStream(chunks)
+
+    for key in stream.iter_object():
+        if key == field and stream.peek() == "{":
+            for member in stream.iter_object():
+                yield member, stream.read_value()
+        else:
+            value = stream.read_value()
+            if other_members is not None:
+                other_members[key] = value
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import closing
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "../output/llm_cache.db")
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_CACHE_MAX_AGE = float(os.getenv("LLM_CACHE_MAX_AGE", str(30 * 24 * 60 * 60)))  # Seconds
+
+
+def cache_key(prompt, llm_string):
+    """
+    Hashes the rendered prompt together with the model's llm_string, which LangChain builds from
+    the model name and its generation parameters (temperature, max tokens, ...).
+    """
+
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+def dump_generations(generations):
+    return json.dumps([
+        {
+            "text": generation.text,
+            "generation_info": generation.generation_info,
+            "message": message_to_dict(generation.message) if isinstance(generation, ChatGeneration) else None,
+        }
+        for generation in generations
+    ])
+
+
+def load_generations(value):
+    generations = []
+    for item in json.loads(value):
+        if item["message"] is not None:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=item["generation_info"]))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=item["generation_info"]))
+    return generations
+
+
+def mark_cached(generations):
+    """
+    Returns copies of cached generations flagged with generation_info["cached"], so LLM
+    callbacks can tell cache hits from calls to the provider.
+    """
+
+    return [
+        generation.model_copy(update={"generation_info": {**(generation.generation_info or {}), "cached": True}})
+        for generation in generations
+    ]
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Content-addressed cache of LLM responses with an in-memory LRU tier in front of an
+    on-disk SQLite tier.
+
+    Identical calls (same model, parameters and rendered prompt) are answered from the cache,
+    so re-running a meeting only calls the LLM for nodes whose prompt actually changed. The
+    disk tier drops entries older than max_age and evicts the least recently used entries
+    once it grows past max_bytes. Hits and misses are counted per tier.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+                 max_bytes=LLM_CACHE_MAX_BYTES, max_age=LLM_CACHE_MAX_AGE):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+            with closing(self.connect()) as connection, connection:
+                connection.executescript("""
+                    PRAGMA journal_mode=WAL;
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+                """)
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def remember(self, key, value):
+        with self.lock:
+            self.memory[key] = value
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def lookup(self, prompt, llm_string):
+        key = cache_key(prompt, llm_string)
+
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return mark_cached(self.memory[key])
+
+        if self.path:
+            now = time.time()
+            with closing(self.connect()) as connection, connection:
+                row = connection.execute(
+                    "SELECT value FROM responses WHERE key = ? AND created_at > ?", (key, now - self.max_age)
+                ).fetchone()
+                if row:
+                    connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+
+            if row:
+                value = load_generations(row[0])
+                self.remember(key, value)
+                self.count("disk_hits")
+                return mark_cached(value)
+
+        self.count("misses")
+        return None
+
+    def update(self, prompt, llm_string, return_val):
+        key = cache_key(prompt, llm_string)
+        self.remember(key, return_val)
+
+        if self.path:
+            value = dump_generations(return_val)
+            now = time.time()
+            with closing(self.connect()) as connection, connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now)
+                )
+                self.evict(connection, now)
+
+    def evict(self, connection, now):
+        """
+        Removes expired entries, then the least recently used ones until the disk tier fits in max_bytes.
+        """
+
+        evicted = connection.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.max_age,)).rowcount
+
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            for key, size in connection.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                evicted += 1
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+        if evicted:
+            with self.lock:
+                self.counters["evictions"] += evicted
+
+    def clear(self, **kwargs):
+        with self.lock:
+            self.memory.clear()
+
+        if self.path:
+            with closing(self.connect()) as connection, connection:
+                connection.execute("DELETE FROM responses")
+
+    def stats(self):
+        """
+        Returns:
+        dict: The hit, miss and eviction counters, plus the overall hit rate.
+        """
+
+        with self.lock:
+            counters = dict(self.counters)
+
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        counters["hit_rate"] = (counters["memory_hits"] + counters["disk_hits"]) / lookups if lookups else 0.0
+        return counters
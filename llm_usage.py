@@ -0,0 +1,155 @@
+import contextvars
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from rate_limits import ESTIMATED_COMPLETION_TOKENS
+from telemetry import record_llm_call
+from transcript_chunks import estimate_tokens
+
+# The chat model call being started in this context, from its start callback to its rate limiter
+pending_call = contextvars.ContextVar("pending_llm_call", default=None)
+
+
+def message_text(message):
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+def reported_usage(response):
+    """
+    Returns the prompt and completion tokens the provider reported for a response, or None.
+    """
+
+    prompt_tokens = completion_tokens = 0
+    reported = False
+
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            # Cached messages can carry usage metadata without token counts
+            if usage and ("input_tokens" in usage or "output_tokens" in usage):
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+                reported = True
+
+    if not reported:
+        # Some providers only report usage for the whole call
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        return None
+
+    return prompt_tokens, completion_tokens
+
+
+class LLMUsageHandler(BaseCallbackHandler):
+    """
+    Counts the calls and tokens of every LLM call per graph node.
+
+    Tokens are taken from the usage the provider reports and estimated from the prompt and
+    response text when it reports none. Responses served by the LLM response cache are
+    counted separately, since they cost nothing.
+    """
+
+    # Run in the calling thread and context, so tokens are added to the node's span
+    run_inline = True
+
+    def __init__(self):
+        self.calls = {}  # Run id -> (graph node, estimated prompt tokens)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node", "")
+        prompt_tokens = sum(estimate_tokens(message_text(message)) for batch in messages for message in batch)
+        self.calls[run_id] = (node, prompt_tokens)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        node, estimated_prompt_tokens = self.calls.pop(run_id, ("", 0))
+
+        generations = [generation for batch in response.generations for generation in batch]
+        if any((generation.generation_info or {}).get("cached") for generation in generations):
+            source = "cache"
+        else:
+            source = None
+
+        usage = reported_usage(response)
+        if usage is None:
+            usage = estimated_prompt_tokens, sum(estimate_tokens(generation.text) for generation in generations)
+            source = source or "estimated"
+
+        record_llm_call(node, usage[0], usage[1], source or "reported")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.calls.pop(run_id, None)
+
+
+class LLMRateLimiter(BaseRateLimiter):
+    """
+    Makes a LangChain chat model wait for a RateLimiter before every call sent to the provider.
+
+    Chat models only ask their rate limiter after missing the response cache, so cached
+    responses are never held back. The tokens and meeting of the call are the ones the
+    RateLimitHandler found when the call started.
+    """
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+
+    def take_pending_call(self):
+        call = pending_call.get() or {"tokens": ESTIMATED_COMPLETION_TOKENS, "meeting_id": None}
+        pending_call.set(None)
+        return call
+
+    def acquire(self, *, blocking=True):
+        call = self.take_pending_call()
+        acquired = self.limiter.acquire(call["tokens"], call["meeting_id"], blocking=blocking)
+        if acquired:
+            call["reserved"], call["limiter"] = call["tokens"], self.limiter
+        return acquired
+
+    async def aacquire(self, *, blocking=True):
+        call = self.take_pending_call()
+        acquired = await self.limiter.aacquire(call["tokens"], call["meeting_id"], blocking=blocking)
+        if acquired:
+            call["reserved"], call["limiter"] = call["tokens"], self.limiter
+        return acquired
+
+
+class RateLimitHandler(BaseCallbackHandler):
+    """
+    Estimates the tokens of every chat model call for its LLMRateLimiter, from the prompt and
+    ESTIMATED_COMPLETION_TOKENS, and corrects the reservation once the provider reports the
+    actual usage. A call rejected for exceeding the quota empties the buckets of its model,
+    so every process backs off.
+    """
+
+    # Run in the calling context, so the chat model's rate limiter sees the pending call
+    run_inline = True
+
+    def __init__(self):
+        self.calls = {}  # Run id -> pending call
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        prompt_tokens = sum(estimate_tokens(message_text(message)) for batch in messages for message in batch)
+        call = {
+            "tokens": prompt_tokens + ESTIMATED_COMPLETION_TOKENS,
+            "meeting_id": (metadata or {}).get("meeting_id"),
+            "reserved": 0,
+            "limiter": None,
+        }
+        self.calls[run_id] = call
+        pending_call.set(call)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        call = self.calls.pop(run_id, None)
+        if call and call["limiter"] is not None:
+            usage = reported_usage(response)
+            if usage is not None:
+                call["limiter"].settle(call["reserved"], sum(usage))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        call = self.calls.pop(run_id, None)
+        if call and call["limiter"] is not None and getattr(error, "status_code", None) == 429:
+            call["limiter"].drain()
@@ -1,42 +1,21 @@
-from typing import Annotated, Dict, Any
-from typing_extensions import TypedDict
-
-from langchain_core.messages import HumanMessage
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-
-from langgraph.graph import StateGraph
-from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode
-
-from langchain_core.messages import AIMessage
-from langchain_core.messages.tool import ToolCall
-
-# from langchain_openai import AzureChatOpenAI
-from langchain.chat_models import init_chat_model
-
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import os
 import sys
 import json
-
-import base64
-import requests
+import time
+import asyncio
+import argparse
 
 from dotenv import load_dotenv
 load_dotenv()
 
-WP_USERNAME = os.getenv('WORDPRESS_USERNAME')
-WP_PASSWORD = os.getenv('WORDPRESS_APPLICATION_PASSWORD')
-WP_URL = "https://winniio.io/wp-json/wp/v2/posts"
+from blog_agent import MAX_CONCURRENT_MEETINGS, NO_TRANSCRIPT, PIPELINE_PROFILE, PIPELINE_PROFILES, PLATFORM_POSTS, NodeError, initial_state, llm_cache_stats, process_meetings, run_agent
+from token_budget import OVER_BUDGET, TokenBudget, estimate_prompt_tokens
+from fireflies import fetch_meetings, fetch_transcripts, group_speaker_text
+from redaction import speaker_names
+from publish_queue import PUBLISHED, PUBLISH_TIMEZONE, get_publish_queue
 
-WP_CREDENTIALS = WP_USERNAME + ":" + WP_PASSWORD
-WP_TOKEN = base64.b64encode(WP_CREDENTIALS.encode())
-WP_HEADER = {'Authorization': 'Basic ' + WP_TOKEN.decode('utf-8')}
-
-API_KEY = os.getenv('FIREFLIES_API_KEY')
-BASE_URL = "https://api.fireflies.ai/graphql"
 
 def ask_user_for_post_action():
     print("\nWhat would you like to do with the blog post?")
@@ -90,168 +69,14 @@ def get_date_input():
             print("Invalid format. Please enter the date and time in DD-MM-YYYY HH:MM format.")
 
 
-def fetch_meetings(from_timestamp, to_timestamp):
-    """
-    Fetches the details of meetings that occurred between from_timestamp and to_timestamp.
-
-    Parameters:
-    from_timestamp (datetime): The start date and time.
-    to_timestamp (datetime): The end date and time.
-
-    Returns:
-    list: A list of JSON objects where each object contains details of meetings that occurred between the given dates.
-          The details include meeting id, title, transcript_url, dateString, audio_url, video_url
-    """
-
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
-
-    data = {
-        "query": """
-        query Transcripts($limit: Int, $skip: Int, $fromDate: DateTime, $toDate: DateTime) {
-            transcripts(limit: $limit, skip: $skip, fromDate: $fromDate, toDate: $toDate) {
-                id
-                title
-                transcript_url
-                dateString
-                audio_url
-                video_url
-                sentences {
-                    raw_text
-                    speaker_name
-                    speaker_id
-                }
-            }
-        }
-        """,
-        "variables": {
-            "limit": 50,  # Number of transcripts to fetch. Max allowed: 50
-            "skip": 0,
-            "fromDate": from_timestamp,
-            "toDate": to_timestamp
-        }
-    }
-
-    try:
-        response = requests.post(BASE_URL, headers=headers, json=data)
-        response.raise_for_status()
-
-        transcripts = response.json().get("data", {}).get("transcripts", [])
-        return transcripts
-    
-    except requests.exceptions.RequestException as error:
-        print(f"Error: {error}")
-        if hasattr(error, 'response') and error.response is not None:
-            print("Response content:", error.response.text)
-        return []
-    
-
-def get_summary(transcript_id):
-    """
-    Fetches the meeting summary of the meeting whose transcript_id has been provided.
-    
-    Parameters:
-    transcript_id (string): The ID of the transcript to fetch.
-    
-    Returns:
-    dict: A JSON object containing various components of the summary such as
-          keywords, action_items, outline, shorthand_bullet, overview, bullet_gist, gist, short_summary.
-    """
-
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
-
-    data = {
-        "query": """
-        query Transcript($transcriptId: String!) {
-            transcript(id: $transcriptId) {
-                summary {
-                    keywords
-                    action_items
-                    outline
-                    shorthand_bullet
-                    overview
-                    bullet_gist
-                    gist
-                    short_summary
-                }
-            }
-        }
-        """,
-        "variables": {
-            "transcriptId": f"{transcript_id}"
-        }
-    }
-
-    try:
-        response = requests.post(BASE_URL, headers=headers, json=data)
-        response.raise_for_status()
-
-        summary_data = response.json().get("data", {}).get("transcript", {}).get("summary", {})
-        return summary_data
-    
-    except requests.exceptions.RequestException as error:
-        print(f"Error: {error}")
-        if hasattr(error, 'response') and error.response is not None:
-            print("Response content:", error.response.text)
-        return {}
-    
-
-def group_speaker_text(data):
-    """
-    Groups and formats a list of dialogue entries by speaker.
-
-    This function takes a list of dictionaries, where each dictionary contains the text 
-    of a speaker's message and the speaker's name. It organizes the messages by speaker,
-    grouping all of a speaker's messages together and formatting them into a string, 
-    with each speaker's dialogue displayed on a new line.
-
-    The function assumes that the input data is ordered in the correct sequence, 
-    with each speaker's dialogue appearing in the order they spoke.
-
-    Args:
-        data (list of dict): A list of dictionaries, each containing:
-            - 'raw_text' (str): The text of the message.
-            - 'speaker_name' (str): The name of the speaker.
-            - 'speaker_id' (int): An identifier for the speaker (not used in the function).
-
-    Returns:
-        str: A string where each speaker's dialogue is printed in order,
-             with their name followed by the messages they spoke, separated by spaces.
-             Each speaker's dialogue is on a new line.
-    """
-
-    result = []
+def prompt_include_transcript(fireflies_summary, meeting_transcript):
     
-    current_speaker = None
-    current_text = []
-
-    for entry in data:
-        speaker_name = entry['speaker_name']
-        raw_text = entry['raw_text']
-        
-        if speaker_name != current_speaker:
-            if current_speaker is not None:
-                result.append(f"{current_speaker}: {' '.join(current_text)}")
-            current_speaker = speaker_name
-            current_text = [raw_text]
-        else:
-            current_text.append(raw_text)
+    summary_only_tokens = estimate_prompt_tokens(fireflies_summary)["total"]
+    full_tokens = estimate_prompt_tokens(fireflies_summary, meeting_transcript)["total"]
 
-    if current_speaker is not None:
-        result.append(f"{current_speaker}: {' '.join(current_text)}")
-
-    return "\n".join(result)
-        
-
-def prompt_include_transcript():
-    
     include_transcript_prompt = "Would you like the AI Agent to analyze the entire meeting transcript as well?\n" \
-                                "Please do note that analyzing the entire transcript will consume a lot of tokens.\n" \
+                                f"Estimated prompt tokens: about {full_tokens} with the transcript, " \
+                                f"{summary_only_tokens} with the Fireflies summary only.\n" \
                                 "If you want the transcript to be analyzed, enter 1, else, enter 0: "
     
     user_input = input(include_transcript_prompt).strip()
@@ -261,25 +86,31 @@ def prompt_include_transcript():
     return user_input == "1"
 
 
-# Get start date and end date from user
-from_timestamp, to_timestamp = get_date_input()
-# from_timestamp, to_timestamp = '2025-04-11T10:00:00Z', '2025-04-11T12:00:00Z'
+def run_interactive():
+    """
+    Runs the AI Agent interactively: the user picks a date range and a meeting, and decides
+    whether to include the transcript and what to do with the generated blog post.
+    """
 
-# Get list of meetings for the specified time duration
-meetings = fetch_meetings(from_timestamp, to_timestamp)
+    # Get start date and end date from user
+    from_timestamp, to_timestamp = get_date_input()
+    # from_timestamp, to_timestamp = '2025-04-11T10:00:00Z', '2025-04-11T12:00:00Z'
 
-# Exit out of the script if no meetings occurred during specified time duration.
-if not meetings:
-    print("No meetings occurred during this time.")
-    sys.exit()
+    # Get list of meetings for the specified time duration
+    meetings = fetch_meetings(from_timestamp, to_timestamp)
 
-print("Here are the meetings that occurred between the duration you specified:")
+    # Exit out of the script if no meetings occurred during specified time duration.
+    if not meetings:
+        print("No meetings occurred during this time.")
+        return
 
-for index, meeting in enumerate(meetings):
+    print("Here are the meetings that occurred between the duration you specified:")
 
-    meeting_timestamp = datetime.strptime(meeting['dateString'], "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%d-%m-%Y %H:%M:%S")
+    for index, meeting in enumerate(meetings):
 
-    print(f"""
+        meeting_timestamp = datetime.strptime(meeting['dateString'], "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%d-%m-%Y %H:%M:%S")
+
+        print(f"""
     Meeting No. {index + 1}
     Meeting Title: {meeting['title']}
     Meeting Time: {meeting_timestamp}
@@ -287,383 +118,364 @@ for index, meeting in enumerate(meetings):
     Transcript URL: {meeting['transcript_url']}\n
     """)
 
-# Prompt user to select the desired meeting
-meeting_no = int(input("Please enter the meeting number of the meeting which you want summarized: "))
-meeting_id = meetings[meeting_no-1]['id']
+    # Prompt user to select the desired meeting
+    meeting_no = int(input("Please enter the meeting number of the meeting which you want summarized: "))
+    meeting_id = meetings[meeting_no-1]['id']
+
+    # Pre-processing Fireflies summary for LLM integration
+    # Sentences and summary are fetched together in a single request
+    meeting_details = fetch_transcripts([meeting_id])[meeting_id]
+    if not meeting_details['sentences'] and not meeting_details['summary']:
+        print(meeting_details.get('error') or NO_TRANSCRIPT)
+        return
+
+    meeting_transcript = group_speaker_text(meeting_details['sentences'])
+    fireflies_summary = meeting_details['summary']
 
-# Pre-processing Fireflies summary for LLM integration
-meeting_sentences = meetings[meeting_no-1]['sentences']
-meeting_transcript = group_speaker_text(meeting_sentences)
-fireflies_summary = get_summary(meeting_id)
+    if not os.path.exists('../output'):
+        os.makedirs('../output')
 
-if not os.path.exists('../output'):
-    os.makedirs('../output')
+    # Save Fireflies Summmary
+    with open('../output/fireflies_summary.json', 'w') as file:
+        json.dump(fireflies_summary, file, indent=2)
 
-# Save Fireflies Summmary
-with open('../output/fireflies_summary.json', 'w') as file:
-    json.dump(fireflies_summary, file, indent=2)
+    print("\nFireflies Summary saved.")
 
-print("\nFireflies Summary saved.")
+    # Save Meeting Transcript
+    with open('../output/meeting_transcript.txt', 'w') as file:
+        file.write(meeting_transcript)
 
-# Save Meeting Transcript
-with open('../output/meeting_transcript.txt', 'w') as file:
-    file.write(meeting_transcript)
+    print("Meeting conversation saved.\n")
 
-print("Meeting conversation saved.\n")
+    include_transcript = prompt_include_transcript(fireflies_summary, meeting_transcript)
 
-include_transcript = prompt_include_transcript()
+    # With Conversation
+    try:
+        agent_response = run_agent(
+            initial_state(fireflies_summary, meeting_transcript, include_transcript, speaker_names(meeting_details['sentences'])),
+            meeting_id
+        )
+    except NodeError as e:
+        print(f"{e}\nRun the script again for this meeting to resume where it stopped.")
+        return
+
+    agent_summary = agent_response['agent_summary'][0]['overview']
+    anonymized_summary = agent_response['agent_summary_anonymized'][0]['anonymized_overview']
+    blog_post = agent_response['blog_post']
+
+    # Save files
+    with open('agent_summary.txt', 'w') as f:
+        f.write(agent_summary)
+    print("Agent's summary saved.")
+
+    with open('anonymized_summary.txt', 'w') as f:
+        f.write(anonymized_summary)
+    print("Anonymized summary saved.")
+
+    with open('blog_post.txt', 'w') as f:
+        f.write(blog_post)
+    print("Blog post generated and saved.")
+
+    # Platform variants requested with PLATFORM_VARIANTS
+    for platform, platform_post in agent_response['platform_posts'].items():
+        with open(f'{platform}_post.txt', 'w') as f:
+            f.write(platform_post)
+        print(f"{platform} post saved.")
+
+    # Get user decision
+    action = ask_user_for_post_action()
+
+    if action == "yes":
+        # Post immediately
+        published = get_publish_queue().publish_post(meeting_id, blog_post, "publish")
+        if published["state"] == PUBLISHED:
+            if published["outcome"] == "created":
+                print("✅ Post created successfully.")
+            elif published["outcome"] == "updated":
+                print("✅ The post already on WordPress was published.")
+            else:
+                print("✅ The post was already on WordPress.")
+        else:
+            print(f"❌ Failed to create post: {published['error']}")
 
+    elif action == "no":
+        print("❌ Post creation skipped as per user request.")
 
-# Initialize LLM
-llm = init_chat_model("llama3-70b-8192", model_provider="groq")
-# llm = AzureChatOpenAI(model_name="gpt-35-turbo-16k")
+    elif action == "later":
+        schedule_input = input(
+            f"Enter the datetime to schedule the post (YYYY-MM-DD HH:MM, {PUBLISH_TIMEZONE}), or nothing for the next publishing slot: "
+        ).strip()
+        try:
+            wp_datetime = datetime.strptime(schedule_input, "%Y-%m-%d %H:%M").isoformat() if schedule_input else None
 
+            published = get_publish_queue().publish_post(meeting_id, blog_post, "future", wp_datetime)
+            if published["state"] == PUBLISHED:
+                print(f"🕒 Post scheduled successfully for {published['scheduled_at']} UTC.")
+            else:
+                print(f"❌ Failed to schedule post: {published['error']}")
+        except ValueError:
+            print("Invalid date format. Use YYYY-MM-DD HH:MM.")
 
-class State(TypedDict):
-    messages: Annotated[list, add_messages]
-    fireflies_summary: Dict[str, any]
-    meeting_transcript: str
-    agent_summary: any
-    agent_summary_anonymized: any
-    blog_post: str
+    elif action == "archive":
+        with open('archive_blog_post.txt', 'w') as f:
+            f.write(blog_post)
+        print("📦 Blog post archived.")
 
 
-def summarizer(state):
+def parse_date(value):
     """
-    Function to create the summarizer node.
+    Parses a DD-MM-YYYY HH:MM command line date into the ISO format used by Fireflies.
     """
 
-    if include_transcript:
-        summarizer_prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert meeting summarizer. Analyze the meeting summary and full meeting transcript to generate a comprehensive, nuanced overview.
-            
-            Your goal is to:
-            - Capture the key discussion points
-            - Highlight the main objectives and outcomes
-            - Provide insights into the strategic direction
-            - Synthesize information from both the existing summary and the full conversation
+    try:
+        return datetime.strptime(value, "%d-%m-%Y %H:%M").isoformat() + 'Z'
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}'. Use the DD-MM-YYYY HH:MM format.")
+
+
+def parse_batch_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate blog posts for every Fireflies meeting in a date range without prompts."
+    )
+    parser.add_argument("--from", dest="from_timestamp", type=parse_date,
+                        help="Start date (DD-MM-YYYY HH:MM). Defaults to --days before --to.")
+    parser.add_argument("--to", dest="to_timestamp", type=parse_date,
+                        help="End date (DD-MM-YYYY HH:MM). Defaults to now.")
+    parser.add_argument("--days", type=float, default=1,
+                        help="Length of the date range in days when --from is not given (default: 1).")
+    parser.add_argument("--title", action="append", default=[],
+                        help="Only process meetings whose title contains this text (case-insensitive). Repeatable.")
+    parser.add_argument("--meeting-id", action="append", default=[],
+                        help="Only process the meeting with this ID. Repeatable.")
+    parser.add_argument("--include-transcript", action="store_true",
+                        help="Let the summarizer analyze the meeting transcript as well. With a token budget, "
+                             "the transcript is compressed or left out for meetings that would exceed it.")
+    parser.add_argument("--token-budget", type=int,
+                        help="Maximum estimated prompt tokens per meeting.")
+    parser.add_argument("--daily-token-budget", type=int,
+                        help="Maximum estimated prompt tokens per day, shared by all runs on that day.")
+    parser.add_argument("--platform", action="append", choices=list(PLATFORM_POSTS),
+                        help="Also write a variant of every blog post for this platform, saved next to the blog post. "
+                             "Repeatable (default: PLATFORM_VARIANTS).")
+    parser.add_argument("--profile", choices=list(PIPELINE_PROFILES), default=PIPELINE_PROFILE,
+                        help="Pipeline profile: \"standard\" runs one LLM call per step, \"combined\" summarizes and "
+                             "anonymizes in one call and \"single\" also writes the blog post in it "
+                             f"(default: {PIPELINE_PROFILE}).")
+    parser.add_argument("--publish", choices=["no", "draft", "publish", "future"], default="no",
+                        help="What to do with each blog post on WordPress (default: no).")
+    parser.add_argument("--schedule", type=parse_date,
+                        help="First publication date (DD-MM-YYYY HH:MM) for --publish future. Posts get the free slots of "
+                             "the publishing calendar from this date on (default: now).")
+    parser.add_argument("--publish-pending", action="store_true",
+                        help="Only publish the posts that earlier runs left in the publishing queue, then exit.")
+    parser.add_argument("--output-dir", default="../output",
+                        help="Directory in which a folder of artifacts is written per meeting (default: ../output).")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_MEETINGS,
+                        help=f"Number of meetings processed at the same time (default: {MAX_CONCURRENT_MEETINGS}).")
+
+    args = parser.parse_args(argv)
+
+    if not args.to_timestamp:
+        args.to_timestamp = datetime.utcnow().isoformat() + 'Z'
+    if not args.from_timestamp:
+        end = datetime.fromisoformat(args.to_timestamp.rstrip('Z'))
+        args.from_timestamp = (end - timedelta(days=args.days)).isoformat() + 'Z'
+
+    return args
+
+
+def filter_meetings(meetings, titles=(), meeting_ids=()):
+    """
+    Keeps the meetings matching any of the given title fragments and meeting IDs. Empty filters match everything.
+    """
 
-            Write a clear, concise, and informative overview that captures the essence of the meeting."""),
-            ("human", """Create a detailed overview based on the following information:
+    titles = [title.lower() for title in titles]
 
-            Existing Summary: {fireflies_summary}
-            Full meeting transcript: {meeting_transcript}
+    return [
+        meeting for meeting in meetings
+        if (not titles or any(title in (meeting.get('title') or '').lower() for title in titles))
+        and (not meeting_ids or meeting['id'] in meeting_ids)
+    ]
 
-            Please provide a comprehensive and insightful overview of the meeting that goes beyond surface-level details.""")
-        ])
-    else:
-        summarizer_prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert meeting summarizer. Analyze the meeting summary and full meeting transcript to generate a comprehensive, nuanced overview.
-            
-            Your goal is to:
-            - Capture the key discussion points
-            - Highlight the main objectives and outcomes
-            - Provide insights into the strategic direction
-            - Synthesize information from both the existing summary and the full conversation
 
-            Write a clear, concise, and informative overview that captures the essence of the meeting."""),
-            ("human", """Create a detailed overview based on the following information:
+def save_meeting_artifacts(output_dir, result):
+    """
+    Writes the Fireflies summary, transcript and agent outputs of one processed meeting to
+    output_dir/<meeting_id>/.
 
-            Existing Summary: {fireflies_summary}
+    Returns:
+    str: The blog post, or None if the AI Agent failed for this meeting.
+    """
 
-            Please provide a comprehensive and insightful overview of the meeting that goes beyond surface-level details.""")
-        ])
+    meeting_dir = os.path.join(output_dir, result['meeting_id'])
+    os.makedirs(meeting_dir, exist_ok=True)
 
-    agent_flow = summarizer_prompt | llm | StrOutputParser()
+    with open(os.path.join(meeting_dir, 'fireflies_summary.json'), 'w') as file:
+        json.dump(result['fireflies_summary'], file, indent=2)
 
-    try:
-        if include_transcript:
-            result = agent_flow.invoke({
-                "fireflies_summary": json.dumps(state["fireflies_summary"]),
-                "meeting_transcript": state["meeting_transcript"]
-            })
-        else:
-            result = agent_flow.invoke({
-                "fireflies_summary": json.dumps(state["fireflies_summary"])
-            })
-        
-        # Parse the result into a structured format
-        summary_data = {
-            "overview": result.strip()
-        }
-        
-        return {
-            "agent_summary": [
-                # HumanMessage(content=json.dumps(summary_data, indent=2))
-                summary_data
-            ]
-        }
-    
-    except Exception as e:
-        print(f"Error in summarizer: {e}")
-        return {"agent_summary": f"Failed to generate summary: {str(e)}"}
-    
+    with open(os.path.join(meeting_dir, 'meeting_transcript.txt'), 'w') as file:
+        file.write(result['meeting_transcript'])
 
-def anonymizer(state):
-    """
-    Function to create the anonymizer node.
-    """
-    
-    anonymizer_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a data privacy and internal controls assistant. You are an expert at anonymizing sensitive information in meeting summaries.
-        
-        Your task is to:
-        - Remove all personal names and replace them with generic roles
-        - Remove any confidential information, especially related to payments, budgets, or financial figures
-        - Remove any sensitive business information that shouldn't be shared broadly
-        - Preserve the overall meaning and context of the summary
-        - Maintain the same level of detail except for the sensitive information
-        - Ensure data privacy according to GDPR and general internal control standards such as ISO 27001, SOC 2, and HIPAA (where applicable). 
-        
-        The output should be a clean, anonymized version of the input text that protects privacy while maintaining usefulness."""),
-        ("human", """Please anonymize the following meeting summary by removing names and confidential information:
-        
-        {agent_summary}
-        
-        Return only the anonymized text without explanations.""")
-    ])
-    
-    anonymize_flow = anonymizer_prompt | llm | StrOutputParser()
-    
-    try:
-        anonymized_result = anonymize_flow.invoke({
-            "agent_summary": state["agent_summary"][0]['overview']
-        })
-        
-        response_data = {
-            "anonymized_overview": anonymized_result.strip()
-        }
-        
-        return {
-            "agent_summary_anonymized": [
-                # HumanMessage(content=json.dumps(response_data, indent=2))
-                response_data
-            ]
-        }
-    
-    except Exception as e:
-        print(f"Error in anonymizer: {e}")
-        return {"agent_summary_anonymized": f"Failed to anonymize the summary: {str(e)}"}
-    
+    with open(os.path.join(meeting_dir, 'token_estimate.json'), 'w') as file:
+        json.dump({"transcript_policy": result['transcript_policy'], "prompt_tokens": result['token_estimates']}, file, indent=2)
 
-def writer(state):
-    """
-    Function to create the writer node for blog posts.
-    """
+    agent_response = result['agent_response']
+    if agent_response is None:
+        return None
 
-    blog_post_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a skilled content writer tasked with creating an engaging blog post based on an anonymized meeting summary.
-        
-        Your goal is to:
-        - Transform the key points of the summary into a narrative format suitable for a blog.
-        - Make the content informative and interesting for a general audience or relevant stakeholders (without revealing confidential details).
-        - Use a professional yet approachable tone.
-        - Ensure the blog post flows well and is easy to read.
-        
-        Do not include any placeholders like [Role] or [Initiative]; write as if the information is naturally generalized based on the input."""),
-        ("human", """Please write a blog post based on the following anonymized meeting overview:
+    agent_summary = agent_response['agent_summary'][0]['overview']
+    anonymized_summary = agent_response['agent_summary_anonymized'][0]['anonymized_overview']
+    blog_post = agent_response['blog_post']
 
-        {anonymized_summary}
+    with open(os.path.join(meeting_dir, 'agent_summary.txt'), 'w') as file:
+        file.write(agent_summary)
 
-        Generate only the blog post content itself.""")
-    ])
+    with open(os.path.join(meeting_dir, 'anonymized_summary.txt'), 'w') as file:
+        file.write(anonymized_summary)
 
-    blog_post_flow = blog_post_prompt | llm | StrOutputParser()
-    
-    try:
-        anonymized_overview = state["agent_summary_anonymized"][0]['anonymized_overview']
+    with open(os.path.join(meeting_dir, 'blog_post.txt'), 'w') as file:
+        file.write(blog_post)
 
-        blog_post_result = blog_post_flow.invoke({
-            "anonymized_summary": anonymized_overview
-        })
+    for platform, platform_post in agent_response['platform_posts'].items():
+        with open(os.path.join(meeting_dir, f'{platform}_post.txt'), 'w') as file:
+            file.write(platform_post)
 
-        return {"blog_post": blog_post_result.strip()}
+    # The models that answered each node, after fallbacks and hedged requests
+    with open(os.path.join(meeting_dir, 'models.json'), 'w') as file:
+        json.dump(agent_response['models'], file, indent=2)
 
-    except Exception as e:
-        print(f"Error in writer: {e}")
-        return {"blog_post": f"Failed to create blog post: {str(e)}"}
+    return blog_post
 
 
-'''def build_summarizer_graph():
+def publishing_outcome(published):
     """
-    Function to create flow graph for the AI Agent.
+    Returns a short description of how a post was published, for the summary table.
     """
-    graph_builder = StateGraph(State)
-
-    # Add Nodes
-    graph_builder.add_node("create_summary", summarizer)
-    graph_builder.add_node("anonymize_output", anonymizer)
-    graph_builder.add_node("create_blog_post", writer)
-
-    # Define Flow
-    graph_builder.add_edge("create_summary", "anonymize_output")
-    graph_builder.add_edge("anonymize_output", "create_blog_post")
-
-    # Set entry point
-    graph_builder.set_entry_point("create_summary")
-
-    return graph_builder.compile()
 
+    if published["state"] != PUBLISHED:
+        return "failed"
 
-agent = build_summarizer_graph()
+    outcome = published["status"]
+    if published["status"] == "future":
+        outcome += " " + published["scheduled_at"][:16].replace("T", " ")
+    if published["outcome"] == "updated":
+        outcome += " (updated)"
+    elif published["outcome"] != "created":
+        outcome += " (existing)"
+    return outcome
 
-# With Conversation
-agent_response = agent.invoke({
-    "messages": [],
-    "fireflies_summary": fireflies_summary,
-    "meeting_transcript": meeting_transcript,
-    "agent_summary": {},
-    "agent_summary_anonymized": {},
-    "blog_post": ""
-})
 
-agent_summary = agent_response['agent_summary'][0]['overview']
-anonymized_summary = agent_response['agent_summary_anonymized'][0]['anonymized_overview']
-blog_post = agent_response['blog_post']
+async def run_batch_async(args):
+    meetings = filter_meetings(
+        fetch_meetings(args.from_timestamp, args.to_timestamp), args.title, args.meeting_id
+    )
 
-# Saving Agent Summary
-with open('../output/agent_summary.txt', 'w') as f:
-    f.write(agent_summary)
+    if not meetings:
+        print("No matching meetings occurred during this time.")
+        return []
 
-print("\nAgent's summary saved.")
+    print(f"Processing {len(meetings)} meeting(s) with up to {args.concurrency} at a time...")
 
-# Saving Anonymized Summary
-with open('../output/anonymized_summary.txt', 'w') as f:
-    f.write(anonymized_summary)
+    titles = {meeting['id']: meeting.get('title') or '' for meeting in meetings}
+    rows = []
 
-print("Anonymized summary saved.")
+    token_budget = None
+    if args.token_budget or args.daily_token_budget:
+        token_budget = TokenBudget(per_meeting=args.token_budget, per_day=args.daily_token_budget)
 
-# Saving Blog Post
-with open('../output/blog_post.txt', 'w') as f:
-    f.write(blog_post)
+    # Future posts are spread over the publishing calendar from --schedule on
+    schedule_start = args.schedule
+    publish_keys = {}
 
-print("Blog post generated.")
+    async for result in process_meetings(
+        [meeting['id'] for meeting in meetings], args.include_transcript, args.concurrency, token_budget, args.platform,
+        args.profile
+    ):
+        blog_post = save_meeting_artifacts(args.output_dir, result)
 
-# Publishing to WordPress
-with open('../output/blog_post.txt', 'r') as file:
-    lines = file.readlines()
+        if blog_post is None:
+            status = "deferred" if result['transcript_policy'] == OVER_BUDGET else "failed"
+            print(f"{result['meeting_id']}: {result['error']}")
+        else:
+            status = "ok"
+            if args.publish != "no":
+                publish_keys[result['meeting_id']] = get_publish_queue().enqueue(
+                    result['meeting_id'], blog_post, args.publish, start=schedule_start
+                )
+
+        print(f"Finished {result['meeting_id']} in {result['seconds']:.1f}s ({status})")
+        rows.append([
+            result['meeting_id'], titles[result['meeting_id']], status, "skipped" if status == "ok" else "-",
+            result['transcript_policy'], result['token_estimates']['total'], result['seconds']
+        ])
 
-title = lines[0].strip()
-content = ''.join(lines[2:]).strip()
+    if publish_keys:
+        # The whole batch is published at once; running the same day again does not create duplicates
+        print(f"Publishing {len(publish_keys)} post(s) to WordPress...")
+        published = await asyncio.to_thread(get_publish_queue().publish, list(publish_keys.values()))
 
-post_data = {
-    "title": title,
-    "content": content,
-    # "status": "publish"  # Use 'draft' if you don't want to publish immediately
-    "status": "draft"
-}
+        for row in rows:
+            if row[0] in publish_keys:
+                post = published[publish_keys[row[0]]]
+                row[3] = publishing_outcome(post)
+                if post["error"] and post["state"] != PUBLISHED:
+                    print(f"{row[0]}: Failed to publish: {post['error']}")
 
-response = requests.post(
-    WP_URL,
-    headers=WP_HEADER,
-    json=post_data
-)
+    return [tuple(row) for row in rows]
 
-if response.status_code == 201:
-    print("Post created successfully.")
-else:
-    print("Failed to create post. Status Code: ", response.status_code)'''
 
-def build_summarizer_graph():
+def publish_pending():
     """
-    Function to create flow graph for the AI Agent.
+    Publishes the posts that earlier runs left in the publishing queue and prints the outcome of each.
     """
-    graph_builder = StateGraph(State)
-
-    # Add Nodes
-    graph_builder.add_node("create_summary", summarizer)
-    graph_builder.add_node("anonymize_output", anonymizer)
-    graph_builder.add_node("create_blog_post", writer)
 
-    # Define Flow
-    graph_builder.add_edge("create_summary", "anonymize_output")
-    graph_builder.add_edge("anonymize_output", "create_blog_post")
+    published = get_publish_queue().publish()
+    if not published:
+        print("No posts are waiting to be published.")
+        return
 
-    # Set entry point
-    graph_builder.set_entry_point("create_summary")
+    for post in published.values():
+        print(f"{post['meeting_id']:<28} {publishing_outcome(post):<34} {post['error'] or ''}")
 
-    return graph_builder.compile()
 
+def print_batch_summary(rows):
+    print(f"\n{'Meeting ID':<28} {'Title':<40} {'Status':<8} {'Published':<34} {'Transcript':<13} {'Est. tokens':>11} {'Seconds':>8}")
+    for meeting_id, title, status, published, policy, tokens, seconds in rows:
+        print(f"{meeting_id:<28} {title[:40]:<40} {status:<8} {published:<34} {policy:<13} {tokens:>11} {seconds:>8.1f}")
 
-agent = build_summarizer_graph()
 
-# With Conversation
-agent_response = agent.invoke({
-    "messages": [],
-    "fireflies_summary": fireflies_summary,
-    "meeting_transcript": meeting_transcript,
-    "agent_summary": {},
-    "agent_summary_anonymized": {},
-    "blog_post": ""
-})
-
-agent_summary = agent_response['agent_summary'][0]['overview']
-anonymized_summary = agent_response['agent_summary_anonymized'][0]['anonymized_overview']
-blog_post = agent_response['blog_post']
+def run_batch(argv=None):
+    """
+    Runs the AI Agent without prompts over every meeting in a date range that matches the
+    given filters. Meetings are processed concurrently, artifacts are written per meeting and
+    a summary table with per-meeting timings is printed at the end.
+    """
 
-# Save files
-with open('agent_summary.txt', 'w') as f:
-    f.write(agent_summary)
-print("Agent's summary saved.")
+    args = parse_batch_args(argv)
 
-with open('anonymized_summary.txt', 'w') as f:
-    f.write(anonymized_summary)
-print("Anonymized summary saved.")
+    if args.publish_pending:
+        publish_pending()
+        return
 
-with open('blog_post.txt', 'w') as f:
-    f.write(blog_post)
-print("Blog post generated and saved.")
+    started = time.perf_counter()
+    rows = asyncio.run(run_batch_async(args))
 
-# Get user decision
-action = ask_user_for_post_action()
+    if rows:
+        print_batch_summary(rows)
+        print(f"\n{len(rows)} meeting(s) processed in {time.perf_counter() - started:.1f}s.")
 
-if action == "yes":
-    # Post immediately
-    lines = blog_post.splitlines()
-    title = lines[0].strip()
-    content = '\n'.join(lines[2:]).strip()
+    cache_stats = llm_cache_stats()
+    if cache_stats:
+        print(
+            f"LLM cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hit(s), "
+            f"{cache_stats['misses']} miss(es), hit rate {cache_stats['hit_rate']:.0%}."
+        )
 
-    post_data = {
-        "title": title,
-        "content": content,
-        "status": "publish"
-    }
 
-    response = requests.post(WP_URL, headers=WP_HEADER, json=post_data)
-    if response.status_code == 201:
-        print("✅ Post created successfully.")
+if __name__ == "__main__":
+    # Any command line arguments select the non-interactive batch mode, e.g.
+    # python3 main.py --from "01-04-2025 00:00" --to "02-04-2025 00:00" --publish draft
+    if len(sys.argv) > 1:
+        run_batch()
     else:
-        print(f"❌ Failed to create post. Status Code: {response.status_code}")
-
-elif action == "no":
-    print("❌ Post creation skipped as per user request.")
-
-elif action == "later":
-    schedule_input = input("Enter the datetime to schedule the post (YYYY-MM-DD HH:MM): ").strip()
-    try:
-        schedule_datetime = datetime.strptime(schedule_input, "%Y-%m-%d %H:%M")
-        wp_datetime = schedule_datetime.isoformat()
-
-        lines = blog_post.splitlines()
-        title = lines[0].strip()
-        content = '\n'.join(lines[2:]).strip()
-
-        post_data = {
-            "title": title,
-            "content": content,
-            "status": "future",
-            "date": wp_datetime
-        }
-
-        response = requests.post(WP_URL, headers=WP_HEADER, json=post_data)
-        if response.status_code == 201:
-            print(f"🕒 Post scheduled successfully for {wp_datetime}.")
-        else:
-            print(f"❌ Failed to schedule post. Status Code: {response.status_code}")
-    except ValueError:
-        print("Invalid date format. Use YYYY-MM-DD HH:MM.")
-
-elif action == "archive":
-    with open('archive_blog_post.txt', 'w') as f:
-        f.write(blog_post)
-    print("📦 Blog post archived.")
\ No newline at end of file
+        run_interactive()
@@ -1,52 +1,155 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, HTTPException, Request
 from pydantic import BaseModel
+from typing import List
 import uvicorn
-from fastapi.responses import JSONResponse
-from fastapi.responses import HTMLResponse
-from datetime import datetime
-from wordpress import post_to_wordpress
-from mcp_logic import fetch_meetings, get_summary, generate_blog_post
+import json
+from contextlib import asynccontextmanager
+from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
+from mcp_logic import pipeline_profile, platform_names, stream_blog_post
+from job_queue import JobQueue, QueueFull
+from rate_limits import headroom
+from telemetry import PROMETHEUS_CONTENT_TYPE, metrics
+from webhooks import SIGNATURE_HEADER, WEBHOOK_INCLUDE_TRANSCRIPT, completed_meeting_id, verify_signature
 
-app = FastAPI()
+job_queue = JobQueue()
+metrics.register_collector(job_queue.collect_metrics)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    job_queue.start()
+    yield
+    await job_queue.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 class PostMeetingRequest(BaseModel):
     meeting_id: str
     include_transcript: bool = False
     schedule_time: str = None  # ISO format if scheduled
+    platforms: List[str] = None  # Platform variants to write as well, e.g. ["linkedin", "x"]; None for the default ones
+    profile: str = None  # Pipeline profile: "standard", "combined" or "single"; None for PIPELINE_PROFILE
+
+@app.post("/blog/post-meeting", status_code=202)
+async def post_meeting(request: PostMeetingRequest):
+    """
+    Enqueues the generation and publishing of a meeting's blog post and returns its job id
+    right away. Submitting a meeting that already has a job returns that job instead.
+    The requested platform variants are written alongside the blog post and kept in the job's result.
+    The profile picks how many LLM calls write the blog post (see PIPELINE_PROFILES).
+    """
+
+    try:
+        platform_names(request.platforms)
+        pipeline_profile(request.profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        job, created = job_queue.submit(
+            request.meeting_id, request.include_transcript, request.schedule_time, request.platforms, request.profile
+        )
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Too many pending jobs: {e}", headers={"Retry-After": "30"})
+
+    return {"job_id": job.id, "status": job.status, "created": created}
+
+
+@app.post("/webhooks/fireflies", status_code=202)
+async def fireflies_webhook(request: Request):
+    """
+    Receives Fireflies notifications and queues a job for every meeting whose transcription
+    completed. Notifications for a meeting that already has a job are acknowledged without
+    queueing it again, so redelivered notifications are harmless.
+    """
+
+    body = await request.body()
+    if not verify_signature(body, request.headers.get(SIGNATURE_HEADER)):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature.")
+
+    try:
+        meeting_id = completed_meeting_id(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if meeting_id is None:
+        return {"status": "ignored"}
 
-'''@app.post("/blog/post-meeting")
-def post_meeting(request: PostMeetingRequest):
-    meetings = fetch_meetings("2025-01-01T00:00:00Z", datetime.utcnow().isoformat() + "Z")
-    meeting = next((m for m in meetings if m["id"] == request.meeting_id), None)
+    try:
+        job, created = job_queue.submit(meeting_id, WEBHOOK_INCLUDE_TRANSCRIPT)
+    except QueueFull as e:
+        # Fireflies delivers the notification again later
+        raise HTTPException(status_code=503, detail=f"Too many pending jobs: {e}", headers={"Retry-After": "30"})
 
-    if not meeting:
-        return {"error": "Meeting ID not found."}
+    return {"job_id": job.id, "status": job.status, "created": created}
 
-    summary = get_summary(request.meeting_id)
 
-    blog_output = generate_blog_post(
-        meeting_id=request.meeting_id,
-        meeting_sentences=meeting["sentences"],
-        summary_data=summary,
-        include_transcript=request.include_transcript
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Returns the status, per-stage timings in seconds and result of a job.
+    """
+
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    return job.as_dict()
+
+
+def sse_event(event, data):
+    """
+    Formats one Server-Sent Event with a JSON payload.
+    """
+
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/blog/post-meeting/stream")
+async def stream_post_meeting(meeting_id: str = Query(...), include_transcript: bool = Query(False),
+                              platform: List[str] = Query(None), profile: str = Query(None)):
+    """
+    Streams the generation of a blog post as Server-Sent Events: progress events as the
+    meeting is fetched, summarized and anonymized, then the blog post token by token and
+    each requested platform variant (repeat the platform parameter) as it is written. The
+    profile parameter picks the pipeline profile (see PIPELINE_PROFILES).
+    """
+
+    async def events():
+        async for event in stream_blog_post(meeting_id, include_transcript, platform, profile):
+            yield sse_event(event["event"], event["data"])
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
-    blog_lines = blog_output["blog_post"].split("\n")
-    title = blog_lines[0]
-    content = "\n".join(blog_lines[2:])
+@app.get("/metrics")
+def get_metrics():
+    """
+    Returns node, external call and LLM token metrics in the Prometheus text format.
+    """
+
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/rate-limits")
+def get_rate_limits():
+    """
+    Returns the requests and tokens each provider's rate limit allows right now, its
+    per-minute limits, and how many calls are waiting for it.
+    """
 
-    if request.schedule_time:
-        response = post_to_wordpress(title, content, status="future", scheduled_time=request.schedule_time)
-    else:
-        response = post_to_wordpress(title, content, status="draft")
+    return headroom()
 
-    if response.status_code in [201, 202]:
-        return {"message": "Post successfully created.", "wordpress_response": response.json()}
-    else:
-        return {"error": "Failed to post to WordPress", "details": response.text}''' 
 
 @app.get("/")
 def read_root():
     return {"message": "Hello, FastAPI"}
     
-uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,19 +1,147 @@
-from main import agent, fetch_meetings, get_summary, group_speaker_text
+import time
+import asyncio
 
-def generate_blog_post(meeting_id: str, meeting_sentences: list, summary_data: dict, include_transcript: bool = False) -> dict:
-    transcript_text = group_speaker_text(meeting_sentences)
+from blog_agent import (
+    NO_TRANSCRIPT, PIPELINE_PROFILES, WRITER_NODE, NodeError, astream_agent, initial_state, pipeline_profile, platform_node, platform_names, run_agent
+)
+from fireflies import fetch_transcripts, group_speaker_text
+from redaction import speaker_names
 
-    agent_output = agent.invoke({
-        "messages": [],
-        "fireflies_summary": summary_data,
-        "meeting_transcript": transcript_text,
-        "agent_summary": {},
-        "agent_summary_anonymized": {},
-        "blog_post": ""
-    })
+# Progress events sent when each node of the graph finishes, and the state field each one reports.
+# The fast path nodes of the "combined" and "single" profiles summarize and anonymize at once.
+NODE_EVENTS = {
+    "redact_input": [("redacted", None)],
+    "create_summary": [("summarized", "agent_summary")],
+    "anonymize_output": [("anonymized", "agent_summary_anonymized")],
+    PIPELINE_PROFILES["combined"]: [("summarized", "agent_summary"), ("anonymized", "agent_summary_anonymized")],
+    PIPELINE_PROFILES["single"]: [("summarized", "agent_summary"), ("anonymized", "agent_summary_anonymized")],
+}
+
+def generate_blog_post(meeting_id: str, meeting_sentences: list = None, summary_data: dict = None, include_transcript: bool = False,
+                       platforms: list = None, profile: str = None) -> dict:
+    # Sentences and summary are loaded on demand when the caller only has the meeting id
+    fetch_error = None
+    if meeting_sentences is None or summary_data is None:
+        meeting_details = fetch_transcripts([meeting_id])[meeting_id]
+        fetch_error = meeting_details.get("error")
+        if meeting_sentences is None:
+            meeting_sentences = meeting_details["sentences"]
+        if summary_data is None:
+            summary_data = meeting_details["summary"]
+
+    # An empty or failed fetch would have the agent make a post up
+    if not meeting_sentences and not summary_data:
+        return {"error": fetch_error or NO_TRANSCRIPT}
+
+    agent_output = run_agent(
+        initial_state(
+            summary_data, group_speaker_text(meeting_sentences), include_transcript, speaker_names(meeting_sentences),
+            platforms, profile
+        ),
+        meeting_id
+    )
 
     return {
         "summary": agent_output["agent_summary"][0]["overview"],
         "anonymized": agent_output["agent_summary_anonymized"][0]["anonymized_overview"],
-        "blog_post": agent_output["blog_post"]
+        "blog_post": agent_output["blog_post"],
+        "platform_posts": agent_output["platform_posts"],
+        "models": agent_output["models"]
     }
+
+
+async def stream_blog_post(meeting_id: str, include_transcript: bool = False, platforms: list = None, profile: str = None):
+    """
+    Generates a blog post for a meeting, and the requested platform variants alongside it, and
+    yields its progress as it happens.
+
+    Yields:
+    dict: Events with an "event" name and "data" dict, in order: "fetched" once the meeting is
+          loaded; "redacted", "summarized" and "anonymized" as those nodes finish; "token" for
+          every piece of the blog post as the writer LLM produces it, and "platform_post" as each
+          platform variant is written; and finally "done" with the whole blog post, the
+          platform variants and the models that answered each node. Progress events include the seconds elapsed since the start. If a
+          step fails, an "error" event is sent and the stream ends; streaming the meeting again
+          resumes at the failed step, without repeating the events of the completed ones.
+    """
+
+    started = time.perf_counter()
+
+    try:
+        platforms = platform_names(platforms)
+        profile = pipeline_profile(profile)
+    except ValueError as e:
+        yield {"event": "error", "data": {"message": str(e)}}
+        return
+
+    try:
+        # The Fireflies client and transcript store are synchronous; run them off the event loop
+        meeting_details = (await asyncio.to_thread(fetch_transcripts, [meeting_id]))[meeting_id]
+    except Exception as e:
+        yield {"event": "error", "data": {"message": f"Failed to fetch the meeting: {str(e)}"}}
+        return
+
+    if not meeting_details["sentences"] and not meeting_details["summary"]:
+        yield {"event": "error", "data": {"message": meeting_details.get("error") or NO_TRANSCRIPT}}
+        return
+
+    meeting_sentences = meeting_details["sentences"]
+    state = initial_state(
+        meeting_details["summary"], group_speaker_text(meeting_sentences), include_transcript,
+        speaker_names(meeting_sentences), platforms, profile
+    )
+    yield {"event": "fetched", "data": {"meeting_id": meeting_id, "seconds": time.perf_counter() - started}}
+
+    platform_nodes = {platform_node(platform): platform for platform in platforms}
+    streamed_tokens = False
+    values = {}
+
+    try:
+        async for mode, chunk in astream_agent(state, meeting_id, ["updates", "messages", "values"]):
+            if mode == "values":
+                # The whole state after every step, including outputs of nodes completed by an earlier run
+                values = chunk
+                continue
+
+            if mode == "messages":
+                message, metadata = chunk
+                if metadata.get("langgraph_node") == WRITER_NODE and message.content:
+                    streamed_tokens = True
+                    yield {"event": "token", "data": {"text": message.content}}
+                continue
+
+            for node, update in chunk.items():
+                update = update or {}
+
+                for event, field in NODE_EVENTS.get(node, []):
+                    data = {"seconds": time.perf_counter() - started}
+                    if field is not None:
+                        data.update(update[field][0])
+
+                    yield {"event": event, "data": data}
+
+                if update.get("blog_post"):
+                    # Cached responses, models without streaming and the "single" profile's
+                    # structured answer arrive in one piece
+                    if not streamed_tokens:
+                        yield {"event": "token", "data": {"text": update["blog_post"]}}
+
+                elif node in platform_nodes:
+                    platform = platform_nodes[node]
+                    yield {"event": "platform_post", "data": {
+                        "platform": platform,
+                        "text": update["platform_posts"][platform],
+                        "seconds": time.perf_counter() - started
+                    }}
+
+    except NodeError as e:
+        yield {"event": "error", "data": {"message": str(e)}}
+        return
+
+    # Sent once every writer has finished, since they run in parallel
+    yield {"event": "done", "data": {
+        "blog_post": values.get("blog_post", ""),
+        "platform_posts": values.get("platform_posts") or {},
+        "models": values.get("models") or {},
+        "seconds": time.perf_counter() - started
+    }}
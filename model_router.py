@@ -0,0 +1,246 @@
+import os
+import re
+import asyncio
+import threading
+import contextvars
+import concurrent.futures
+from contextlib import contextmanager
+
+from rate_limits import ESTIMATED_COMPLETION_TOKENS, llm_limiter
+from telemetry import TELEMETRY_MODE, current_span, metrics
+from transcript_chunks import estimate_tokens
+
+HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", "16"))  # Threads running hedged calls of sync graph runs
+
+# LangGraph does not stream the tokens of chat model calls with this tag
+NOSTREAM_TAG = "nostream"
+
+CONTEXT_OVERFLOW = re.compile(r"context.length|context window|maximum context|too many tokens|reduce the length", re.IGNORECASE)
+
+metrics.define("llm_model_answers_total", "counter", "LLM calls per node role answered by each model, by whether a hedged request was racing.")
+metrics.define("llm_model_fallbacks_total", "counter", "LLM calls that moved on to the next model of the fallback chain, by failed model and reason.")
+metrics.define("llm_hedged_requests_total", "counter", "Backup requests sent because a model missed the hedging deadline.")
+
+chosen_models = contextvars.ContextVar("chosen_models", default=None)
+hedge_executor = None
+hedge_executor_lock = threading.Lock()
+
+
+def fallback_reason(error):
+    """
+    Returns why a model failed if another model may still answer: "timeout", "rate_limit",
+    "context_overflow" or "unavailable". Returns None for errors any model would hit.
+    """
+
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)) or "Timeout" in type(error).__name__:
+        return "timeout"
+
+    status = getattr(error, "status_code", None)
+    if status == 429:
+        return "rate_limit"
+    if status in (400, 413) and CONTEXT_OVERFLOW.search(str(error)):
+        return "context_overflow"
+    if (status or 0) >= 500 or "Connection" in type(error).__name__:
+        return "unavailable"
+    return None
+
+
+@contextmanager
+def record_models():
+    """
+    Collects the models that answer the LLM calls made in the enclosed block.
+
+    Yields:
+    list: The "provider:model" names, in the order they first answered.
+    """
+
+    models = []
+    token = chosen_models.set(models)
+    try:
+        yield models
+    finally:
+        chosen_models.reset(token)
+
+
+def get_hedge_executor():
+    global hedge_executor
+
+    if hedge_executor is None:
+        with hedge_executor_lock:
+            if hedge_executor is None:
+                hedge_executor = concurrent.futures.ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+    return hedge_executor
+
+
+class ModelRouter:
+    """
+    Sends the LLM calls of one node role to an ordered chain of models.
+
+    Models whose rate limits have room right now are tried first, in their configured order.
+    A model that times out, is rate limited, cannot fit the prompt in its context or is
+    unavailable hands the call to the next one. With hedge_after, a model that has not
+    answered within that many seconds gets the next model racing it, and the first answer
+    wins. Only the first request of a call streams its tokens, so racing requests do not
+    interleave in the stream. A losing async request is cancelled; a losing sync request
+    runs to the end in a worker thread and is ignored.
+
+    The model that answers is added to the list of record_models and to the node's span.
+    """
+
+    def __init__(self, role, models, get_model, hedge_after=0):
+        self.role = role
+        self.models = list(models)
+        self.get_model = get_model
+        self.hedge_after = hedge_after
+
+    def runnable(self):
+        """
+        Returns the router as a LangChain runnable, to use in place of a chat model in a chain.
+        """
+
+        from langchain_core.runnables import RunnableLambda
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name=f"{self.role}_models")
+
+    def order(self, prompt):
+        tokens = estimate_tokens(prompt.to_string()) + ESTIMATED_COMPLETION_TOKENS
+        ready = [model for model in self.models if llm_limiter(model).ready(tokens)]
+        return ready + [model for model in self.models if model not in ready]
+
+    def request_config(self, config, stream):
+        if stream:
+            return config
+        return {**config, "tags": [*(config.get("tags") or []), NOSTREAM_TAG]}
+
+    def call(self, model, prompt, config, stream=True):
+        return self.get_model(model).invoke(prompt, self.request_config(config, stream))
+
+    async def acall(self, model, prompt, config, stream=True):
+        return await self.get_model(model).ainvoke(prompt, self.request_config(config, stream))
+
+    def answered(self, model, hedged):
+        models = chosen_models.get()
+        if models is not None and model not in models:
+            models.append(model)
+
+        if TELEMETRY_MODE != "off":
+            metrics.inc("llm_model_answers_total", role=self.role, model=model, hedged=str(hedged).lower())
+            span = current_span.get()
+            if span is not None:
+                span.set(model=model)
+
+    def failed(self, model, error, remaining):
+        """
+        Counts a failed request. Raises the error unless another model may still answer.
+        """
+
+        reason = fallback_reason(error)
+        if reason is None or not remaining:
+            raise error
+
+        print(f"{model} failed for the {self.role} ({reason}), trying the next model: {error}")
+        if TELEMETRY_MODE != "off":
+            metrics.inc("llm_model_fallbacks_total", role=self.role, model=model, reason=reason)
+
+    def hedging(self, model):
+        if TELEMETRY_MODE != "off":
+            metrics.inc("llm_hedged_requests_total", role=self.role, model=model)
+
+    def invoke(self, prompt, config):
+        models = self.order(prompt)
+
+        if not self.hedge_after or len(models) == 1:
+            for index, model in enumerate(models):
+                try:
+                    message = self.call(model, prompt, config)
+                except Exception as e:
+                    self.failed(model, e, index + 1 < len(models))
+                    continue
+                self.answered(model, False)
+                return message
+
+        executor = get_hedge_executor()
+        running = {}
+        started = 0
+
+        def start():
+            nonlocal started
+            model = models[started]
+            future = executor.submit(contextvars.copy_context().run, self.call, model, prompt, config, not running)
+            running[future] = model
+            started += 1
+
+        hedged = False
+        start()
+        while True:
+            deadline = self.hedge_after if started < len(models) else None
+            done, _ = concurrent.futures.wait(running, timeout=deadline, return_when=concurrent.futures.FIRST_COMPLETED)
+
+            if not done:
+                # The running requests missed the deadline; race them with the next model
+                self.hedging(models[started - 1])
+                hedged = True
+                start()
+                continue
+
+            for future in done:
+                model = running.pop(future)
+                try:
+                    message = future.result()
+                except Exception as e:
+                    self.failed(model, e, running or started < len(models))
+                    if not running:
+                        start()
+                    continue
+                self.answered(model, hedged)
+                return message
+
+    async def ainvoke(self, prompt, config):
+        models = self.order(prompt)
+
+        if not self.hedge_after or len(models) == 1:
+            for index, model in enumerate(models):
+                try:
+                    message = await self.acall(model, prompt, config)
+                except Exception as e:
+                    self.failed(model, e, index + 1 < len(models))
+                    continue
+                self.answered(model, False)
+                return message
+
+        running = {}
+        started = 0
+
+        def start():
+            nonlocal started
+            model = models[started]
+            running[asyncio.ensure_future(self.acall(model, prompt, config, not running))] = model
+            started += 1
+
+        hedged = False
+        start()
+        try:
+            while True:
+                deadline = self.hedge_after if started < len(models) else None
+                done, _ = await asyncio.wait(running, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # The running requests missed the deadline; race them with the next model
+                    self.hedging(models[started - 1])
+                    hedged = True
+                    start()
+                    continue
+
+                for task in done:
+                    model = running.pop(task)
+                    try:
+                        message = task.result()
+                    except Exception as e:
+                        self.failed(model, e, running or started < len(models))
+                        if not running:
+                            start()
+                        continue
+                    self.answered(model, hedged)
+                    return message
+        finally:
+            for task in running:
+                task.cancel()
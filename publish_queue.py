@@ -0,0 +1,461 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import concurrent.futures
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import requests
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from http_client import BACKOFF_FACTOR, BACKOFF_MAX, TRANSIENT_STATUSES
+from telemetry import TELEMETRY_MODE, metrics
+from wordpress import find_posts, post_to_wordpress, update_post
+
+PUBLISH_QUEUE_PATH = os.getenv("PUBLISH_QUEUE_PATH", "../output/publish_queue.db")
+PUBLISH_CONCURRENCY = int(os.getenv("PUBLISH_CONCURRENCY", "4"))  # Posts created on WordPress at the same time
+PUBLISH_ATTEMPTS = int(os.getenv("PUBLISH_ATTEMPTS", "3"))  # Rounds of lookups and creations per publish() call
+# Seconds a process may spend publishing a post before another process may take it over
+PUBLISH_LEASE_SECONDS = float(os.getenv("PUBLISH_LEASE_SECONDS", "300"))
+
+# Calendar of "future" posts without a publication date: each one gets the next free time slot
+# on a publishing day, so a day's meetings do not all go out at once.
+PUBLISH_DAYS = os.getenv("PUBLISH_DAYS", "mon,tue,wed,thu,fri")
+PUBLISH_TIMES = os.getenv("PUBLISH_TIMES", "09:00")
+# Time zone of the calendar and of publication dates given without an offset
+PUBLISH_TIMEZONE = os.getenv("PUBLISH_TIMEZONE", "UTC")
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"  # Publication dates are stored and sent to WordPress in UTC
+MAX_SLUG_LENGTH = 60
+
+PENDING = "pending"
+PUBLISHED = "published"
+
+# WordPress statuses in the order a post moves through them; a post is only ever moved forward
+STATUS_ORDER = ["draft", "future", "publish"]
+
+metrics.define("wordpress_posts_total", "counter", "Posts handed to WordPress by the publishing queue, by outcome.")
+
+
+def status_rank(status):
+    return STATUS_ORDER.index(status) if status in STATUS_ORDER else -1
+
+
+def publish_key(meeting_id):
+    """
+    Returns the idempotency key of a meeting's blog post. It ends the post's slug, so the post
+    can be found on WordPress again even if the response that created it was lost.
+    """
+
+    return hashlib.sha256(meeting_id.encode("utf-8")).hexdigest()[:12]
+
+
+def post_slug(title, key):
+    words = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")[:MAX_SLUG_LENGTH].strip("-")
+    return f"{words}-{key}" if words else f"meeting-{key}"
+
+
+def split_blog_post(blog_post):
+    # The Writer puts the title on the first line, followed by an empty line
+    lines = blog_post.splitlines()
+    return lines[0].strip(), '\n'.join(lines[2:]).strip()
+
+
+def publish_calendar(days=PUBLISH_DAYS, times=PUBLISH_TIMES):
+    """
+    Parses the publishing calendar.
+
+    Returns:
+    tuple: The publishing weekdays (0 is Monday) and the sorted (hour, minute) time slots of each.
+
+    Raises:
+    ValueError: If a day or time is not valid, or there are none.
+    """
+
+    weekdays = set()
+    for day in days.split(","):
+        day = day.strip().lower()[:3]
+        if day not in WEEKDAYS:
+            raise ValueError(f"Invalid publishing day '{day}'. Use mon, tue, wed, thu, fri, sat or sun.")
+        weekdays.add(WEEKDAYS.index(day))
+
+    slots = set()
+    for slot in times.split(","):
+        try:
+            parsed = datetime.strptime(slot.strip(), "%H:%M")
+        except ValueError:
+            raise ValueError(f"Invalid publishing time '{slot.strip()}'. Use the HH:MM format.")
+        slots.add((parsed.hour, parsed.minute))
+
+    return sorted(weekdays), sorted(slots)
+
+
+def to_utc(date, zone=PUBLISH_TIMEZONE):
+    """
+    Converts a date (a datetime or a string in ISO format, "Z" suffix included) to a naive
+    datetime in UTC. Dates without an offset are taken to be in the zone.
+    """
+
+    if isinstance(date, str):
+        date = datetime.fromisoformat(date.strip().replace("Z", "+00:00"))
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=ZoneInfo(zone))
+    return date.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def calendar_slots(start, days=PUBLISH_DAYS, times=PUBLISH_TIMES, zone=PUBLISH_TIMEZONE):
+    """
+    Yields the publication dates of the calendar from start (a naive datetime in UTC) onwards,
+    in order. The days and times are in the zone; the dates are yielded as naive datetimes in UTC.
+    """
+
+    weekdays, slots = publish_calendar(days, times)
+    zone = ZoneInfo(zone)
+    local_start = start.replace(tzinfo=timezone.utc).astimezone(zone)
+    day = local_start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    while True:
+        if day.weekday() in weekdays:
+            for hour, minute in slots:
+                slot = day.replace(hour=hour, minute=minute)
+                if slot >= local_start:
+                    yield slot.astimezone(timezone.utc).replace(tzinfo=None)
+        day += timedelta(days=1)
+
+
+class PublishQueue:
+    """
+    SQLite-backed queue of blog posts waiting to be published to WordPress, keyed by an
+    idempotency key derived from the meeting id.
+
+    A meeting is queued once: queuing it again updates its pending post, and leaves a
+    published one as it is. Every post gets a slug ending in its key, and publish() looks the
+    slugs up on WordPress before creating anything, so retrying after a lost response, a crash
+    or a failed run never creates a duplicate. Posts are leased while they are being published,
+    so two processes do not publish the same post at once. Failed posts stay pending with
+    their last error until a later publish() succeeds.
+    """
+
+    def __init__(self, path=PUBLISH_QUEUE_PATH):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with closing(self.connect()) as connection:
+            connection.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS posts (
+                    key TEXT PRIMARY KEY,
+                    meeting_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    slug TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    scheduled_at TEXT,
+                    state TEXT NOT NULL,
+                    leased_until REAL NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    wordpress_post TEXT,
+                    queued_at REAL NOT NULL,
+                    published_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS posts_scheduled_at ON posts (scheduled_at);
+            """)
+
+    def connect(self):
+        # Transactions are started explicitly, so they can lock the queue before reading
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def enqueue(self, meeting_id, blog_post, status="draft", scheduled_at=None, start=None):
+        """
+        Queues the blog post of a meeting for publishing.
+
+        Parameters:
+        status (str): The WordPress status of the post: "draft", "publish" or "future".
+        scheduled_at (str): The publication date of a "future" post, in ISO format. Without it
+                            the post gets the next free slot of the publishing calendar.
+                            Dates without an offset are in PUBLISH_TIMEZONE.
+        start (datetime or str): The earliest calendar slot to give, in PUBLISH_TIMEZONE unless
+                                 it has a time zone; defaults to now.
+
+        Returns:
+        str: The post's key. A meeting whose post was already published keeps that post; if it
+             was published with an earlier status, such as a draft that is now to be published,
+             an update of its status is queued instead.
+        """
+
+        key = publish_key(meeting_id)
+        title, content = split_blog_post(blog_post)
+
+        with closing(self.connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT slug, state, status, scheduled_at FROM posts WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is not None and row[1] == PUBLISHED and status_rank(status) <= status_rank(row[2]):
+                    connection.execute("COMMIT")
+                    return key
+
+                if status != "future":
+                    scheduled_at = None
+                elif scheduled_at:
+                    scheduled_at = to_utc(scheduled_at).strftime(DATE_FORMAT)
+                elif row is not None and row[2] == "future" and row[3]:
+                    scheduled_at = row[3]  # Keep the slot it was given when first queued
+                else:
+                    scheduled_at = self.free_slot(connection, to_utc(start or datetime.now(timezone.utc)))
+
+                if row is None:
+                    connection.execute(
+                        "INSERT INTO posts (key, meeting_id, title, content, slug, status, scheduled_at, state, queued_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, meeting_id, title, content, post_slug(title, key), status, scheduled_at, PENDING, time.time())
+                    )
+                elif row[1] == PUBLISHED:
+                    # Only the status and date of the post on WordPress change, not its content
+                    connection.execute(
+                        "UPDATE posts SET status = ?, scheduled_at = ?, state = ?, error = NULL WHERE key = ?",
+                        (status, scheduled_at, PENDING, key)
+                    )
+                else:
+                    # The slug is kept, since an earlier attempt may already have created the post with it
+                    connection.execute(
+                        "UPDATE posts SET title = ?, content = ?, status = ?, scheduled_at = ? WHERE key = ?",
+                        (title, content, status, scheduled_at, key)
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+        return key
+
+    def free_slot(self, connection, start):
+        taken = {
+            scheduled_at for (scheduled_at,) in connection.execute(
+                "SELECT scheduled_at FROM posts WHERE status = 'future' AND scheduled_at >= ?",
+                (start.strftime(DATE_FORMAT),)
+            )
+        }
+        for slot in calendar_slots(start):
+            if slot.strftime(DATE_FORMAT) not in taken:
+                return slot.strftime(DATE_FORMAT)
+
+    def lease(self, keys):
+        """
+        Takes the lease of the pending posts among keys (all pending posts if keys is None) that
+        no other process is publishing, and returns them.
+        """
+
+        now = time.time()
+        with closing(self.connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = connection.execute(
+                    "SELECT key, meeting_id, title, content, slug, status, scheduled_at, wordpress_post FROM posts "
+                    "WHERE state = ? AND leased_until < ?", (PENDING, now)
+                ).fetchall()
+                rows = [row for row in rows if keys is None or row[0] in keys]
+                connection.executemany(
+                    "UPDATE posts SET leased_until = ? WHERE key = ?",
+                    [(now + PUBLISH_LEASE_SECONDS, row[0]) for row in rows]
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+        columns = ("key", "meeting_id", "title", "content", "slug", "status", "scheduled_at")
+        # Posts already on WordPress, whose status is to be updated, have its id
+        return [
+            dict(zip(columns, row), post_id=json.loads(row[7])["id"] if row[7] else None) for row in rows
+        ]
+
+    def published(self, key, post):
+        with closing(self.connect()) as connection:
+            connection.execute(
+                "UPDATE posts SET state = ?, wordpress_post = ?, error = NULL, leased_until = 0, "
+                "attempts = attempts + 1, published_at = ? WHERE key = ?",
+                (PUBLISHED, json.dumps(post), time.time(), key)
+            )
+
+    def release(self, keys):
+        with closing(self.connect()) as connection:
+            connection.executemany("UPDATE posts SET leased_until = 0 WHERE key = ? AND state = ?", [(key, PENDING) for key in keys])
+
+    def failed(self, key, error):
+        with closing(self.connect()) as connection:
+            connection.execute(
+                "UPDATE posts SET error = ?, leased_until = 0, attempts = attempts + 1 WHERE key = ?", (error, key)
+            )
+
+    def results(self, keys):
+        """
+        Returns the publishing state of the given posts: their meeting, status, publication
+        date, state ("pending" or "published"), WordPress post and last error.
+        """
+
+        with closing(self.connect()) as connection:
+            rows = connection.execute(
+                f"SELECT key, meeting_id, status, scheduled_at, state, wordpress_post, error FROM posts "
+                f"WHERE key IN ({', '.join('?' for key in keys)})", list(keys)
+            ).fetchall()
+
+        posts = {
+            key: {
+                "meeting_id": meeting_id,
+                "status": status,
+                "scheduled_at": scheduled_at,
+                "state": state,
+                "wordpress_post": json.loads(wordpress_post) if wordpress_post else None,
+                "error": error,
+            }
+            for key, meeting_id, status, scheduled_at, state, wordpress_post, error in rows
+        }
+        return {key: posts[key] for key in keys if key in posts}
+
+    def create(self, post):
+        """
+        Creates one post on WordPress, or updates the status of the post it already has.
+
+        Returns:
+        tuple: The created post, or None, and the error, if any, and whether trying again may help.
+        """
+
+        try:
+            if post["post_id"]:
+                response = update_post(post["post_id"], post["status"], post["scheduled_at"])
+            else:
+                response = post_to_wordpress(
+                    post["title"], post["content"], post["status"], post["scheduled_at"], post["slug"]
+                )
+        except requests.exceptions.RequestException as e:
+            # The post may or may not have been created; the next round looks it up first
+            return None, f"{type(e).__name__}: {e}", True
+
+        if response.status_code in (200, 201):
+            try:
+                return response.json(), None, False
+            except ValueError:
+                # Created or not, the next round finds the post by its slug
+                return None, f"HTTP {response.status_code}: the response is not JSON: {response.text[:200]}", True
+
+        # A server error may come after the post was created; the next round looks it up first
+        transient = response.status_code in TRANSIENT_STATUSES or response.status_code >= 500
+        return None, f"HTTP {response.status_code}: {response.text[:200]}", transient
+
+    def publish(self, keys=None):
+        """
+        Publishes the pending posts among keys, or every pending post, to WordPress in one
+        batch. Every round looks up the slugs of the remaining posts in as few requests as
+        possible, counts the ones that already exist as published, and creates the others
+        concurrently. Posts whose creation failed for a reason that may pass are retried in
+        the next round, after a backoff. Calling it again is always safe.
+
+        Returns:
+        dict: The publishing state of every given post (see results()), by key, with its
+              "outcome": "created", "existing", "updated" (the status of a post already on
+              WordPress was changed), "failed", or "skipped" for posts that were
+              already published or are being published by another process.
+        """
+
+        posts = self.lease(None if keys is None else set(keys))
+        keys = list(keys) if keys is not None else [post["key"] for post in posts]
+        outcomes = {}
+        errors = {}
+
+        leased = [post["key"] for post in posts]
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=PUBLISH_CONCURRENCY) as executor:
+                for attempt in range(PUBLISH_ATTEMPTS):
+                    if not posts:
+                        break
+                    if attempt:
+                        time.sleep(min(BACKOFF_MAX, BACKOFF_FACTOR * 2 ** attempt))
+
+                    try:
+                        existing = find_posts(post["slug"] for post in posts if not post["post_id"])
+                    except requests.exceptions.RequestException as e:
+                        errors.update({post["key"]: f"Lookup failed: {e}" for post in posts})
+                        continue
+
+                    remaining = []
+                    for post in posts:
+                        if not post["post_id"] and post["slug"] in existing:
+                            self.published(post["key"], existing[post["slug"]])
+                            outcomes[post["key"]] = "existing"
+                        else:
+                            remaining.append(post)
+
+                    retry = []
+                    for post, (created, error, transient) in zip(remaining, executor.map(self.create, remaining)):
+                        if created is not None:
+                            self.published(post["key"], created)
+                            outcomes[post["key"]] = "updated" if post["post_id"] else "created"
+                        elif transient:
+                            errors[post["key"]] = error
+                            retry.append(post)
+                        else:
+                            errors[post["key"]] = error
+                            outcomes[post["key"]] = "failed"
+                            self.failed(post["key"], error)
+                    posts = retry
+        except BaseException:
+            # Give the posts that were not settled back to the queue instead of waiting for the lease to run out
+            self.release([key for key in leased if key not in outcomes])
+            raise
+
+        for post in posts:
+            outcomes[post["key"]] = "failed"
+            self.failed(post["key"], errors[post["key"]])
+
+        results = self.results(keys)
+        for key, result in results.items():
+            result["outcome"] = outcomes.get(key, "skipped")
+            if TELEMETRY_MODE != "off" and key in outcomes:
+                metrics.inc("wordpress_posts_total", outcome=outcomes[key])
+        return results
+
+    def publish_post(self, meeting_id, blog_post, status="draft", scheduled_at=None):
+        """
+        Queues the blog post of one meeting and publishes it right away (see enqueue() and publish()).
+
+        Returns:
+        dict: The publishing state of the post, with its outcome.
+        """
+
+        key = self.enqueue(meeting_id, blog_post, status, scheduled_at)
+        return self.publish([key])[key]
+
+
+# The queue is opened on first use, so importing this module creates no files
+publish_queue = None
+publish_queue_lock = threading.Lock()
+
+
+def get_publish_queue():
+    """
+    Returns the shared publishing queue, opening it on first use.
+    """
+
+    global publish_queue
+
+    if publish_queue is None:
+        with publish_queue_lock:
+            if publish_queue is None:
+                publish_queue = PublishQueue()
+
+    return publish_queue
@@ -0,0 +1,404 @@
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+import itertools
+from contextlib import closing, contextmanager
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from telemetry import DURATION_BUCKETS, TELEMETRY_MODE, metrics
+
+# Buckets are kept in a small SQLite file so every process on the host shares them.
+# An empty path keeps them in this process only.
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", "../output/rate_limits.db")
+
+# Provider quotas; 0, the default, turns a limit off. Groq limits every model separately, so each
+# Groq model gets its own buckets. The Groq free tier for llama3-70b-8192, for example, allows
+# 30 requests and 6000 tokens per minute, and the Fireflies Business plan 60 requests per minute.
+GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "0"))
+GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "0"))
+FIREFLIES_REQUESTS_PER_MINUTE = float(os.getenv("FIREFLIES_REQUESTS_PER_MINUTE", "0"))
+
+# Completion tokens reserved for every LLM call on top of its estimated prompt, corrected once
+# the provider reports the actual usage
+ESTIMATED_COMPLETION_TOKENS = int(os.getenv("ESTIMATED_COMPLETION_TOKENS", "700"))
+
+metrics.define("rate_limit_wait_seconds", "histogram", "Time calls waited for a provider's rate limit.", DURATION_BUCKETS)
+
+
+class BucketStore:
+    """
+    Token bucket levels shared by every rate limiter, as (level, updated_at) per bucket name.
+
+    With a path, the levels live in SQLite and are read and written in an immediate
+    transaction, so concurrent processes never take from the same tokens twice.
+    """
+
+    def __init__(self, path=RATE_LIMIT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.memory = {}
+        self.created = False
+
+    def connect(self):
+        # Transactions are started explicitly, so they can lock the database before reading
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def create(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with closing(self.connect()) as connection:
+            connection.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    level REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+            """)
+        self.created = True
+
+    @contextmanager
+    def levels(self, names):
+        """
+        Yields a dict of the levels of the named buckets, missing for buckets never used.
+        Levels set in the dict are saved when the block exits, atomically across threads and processes.
+        """
+
+        with self.lock:
+            if not self.path:
+                yield self.memory
+                return
+
+            if not self.created:
+                self.create()
+
+            with closing(self.connect()) as connection:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    rows = connection.execute(
+                        f"SELECT name, level, updated_at FROM buckets WHERE name IN ({', '.join('?' for name in names)})",
+                        list(names)
+                    ).fetchall()
+                    levels = {name: (level, updated_at) for name, level, updated_at in rows}
+                    saved = dict(levels)
+
+                    yield levels
+
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO buckets (name, level, updated_at) VALUES (?, ?, ?)",
+                        [(name, *value) for name, value in levels.items() if saved.get(name) != value]
+                    )
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+
+
+class Ticket:
+    """
+    A call waiting for a rate limiter, woken when it may be next to take from the buckets.
+    """
+
+    def __init__(self, key, number, loop=None):
+        self.key = key
+        self.number = number
+        self.loop = loop
+        self.event = asyncio.Event() if loop else threading.Event()
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.event.set)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute token buckets for one provider.
+
+    Each bucket holds up to a minute of its quota and refills continuously. A call takes one
+    request and its estimated tokens from every bucket at once, or waits until all of them
+    have enough. Calls estimated above a whole minute of tokens wait for a full bucket.
+
+    Waiting calls are served one at a time, in order of how few calls their meeting has been
+    granted while others were waiting, then first come first served. A meeting with many
+    transcript chunks therefore cannot hold back the meetings started after it. Sync and
+    async callers share the same queue. The buckets are shared with other processes through
+    the BucketStore, but the queue, and so the fairness between meetings, is per process:
+    calls from another process take from the buckets without queueing behind these.
+    """
+
+    def __init__(self, provider, requests_per_minute=0, tokens_per_minute=0, store=None):
+        self.provider = provider
+        self.limits = {
+            bucket: per_minute
+            for bucket, per_minute in (("requests", requests_per_minute), ("tokens", tokens_per_minute))
+            if per_minute > 0
+        }
+        self.store = store or bucket_store
+        self.lock = threading.Lock()
+        self.waiting = []
+        self.granted = {}  # Meeting -> calls granted since the queue was last empty
+        self.numbers = itertools.count()
+
+    @property
+    def enabled(self):
+        return bool(self.limits)
+
+    def bucket_names(self):
+        return {bucket: f"{self.provider}:{bucket}" for bucket in self.limits}
+
+    def refilled(self, levels, now):
+        # Buckets never used before start full
+        refilled = {}
+        for bucket, name in self.bucket_names().items():
+            per_minute = self.limits[bucket]
+            level, updated_at = levels.get(name, (per_minute, now))
+            refilled[bucket] = min(per_minute, level + (now - updated_at) * per_minute / 60)
+        return refilled
+
+    def needed(self, tokens):
+        # A call larger than a whole minute of quota needs a full bucket
+        cost = {"requests": 1, "tokens": tokens}
+        return {bucket: min(cost[bucket], per_minute) for bucket, per_minute in self.limits.items()}
+
+    def shortfall(self, available, needed):
+        # Seconds until every bucket has refilled enough
+        return max((needed[bucket] - available[bucket]) * 60 / self.limits[bucket] for bucket in self.limits)
+
+    def take(self, tokens):
+        """
+        Takes one request and the given tokens from the buckets if all of them have enough.
+
+        Returns:
+        float: 0 if they were taken, otherwise the seconds until the buckets will have refilled enough.
+        """
+
+        names = self.bucket_names()
+        needed = self.needed(tokens)
+        now = time.time()
+
+        with self.store.levels(names.values()) as levels:
+            available = self.refilled(levels, now)
+            wait = self.shortfall(available, needed)
+
+            if wait <= 0:
+                for bucket, name in names.items():
+                    levels[name] = (available[bucket] - needed[bucket], now)
+                return 0
+            return wait
+
+    def ready(self, tokens=0):
+        """
+        Returns whether a call with the given tokens would be sent right away, without taking anything.
+        """
+
+        if not self.enabled:
+            return True
+
+        with self.lock:
+            if self.waiting:
+                return False
+
+        with self.store.levels(self.bucket_names().values()) as levels:
+            available = self.refilled(levels, time.time())
+        return self.shortfall(available, self.needed(tokens)) <= 0
+
+    def settle(self, reserved_tokens, used_tokens):
+        """
+        Gives back the tokens a call reserved but did not use, or takes the ones it used beyond its reservation.
+        """
+
+        if "tokens" not in self.limits or reserved_tokens == used_tokens:
+            return
+
+        name = self.bucket_names()["tokens"]
+        now = time.time()
+        with self.store.levels([name]) as levels:
+            available = self.refilled(levels, now)["tokens"]
+            levels[name] = (min(self.limits["tokens"], available + reserved_tokens - used_tokens), now)
+
+    def drain(self):
+        """
+        Empties the buckets after the provider rejected a call for exceeding its quota, so
+        every process backs off until they refill.
+        """
+
+        names = self.bucket_names()
+        now = time.time()
+        with self.store.levels(names.values()) as levels:
+            available = self.refilled(levels, now)
+            for bucket, name in names.items():
+                levels[name] = (min(0, available[bucket]), now)
+
+    def headroom(self):
+        """
+        Returns:
+        dict: For every bucket, the requests or tokens available now and the per-minute limit,
+              plus the number of calls of this process waiting for them.
+        """
+
+        names = self.bucket_names()
+        with self.store.levels(names.values()) as levels:
+            available = self.refilled(levels, time.time())
+
+        with self.lock:
+            waiting = len(self.waiting)
+
+        return {
+            "buckets": {
+                bucket: {"available": round(available[bucket], 1), "per_minute": self.limits[bucket]}
+                for bucket in self.limits
+            },
+            "waiting": waiting,
+        }
+
+    def enqueue(self, key, loop=None):
+        with self.lock:
+            ticket = Ticket(key, next(self.numbers), loop)
+            self.waiting.append(ticket)
+            return ticket
+
+    def dequeue(self, ticket):
+        with self.lock:
+            self.waiting.remove(ticket)
+            if self.waiting:
+                self.head().wake()
+            else:
+                self.granted.clear()
+
+    def head(self):
+        return min(self.waiting, key=lambda ticket: (self.granted.get(ticket.key, 0), ticket.number))
+
+    def try_take(self, ticket, tokens):
+        """
+        Returns None if another call is ahead of ticket, 0 if ticket's call took from the
+        buckets, or the seconds to wait before trying again.
+        """
+
+        with self.lock:
+            if self.head() is not ticket:
+                return None
+            wait = self.take(tokens)
+            if wait == 0:
+                self.granted[ticket.key] = self.granted.get(ticket.key, 0) + 1
+            return wait
+
+    def record_wait(self, started):
+        if TELEMETRY_MODE != "off":
+            metrics.observe("rate_limit_wait_seconds", time.perf_counter() - started, provider=self.provider)
+
+    def acquire(self, tokens=0, key=None, blocking=True):
+        """
+        Waits until a call with the given estimated tokens is within the provider's limits.
+
+        Parameters:
+        tokens (int): The estimated tokens of the call.
+        key (str): What the call is for, usually a meeting id; calls are shared fairly between keys.
+        blocking (bool): Whether to wait. Without waiting, the call is only allowed if the buckets have enough now.
+
+        Returns:
+        bool: Whether the call may be sent; always True when blocking.
+        """
+
+        if not self.enabled:
+            return True
+
+        if not blocking:
+            with self.lock:
+                return not self.waiting and self.take(tokens) == 0
+
+        started = time.perf_counter()
+        ticket = self.enqueue(key)
+        try:
+            while True:
+                wait = self.try_take(ticket, tokens)
+                if wait == 0:
+                    self.record_wait(started)
+                    return True
+                ticket.event.wait(wait)
+                ticket.event.clear()
+        finally:
+            self.dequeue(ticket)
+
+    async def aacquire(self, tokens=0, key=None, blocking=True):
+        """
+        Async version of acquire, waiting without blocking the event loop. The buckets are
+        read and written in a worker thread, since the SQLite transaction may wait for other
+        processes to release the database.
+        """
+
+        if not self.enabled:
+            return True
+
+        if not blocking:
+            return await asyncio.to_thread(self.acquire, tokens, key, False)
+
+        started = time.perf_counter()
+        ticket = self.enqueue(key, asyncio.get_running_loop())
+        try:
+            while True:
+                wait = await asyncio.to_thread(self.try_take, ticket, tokens)
+                if wait == 0:
+                    self.record_wait(started)
+                    return True
+                try:
+                    await asyncio.wait_for(ticket.event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                ticket.event.clear()
+        finally:
+            self.dequeue(ticket)
+
+
+bucket_store = BucketStore()
+fireflies_limiter = RateLimiter("fireflies", FIREFLIES_REQUESTS_PER_MINUTE)
+limiters = [fireflies_limiter]
+limiters_lock = threading.Lock()
+
+
+def llm_limiter(model):
+    """
+    Returns the shared rate limiter of an LLM, given as "provider:model". Groq models are limited
+    to GROQ_REQUESTS_PER_MINUTE and GROQ_TOKENS_PER_MINUTE; other providers are not limited.
+    """
+
+    with limiters_lock:
+        for limiter in limiters:
+            if limiter.provider == model:
+                return limiter
+
+        if model.partition(":")[0] == "groq":
+            limiter = RateLimiter(model, GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE)
+        else:
+            limiter = RateLimiter(model)
+        limiters.append(limiter)
+        return limiter
+
+
+def headroom():
+    """
+    Returns the current headroom of every enabled rate limiter, by provider.
+    """
+
+    with limiters_lock:
+        enabled = [limiter for limiter in limiters if limiter.enabled]
+    return {limiter.provider: limiter.headroom() for limiter in enabled}
+
+
+def rate_limit_metrics():
+    # Read from the shared buckets when /metrics is scraped
+    for provider, limits in headroom().items():
+        for bucket, values in limits["buckets"].items():
+            yield "rate_limit_available", "gauge", "Requests or tokens a provider's rate limit allows right now.", {"provider": provider, "bucket": bucket}, values["available"]
+            yield "rate_limit_per_minute", "gauge", "A provider's rate limit per minute.", {"provider": provider, "bucket": bucket}, values["per_minute"]
+        yield "rate_limit_waiting_calls", "gauge", "Calls of this process waiting for a provider's rate limit.", {"provider": provider}, limits["waiting"]
+
+
+metrics.register_collector(rate_limit_metrics)
@@ -0,0 +1,197 @@
+import os
+import re
+import json
+
+# Optional JSON file of organisation-specific terms to redact, either a list of terms or an
+# object mapping each term to its replacement, e.g. {"Acme Corp": "a client"}.
+REDACTION_DICTIONARY_PATH = os.getenv("REDACTION_DICTIONARY_PATH")
+
+DEFAULT_REPLACEMENT = "[redacted]"
+AMBIGUOUS_NAME_REPLACEMENT = "a participant"
+MIN_NAME_PART_LENGTH = 3
+
+# Placeholder speaker names, such as Fireflies' "Speaker 1", that name nobody
+GENERIC_SPEAKER_NAME = re.compile(r"(?:speaker|participant|guest|user|unknown|caller)(?:\s*\d+)?", re.IGNORECASE)
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# Numbers do not start inside an ISO date ("2025-04-11") or right after one of its dashes
+PHONE_PATTERN = re.compile(r"(?<![\w+])(?<!\d-)(?!\d{4}-\d{2}-\d{2})\+?\d[\d ().-]{7,}\d(?!\w)")
+MIN_PHONE_DIGITS = 9  # Times and short numbers have fewer digits than phone numbers
+MONEY_PATTERN = re.compile(
+    r"(?:[$€£¥]\s?\d(?:[\d,.]*\d)?(?:\s?(?:k|m|bn|thousand|million|billion)\b)?"
+    r"|\b\d(?:[\d,.]*\d)?\s?(?:k|m|bn|thousand|million|billion)?\s?"
+    r"(?:usd|eur|gbp|sek|nok|dkk|dollars?|euros?|pounds?|kronor|kr)\b)",
+    re.IGNORECASE
+)
+
+
+def load_dictionary(path=REDACTION_DICTIONARY_PATH):
+    """
+    Loads the organisation dictionary as a dict mapping each term to its replacement.
+    """
+
+    if not path or not os.path.exists(path):
+        return {}
+
+    with open(path) as file:
+        terms = json.load(file)
+
+    if isinstance(terms, list):
+        return {term: DEFAULT_REPLACEMENT for term in terms}
+    return terms
+
+
+def build_trie_pattern(terms):
+    """
+    Builds a single regular expression that matches any of the terms in one pass over the text.
+
+    The terms are merged into a trie and the trie is written out as nested alternations, so
+    terms sharing a prefix are only compared once (the idea behind Aho-Corasick) and the regex
+    engine prefers the longest term at every position.
+    """
+
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A term ending here is still a match, but longer terms are tried first
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class Redactor:
+    """
+    Deterministic local redaction of meeting data before it is sent to an LLM.
+
+    Speaker names become stable role placeholders ("Participant 1", "Participant 2", ...) in
+    order of first appearance, so the same person keeps the same placeholder across the
+    summary and the transcript. First and last names on their own are replaced too, unless
+    they are shared by several speakers. Terms from the organisation dictionary, email
+    addresses, phone numbers and money amounts are replaced as well. Placeholder speaker
+    names such as "Speaker 1" are left alone.
+
+    Full names and dictionary terms are matched case-insensitively. Name parts, and names made
+    of a single word, are only matched capitalized, so that speakers called Will, Mark or Grace
+    do not turn every "will", "mark" or "grace" into a placeholder. All of them are matched
+    in a single pass.
+    """
+
+    def __init__(self, speaker_names=(), dictionary=None):
+        self.replacements = {}  # Lowercased term -> replacement, matched case-insensitively
+        self.part_replacements = {}  # Capitalized name part -> replacement, matched as written
+
+        for term, replacement in (load_dictionary() if dictionary is None else dictionary).items():
+            self.add(term, replacement)
+
+        self.speaker_roles = {}
+        for name in speaker_names:
+            if name and name not in self.speaker_roles and not GENERIC_SPEAKER_NAME.fullmatch(name.strip()):
+                self.speaker_roles[name] = f"Participant {len(self.speaker_roles) + 1}"
+
+        part_owners = {}
+        for name in self.speaker_roles:
+            for part in re.split(r"[\s.]+", name):
+                if len(part) >= MIN_NAME_PART_LENGTH:
+                    part_owners.setdefault(part[0].upper() + part[1:], set()).add(name)
+
+        for part, owners in part_owners.items():
+            owner = next(iter(owners))
+            self.part_replacements[part] = self.speaker_roles[owner] if len(owners) == 1 else AMBIGUOUS_NAME_REPLACEMENT
+
+        # Full names win over the parts they are made of
+        for name, role in self.speaker_roles.items():
+            if len(name.split()) > 1:
+                self.add(name, role)
+
+        branches = []
+        if self.replacements:
+            branches.append("(?i:(?P<term>" + build_trie_pattern(self.replacements) + "))")
+        if self.part_replacements:
+            branches.append(build_trie_pattern(self.part_replacements))
+
+        self.pattern = None
+        if branches:
+            # Terms are tried before name parts at every position
+            self.pattern = re.compile(r"(?<!\w)(?:" + "|".join(branches) + r")(?!\w)")
+
+    def add(self, term, replacement):
+        term = term.strip()
+        if term:
+            self.replacements[term.lower()] = replacement
+
+    def replacement(self, match):
+        if match.groupdict().get("term") is not None:
+            return self.replacements[match.group().lower()]
+        return self.part_replacements[match.group()]
+
+    def redact(self, text):
+        """
+        Returns text with names, dictionary terms, emails, phone numbers and money amounts replaced.
+        """
+
+        if not text:
+            return text
+
+        text = EMAIL_PATTERN.sub("[email]", text)
+        text = PHONE_PATTERN.sub(
+            lambda match: "[phone number]" if sum(char.isdigit() for char in match.group()) >= MIN_PHONE_DIGITS
+            else match.group(),
+            text
+        )
+        text = MONEY_PATTERN.sub("[amount]", text)
+
+        if self.pattern is not None:
+            text = self.pattern.sub(self.replacement, text)
+
+        return text
+
+    def leaked_terms(self, text):
+        """
+        Returns the names and dictionary terms that redact() would replace in text, lowercased,
+        each once in order of first appearance. Text that went through redact() has none.
+        """
+
+        if not text or self.pattern is None:
+            return []
+        return list(dict.fromkeys(match.group().lower() for match in self.pattern.finditer(text)))
+
+    def redact_value(self, value):
+        """
+        Redacts every string in a JSON-like value, such as the Fireflies summary.
+        """
+
+        if isinstance(value, str):
+            return self.redact(value)
+        if isinstance(value, list):
+            return [self.redact_value(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.redact_value(item) for key, item in value.items()}
+        return value
+
+
+def speaker_names(sentences):
+    """
+    Returns the distinct speaker names of a transcript in order of first appearance.
+    """
+
+    return list(dict.fromkeys(sentence['speaker_name'] for sentence in sentences if sentence.get('speaker_name')))
+
+
+def transcript_speaker_names(meeting_transcript):
+    """
+    Returns the speaker names of a transcript grouped by group_speaker_text, one "Speaker: text" turn per line.
+    """
+
+    return list(dict.fromkeys(
+        line.partition(": ")[0] for line in meeting_transcript.splitlines() if ": " in line
+    ))
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+
+import requests
+
+from webhooks import SIGNATURE_HEADER, WEBHOOK_SECRET, sign_payload
+
+
+def recorded_payloads(paths):
+    """
+    Yields the path and raw body of every recorded payload in the given files and directories.
+    """
+
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".json"))
+        else:
+            files = [path]
+
+        for file_path in files:
+            with open(file_path, "rb") as file:
+                yield file_path, file.read().strip()
+
+
+def replay(paths, url, secret, repeat=1, delay=0.0, bad_signature=False):
+    """
+    Posts recorded Fireflies webhook payloads to a running API the way Fireflies does, signed
+    with the webhook secret, and prints each response.
+    """
+
+    for attempt in range(repeat):
+        for file_path, body in recorded_payloads(paths):
+            signature = sign_payload(body, secret)
+            if bad_signature:
+                signature = signature[::-1]
+
+            response = requests.post(
+                url, data=body, timeout=30,
+                headers={"Content-Type": "application/json", SIGNATURE_HEADER: signature}
+            )
+            print(f"{file_path} (delivery {attempt + 1}): {response.status_code} {response.text}")
+
+            if delay:
+                time.sleep(delay)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay recorded Fireflies webhook payloads against a local API (python3 main2.py)."
+    )
+    parser.add_argument("paths", nargs="+", help="Recorded payload files, or directories of .json payloads.")
+    parser.add_argument("--url", default="http://localhost:8000/webhooks/fireflies",
+                        help="Webhook endpoint (default: http://localhost:8000/webhooks/fireflies).")
+    parser.add_argument("--secret", default=WEBHOOK_SECRET,
+                        help="Webhook secret to sign with (default: FIREFLIES_WEBHOOK_SECRET).")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Deliver every payload this many times, e.g. to check deduplication.")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait between deliveries.")
+    parser.add_argument("--bad-signature", action="store_true",
+                        help="Send an invalid signature, which the API must reject.")
+
+    args = parser.parse_args(argv)
+    if not args.secret:
+        parser.error("Set FIREFLIES_WEBHOOK_SECRET or pass --secret.")
+
+    replay(args.paths, args.url, args.secret, args.repeat, args.delay, args.bad_signature)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
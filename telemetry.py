@@ -0,0 +1,336 @@
+import os
+import json
+import time
+import inspect
+import threading
+import functools
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# "off" records nothing, "metrics" keeps in-process counters and histograms for /metrics,
+# and "trace" also writes every span as a JSON line to TRACE_PATH
+TELEMETRY_MODE = os.getenv("TELEMETRY", "metrics")
+TRACE_PATH = os.getenv("TRACE_PATH", "../output/traces.jsonl")
+LLM_PROMPT_PRICE = float(os.getenv("LLM_PROMPT_PRICE_PER_MILLION", "0"))  # USD per million prompt tokens
+LLM_COMPLETION_PRICE = float(os.getenv("LLM_COMPLETION_PRICE_PER_MILLION", "0"))  # USD per million completion tokens
+
+METRIC_PREFIX = "blog_agent_"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+COST_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+RUN_KINDS = ("agent_run", "job")  # Spans that produce one blog post
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels) + "}"
+
+
+class Metrics:
+    """
+    Thread-safe in-process counters and histograms, rendered in the Prometheus text format.
+
+    Histograms keep one count per bucket, so observing a value is a bisect and a few additions
+    under a lock. Collectors registered with register_collector are called at render time for
+    values that are cheaper to read when scraped, such as queue depths and cache counters.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.families = {}  # Name -> [type, help, buckets, {labels: value}]
+        self.collectors = []
+
+    def define(self, name, kind, help, buckets=None):
+        self.families.setdefault(METRIC_PREFIX + name, [kind, help, buckets, {}])
+
+    def inc(self, metric, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            samples = self.families[METRIC_PREFIX + metric][3]
+            samples[key] = samples.get(key, 0) + amount
+
+    def observe(self, metric, value, **labels):
+        key = tuple(sorted(labels.items()))
+        family = self.families[METRIC_PREFIX + metric]
+        buckets = family[2]
+        index = bisect_left(buckets, value)
+
+        with self.lock:
+            sample = family[3].get(key)
+            if sample is None:
+                # Non-cumulative bucket counts, then the total count and sum
+                sample = family[3][key] = [0] * len(buckets) + [0, 0.0]
+            if index < len(buckets):
+                sample[index] += 1
+            sample[-2] += 1
+            sample[-1] += value
+
+    def register_collector(self, collect):
+        """
+        Registers a function that returns (name, type, help, labels dict, value) tuples to
+        include in every render.
+        """
+
+        self.collectors.append(collect)
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+
+        lines = []
+
+        with self.lock:
+            families = [(name, kind, help, buckets, dict(samples)) for name, (kind, help, buckets, samples) in self.families.items()]
+
+        for name, kind, help, buckets, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for key, value in samples.items():
+                if kind != "histogram":
+                    lines.append(f"{name}{format_labels(key)} {value}")
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(buckets, value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{format_labels(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_bucket{format_labels(key + (('le', '+Inf'),))} {value[-2]}")
+                lines.append(f"{name}_count{format_labels(key)} {value[-2]}")
+                lines.append(f"{name}_sum{format_labels(key)} {value[-1]}")
+
+        collected = {}
+        for collect in self.collectors:
+            for name, kind, help, labels, value in collect():
+                collected.setdefault(METRIC_PREFIX + name, (kind, help, []))[2].append((labels, value))
+
+        for name, (kind, help, samples) in collected.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{format_labels(sorted(labels.items()))} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.define("span_duration_seconds", "histogram", "Duration of graph nodes, external calls and runs.", DURATION_BUCKETS)
+metrics.define("llm_calls_total", "counter", "LLM calls per graph node, by whether the response came from the cache.")
+metrics.define("llm_tokens_total", "counter", "LLM tokens per graph node. source is reported by the provider, estimated from the text, or cache for cached responses.")
+metrics.define("llm_cost_dollars_total", "counter", "LLM cost per graph node, from LLM_PROMPT_PRICE_PER_MILLION and LLM_COMPLETION_PRICE_PER_MILLION.")
+metrics.define("http_responses_total", "counter", "HTTP responses per external service and status code.")
+metrics.define("http_retries_total", "counter", "HTTP retries per external service.")
+metrics.define("blog_post_tokens", "histogram", "LLM tokens used to generate one blog post.", TOKEN_BUCKETS)
+metrics.define("blog_post_cost_dollars", "histogram", "LLM cost of one blog post.", COST_BUCKETS)
+
+current_span = contextvars.ContextVar("current_span", default=None)
+trace_lock = threading.Lock()
+trace_file = None
+
+
+def llm_cost(prompt_tokens, completion_tokens):
+    return (prompt_tokens * LLM_PROMPT_PRICE + completion_tokens * LLM_COMPLETION_PRICE) / 1_000_000
+
+
+class Span:
+    """
+    A timed operation, such as a graph node or an HTTP request, with its attributes and the
+    LLM tokens used within it. Spans started inside another span are its children and share
+    its trace id.
+    """
+
+    def __init__(self, kind, name, parent=None, attributes=None):
+        self.kind = kind
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else os.urandom(8).hex()
+        self.span_id = os.urandom(8).hex()
+        self.attributes = attributes or {}
+        self.status = "ok"
+        self.error = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error):
+        self.status = "error"
+        self.error = str(error)
+
+    def add_tokens(self, prompt_tokens, completion_tokens):
+        # Counted on the span and every enclosing span, so a run adds up the tokens of its nodes
+        span = self
+        while span is not None:
+            span.prompt_tokens += prompt_tokens
+            span.completion_tokens += completion_tokens
+            span = span.parent
+
+    def usage(self):
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": llm_cost(self.prompt_tokens, self.completion_tokens),
+        }
+
+    def finish(self):
+        seconds = time.perf_counter() - self.started
+        metrics.observe("span_duration_seconds", seconds, kind=self.kind, name=self.name, status=self.status)
+
+        if self.kind in RUN_KINDS and self.prompt_tokens + self.completion_tokens:
+            metrics.observe("blog_post_tokens", self.prompt_tokens + self.completion_tokens, kind=self.kind)
+            if LLM_PROMPT_PRICE or LLM_COMPLETION_PRICE:
+                metrics.observe("blog_post_cost_dollars", llm_cost(self.prompt_tokens, self.completion_tokens), kind=self.kind)
+
+        if TELEMETRY_MODE == "trace":
+            write_trace({
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent.span_id if self.parent else None,
+                "kind": self.kind,
+                "name": self.name,
+                "start": self.started_at,
+                "seconds": seconds,
+                "status": self.status,
+                "error": self.error,
+                "attributes": self.attributes,
+                **(self.usage() if self.prompt_tokens + self.completion_tokens else {}),
+            })
+
+
+class NoSpan:
+    """
+    Stands in for a span when telemetry is off.
+    """
+
+    def set(self, **attributes):
+        pass
+
+    def fail(self, error):
+        pass
+
+    def add_tokens(self, prompt_tokens, completion_tokens):
+        pass
+
+    def usage(self):
+        return None
+
+
+no_span = NoSpan()
+
+
+def write_trace(record):
+    global trace_file
+
+    line = json.dumps(record, default=str) + "\n"
+    with trace_lock:
+        if trace_file is None:
+            directory = os.path.dirname(TRACE_PATH)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            trace_file = open(TRACE_PATH, "a", buffering=1)
+        trace_file.write(line)
+
+
+@contextmanager
+def span(kind, name, **attributes):
+    """
+    Times the enclosed block as a span of the given kind ("node", "http", "agent_run", "job")
+    and name. The span is marked as failed if the block raises.
+
+    Yields:
+    Span: The span, to add attributes with set() or mark it as failed with fail().
+    """
+
+    if TELEMETRY_MODE == "off":
+        yield no_span
+        return
+
+    current = Span(kind, name, current_span.get(), attributes)
+    token = current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(type(e).__name__ + (f": {e}" if str(e) else ""))
+        raise
+    finally:
+        current_span.reset(token)
+        current.finish()
+
+
+def traced(kind, name, function):
+    """
+    Wraps a sync or async function so every call is timed as a span. With telemetry off the
+    function is returned as is.
+    """
+
+    if TELEMETRY_MODE == "off":
+        return function
+
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            with span(kind, name):
+                return await function(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with span(kind, name):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def record_llm_call(node, prompt_tokens, completion_tokens, source):
+    """
+    Counts one LLM call of a graph node and adds its tokens to the enclosing spans.
+    Cached responses cost nothing, so their tokens are counted apart and not added to spans.
+    """
+
+    if TELEMETRY_MODE == "off":
+        return
+
+    cached = source == "cache"
+    metrics.inc("llm_calls_total", node=node, cached=str(cached).lower())
+    metrics.inc("llm_tokens_total", prompt_tokens, node=node, type="prompt", source=source)
+    metrics.inc("llm_tokens_total", completion_tokens, node=node, type="completion", source=source)
+
+    if cached:
+        return
+
+    if LLM_PROMPT_PRICE or LLM_COMPLETION_PRICE:
+        metrics.inc("llm_cost_dollars_total", llm_cost(prompt_tokens, completion_tokens), node=node)
+
+    parent = current_span.get()
+    if parent is not None:
+        parent.add_tokens(prompt_tokens, completion_tokens)
+
+
+def record_http_response(service, response):
+    """
+    Counts a response of an external service and the retries urllib3 made to get it.
+    """
+
+    if TELEMETRY_MODE == "off":
+        return 0
+
+    metrics.inc("http_responses_total", service=service, code=response.status_code)
+
+    retries = getattr(response.raw, "retries", None)
+    retry_count = len(retries.history) if retries is not None else 0
+    if retry_count:
+        metrics.inc("http_retries_total", retry_count, service=service)
+    return retry_count
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+import blog_agent
+
+
+async def collect(results):
+    return [result async for result in results]
+
+
+def test_meetings_without_a_transcript_are_not_run(monkeypatch):
+    monkeypatch.setattr(blog_agent, "iter_transcripts", lambda ids: iter([
+        ("empty", {"sentences": [], "summary": {}}),
+        ("failed", {"sentences": [], "summary": {}, "error": "Failed to fetch the meeting: Object not found"}),
+    ]))
+
+    async def arun_agent(state, meeting_id):
+        raise AssertionError("The agent ran without a transcript or summary")
+
+    monkeypatch.setattr(blog_agent, "arun_agent", arun_agent)
+
+    results = asyncio.run(collect(blog_agent.process_meetings(["empty", "failed"], platforms=[])))
+
+    assert {result["meeting_id"]: (result["agent_response"], result["error"]) for result in results} == {
+        "empty": (None, blog_agent.NO_TRANSCRIPT),
+        "failed": (None, "Failed to fetch the meeting: Object not found"),
+    }
+
+
+def platform_graph(checkpointer):
+    from langgraph.graph import END, StateGraph
+
+    def write(state):
+        return {"platform_posts": {platform: f"{platform} post" for platform in state["platforms"]}}
+
+    def publish(state):
+        if state["platforms"] == ["x"]:
+            raise blog_agent.NodeError("The LLM call timed out")
+        return {}
+
+    graph_builder = StateGraph(blog_agent.State)
+    graph_builder.add_node("write", write)
+    graph_builder.add_node("publish", publish)
+    graph_builder.add_edge("write", "publish")
+    graph_builder.add_edge("publish", END)
+    graph_builder.set_entry_point("write")
+    return graph_builder.compile(checkpointer=checkpointer)
+
+
+def test_new_run_does_not_keep_the_posts_of_an_unfinished_run(monkeypatch, tmp_path):
+    from checkpoints import MeetingCheckpointer
+
+    checkpointer = MeetingCheckpointer(str(tmp_path / "checkpoints.db"))
+    agent = platform_graph(checkpointer)
+    monkeypatch.setattr(blog_agent, "checkpointer", checkpointer)
+    monkeypatch.setattr(blog_agent, "get_agent", lambda profile=None: agent)
+
+    with pytest.raises(blog_agent.NodeError):
+        blog_agent.run_agent(blog_agent.initial_state({}, "Ada: Hello", platforms=["x"]), "meeting")
+
+    result = blog_agent.run_agent(blog_agent.initial_state({}, "Ada: Hello", platforms=["linkedin"]), "meeting")
+    assert result["platform_posts"] == {"linkedin": "linkedin post"}
@@ -0,0 +1,119 @@
+import functools
+import json
+
+import pytest
+import requests
+
+import fireflies
+from fireflies_queries import batch_transcript_ids
+from transcript_store import TranscriptStore
+
+
+def transcript(transcript_id):
+    return {
+        "id": transcript_id,
+        "sentences": [{"raw_text": f"Hello from {transcript_id}.", "speaker_name": "Alice", "speaker_id": 0}],
+        "summary": {"overview": f"Overview of {transcript_id}"},
+    }
+
+
+class Response:
+    def __init__(self, body):
+        self.body = body
+        self.text = body.decode("utf-8", "replace")
+        self.status_code = 200
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), 16):
+            yield self.body[start:start + 16]
+
+
+class FakeFireflies:
+    """
+    Answers batched transcript queries: unknown ids come back null with a GraphQL error,
+    batches containing a failing id raise the given exception, and the responses of batches
+    containing a truncated id break off after that transcript.
+    """
+
+    def __init__(self, known, failing=(), error=None, truncated=()):
+        self.known = set(known)
+        self.failing = set(failing)
+        self.error = error
+        self.truncated = set(truncated)
+
+    def post(self, url, headers=None, json=None, stream=False):
+        variables = json["variables"]
+        if self.failing & set(variables.values()):
+            raise self.error
+
+        data = {alias: transcript(transcript_id) if transcript_id in self.known else None
+                for alias, transcript_id in variables.items()}
+        errors = [{"message": "Object not found", "path": [alias]}
+                  for alias, transcript_id in variables.items() if transcript_id not in self.known]
+        body = dumps({"errors": errors, "data": data} if errors else {"data": data})
+        for transcript_id in self.truncated & set(variables.values()):
+            body = body[:body.index(dumps(transcript(transcript_id))) + len(dumps(transcript(transcript_id)))]
+        return Response(body)
+
+
+def dumps(value):
+    return json.dumps(value).encode("utf-8")
+
+
+@pytest.fixture
+def fake_fireflies(tmp_path, monkeypatch):
+    monkeypatch.setattr(fireflies, "transcript_store", TranscriptStore(path=str(tmp_path / "store.db")))
+    monkeypatch.setattr(fireflies, "batch_transcript_ids", functools.partial(batch_transcript_ids, batch_size=2))
+
+    def install(session):
+        monkeypatch.setattr(fireflies, "fireflies_session", session)
+        return session
+
+    return install
+
+
+def test_an_unknown_meeting_does_not_blank_the_others(fake_fireflies):
+    fake_fireflies(FakeFireflies(known=["good1", "good2", "good3"]))
+
+    transcripts = fireflies.fetch_transcripts(["good1", "bad", "good2", "good3"])
+
+    assert {transcript_id: bool(value["sentences"]) for transcript_id, value in transcripts.items()} == {
+        "good1": True, "bad": False, "good2": True, "good3": True
+    }
+    assert transcripts["good2"]["summary"] == {"overview": "Overview of good2"}
+    assert transcripts["bad"]["error"] == "Failed to fetch the meeting: Object not found"
+    assert "error" not in transcripts["good1"]
+
+
+def test_a_failed_batch_only_loses_its_own_meetings(fake_fireflies):
+    error = requests.exceptions.ConnectionError("connection reset")
+    fake_fireflies(FakeFireflies(known=["a", "b", "c", "d"], failing=["c"], error=error))
+
+    transcripts = fireflies.fetch_transcripts(["a", "b", "c", "d"])
+
+    assert {transcript_id: bool(value["sentences"]) for transcript_id, value in transcripts.items()} == {
+        "a": True, "b": True, "c": False, "d": False
+    }
+    assert "connection reset" in transcripts["c"]["error"]
+
+
+def test_a_response_that_breaks_off_keeps_what_arrived(fake_fireflies):
+    fake_fireflies(FakeFireflies(known=["a", "b", "c", "d"], truncated=["a"]))
+
+    transcripts = fireflies.fetch_transcripts(["a", "b", "c", "d"])
+
+    assert {transcript_id: bool(value["sentences"]) for transcript_id, value in transcripts.items()} == {
+        "a": True, "b": False, "c": True, "d": True
+    }
+    assert "invalid response" in transcripts["b"]["error"]
+    # Failed meetings are not cached, so the next fetch asks Fireflies again
+    assert fireflies.get_transcript_store().get_transcripts(["b"], lambda ids: [("b", transcript("b"))])["b"]["sentences"]
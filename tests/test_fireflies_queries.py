@@ -0,0 +1,23 @@
+from fireflies_queries import batch_transcript_ids, build_transcripts_query
+
+
+def test_one_aliased_field_per_transcript():
+    data, aliases = build_transcripts_query(["abc", "def"])
+
+    assert aliases == {"t0": "abc", "t1": "def"}
+    assert data["variables"] == {"t0": "abc", "t1": "def"}
+    assert "$t0: String!, $t1: String!" in data["query"]
+    assert "t1: transcript(id: $t1)" in data["query"]
+    assert "sentences" in data["query"] and "summary" in data["query"]
+
+
+def test_fields_can_be_left_out():
+    data, _ = build_transcripts_query(["abc"], include_sentences=False)
+
+    assert "sentences" not in data["query"]
+    assert "summary" in data["query"]
+
+
+def test_batches_drop_duplicates_and_keep_order():
+    assert batch_transcript_ids(["a", "b", "a", "c", "d", "b", "e"], batch_size=2) == [["a", "b"], ["c", "d"], ["e"]]
+    assert batch_transcript_ids([]) == []
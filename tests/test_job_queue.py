@@ -0,0 +1,22 @@
+import asyncio
+
+import job_queue
+import mcp_logic
+from job_queue import FAILED, Job, JobQueue
+
+
+def test_a_meeting_without_a_transcript_fails_and_is_not_published(monkeypatch):
+    monkeypatch.setattr(mcp_logic, "fetch_transcripts", lambda ids: {
+        transcript_id: {"sentences": [], "summary": {}} for transcript_id in ids
+    })
+
+    def get_publish_queue():
+        raise AssertionError("A meeting without a transcript was published")
+
+    monkeypatch.setattr(job_queue, "get_publish_queue", get_publish_queue)
+    job = Job("meeting")
+
+    asyncio.run(JobQueue().run(job))
+
+    assert job.status == FAILED
+    assert job.error == mcp_logic.NO_TRANSCRIPT
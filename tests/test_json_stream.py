@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from json_stream import iter_json_members
+
+RESPONSE = {
+    "data": {
+        "t0": {"id": "a", "sentences": [{"raw_text": "Hej då, ünïcode €", "speaker_name": "Åsa"}]},
+        "t1": None,
+        "t2": {"id": "c", "count": 12345},
+    },
+    "errors": [{"message": "Object not found"}],
+}
+
+
+def chunked(text, size):
+    data = text.encode("utf-8")
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 10 ** 6])
+def test_members_are_the_same_for_any_chunk_size(size):
+    errors = {}
+
+    members = list(iter_json_members(chunked(json.dumps(RESPONSE, ensure_ascii=False), size), "data", errors))
+
+    assert members == list(RESPONSE["data"].items())
+    assert errors == {"errors": RESPONSE["errors"]}
+
+
+def test_number_split_across_chunks():
+    assert list(iter_json_members(['{"data": {"n": 12', '345}}'], "data")) == [("n", 12345)]
+
+
+def test_missing_or_null_field():
+    other = {}
+
+    assert list(iter_json_members(['{"data": null, "errors": []}'], "data", other)) == []
+    assert other == {"data": None, "errors": []}
+
+
+def test_truncated_stream_is_an_error():
+    with pytest.raises(ValueError):
+        list(iter_json_members(['{"data": {"t0": {"id": "a"'], "data"))
@@ -0,0 +1,33 @@
+import asyncio
+
+import mcp_logic
+
+
+def empty_fetch(transcript_ids):
+    return {transcript_id: {"sentences": [], "summary": {}, "error": "Failed to fetch the meeting: Object not found"}
+            for transcript_id in transcript_ids}
+
+
+def run_agent_must_not_be_called(*args, **kwargs):
+    raise AssertionError("The agent ran without a transcript or summary")
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def test_stream_fails_without_a_transcript_or_summary(monkeypatch):
+    monkeypatch.setattr(mcp_logic, "fetch_transcripts", empty_fetch)
+    monkeypatch.setattr(mcp_logic, "astream_agent", run_agent_must_not_be_called)
+
+    events = asyncio.run(collect(mcp_logic.stream_blog_post("meeting")))
+
+    assert events == [{"event": "error", "data": {"message": "Failed to fetch the meeting: Object not found"}}]
+
+
+def test_generate_fails_without_a_transcript_or_summary(monkeypatch):
+    monkeypatch.setattr(mcp_logic, "fetch_transcripts", empty_fetch)
+    monkeypatch.setattr(mcp_logic, "run_agent", run_agent_must_not_be_called)
+
+    assert mcp_logic.generate_blog_post("meeting") == {"error": "Failed to fetch the meeting: Object not found"}
+    assert mcp_logic.generate_blog_post("meeting", [], {}) == {"error": mcp_logic.NO_TRANSCRIPT}
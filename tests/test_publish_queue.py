@@ -0,0 +1,157 @@
+import itertools
+from datetime import datetime
+
+import pytest
+
+import publish_queue
+from publish_queue import PENDING, PublishQueue, calendar_slots, publish_calendar, to_utc
+
+BLOG_POST = "A Title\n\nThe body of the post."
+
+
+def first_slots(start, count, **kwargs):
+    return list(itertools.islice(calendar_slots(start, **kwargs), count))
+
+
+def test_calendar_skips_days_off_and_past_times():
+    # Friday 2025-04-04, 10:00 UTC
+    slots = first_slots(datetime(2025, 4, 4, 10), 3, days="mon,fri", times="15:00,09:00", zone="UTC")
+
+    assert slots == [datetime(2025, 4, 4, 15), datetime(2025, 4, 7, 9), datetime(2025, 4, 7, 15)]
+
+
+def test_calendar_times_are_in_its_time_zone():
+    # Stockholm is UTC+1 before the switch to summer time on 2025-03-30 and UTC+2 after
+    slots = first_slots(datetime(2025, 3, 28, 0), 2, days="fri,mon", times="09:00", zone="Europe/Stockholm")
+
+    assert slots == [datetime(2025, 3, 28, 8), datetime(2025, 3, 31, 7)]
+
+
+def test_invalid_calendar():
+    with pytest.raises(ValueError):
+        publish_calendar("mon,someday", "09:00")
+    with pytest.raises(ValueError):
+        publish_calendar("mon", "9 o'clock")
+
+
+def test_dates_are_converted_to_utc():
+    assert to_utc("2025-04-02T09:00:00+02:00", zone="UTC") == datetime(2025, 4, 2, 7)
+    assert to_utc("2025-04-02T09:00:00Z", zone="Europe/Stockholm") == datetime(2025, 4, 2, 9)
+    assert to_utc("2025-04-02T09:00:00", zone="Europe/Stockholm") == datetime(2025, 4, 2, 7)
+
+
+def test_future_posts_get_the_next_free_slots(tmp_path, monkeypatch):
+    monkeypatch.setattr(publish_queue, "PUBLISH_TIMEZONE", "UTC")
+    queue = PublishQueue(str(tmp_path / "queue.db"))
+    start = "2025-04-04T10:00:00Z"  # A Friday, after the 09:00 slot
+
+    keys = [queue.enqueue(f"meeting-{index}", BLOG_POST, "future", start=start) for index in range(3)]
+    # Queuing a post again keeps the slot it was given
+    keys.append(queue.enqueue("meeting-0", BLOG_POST, "future", start=start))
+
+    results = queue.results(keys)
+    assert [results[key]["scheduled_at"] for key in keys] == [
+        "2025-04-07T09:00:00", "2025-04-08T09:00:00", "2025-04-09T09:00:00", "2025-04-07T09:00:00"
+    ]
+
+
+def test_explicit_dates_are_stored_in_utc(tmp_path):
+    queue = PublishQueue(str(tmp_path / "queue.db"))
+
+    key = queue.enqueue("meeting", BLOG_POST, "future", "2025-04-02T09:00:00+02:00")
+
+    assert queue.results([key])[key]["scheduled_at"] == "2025-04-02T07:00:00"
+
+
+class Response:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        raise ValueError("not JSON")
+
+
+def test_non_json_response_is_retried(tmp_path, monkeypatch):
+    queue = PublishQueue(str(tmp_path / "queue.db"))
+    monkeypatch.setattr(publish_queue, "post_to_wordpress", lambda *args: Response(201, "<html>"))
+
+    created, error, transient = queue.create({"title": "", "content": "", "status": "draft", "scheduled_at": None, "slug": "s", "post_id": None})
+
+    assert created is None and transient
+    assert "not JSON" in error
+
+
+def test_leases_are_released_when_publishing_fails(tmp_path, monkeypatch):
+    queue = PublishQueue(str(tmp_path / "queue.db"))
+    key = queue.enqueue("meeting", BLOG_POST, "draft")
+
+    def find_posts(slugs):
+        raise RuntimeError("unexpected")
+
+    monkeypatch.setattr(publish_queue, "find_posts", find_posts)
+    with pytest.raises(RuntimeError):
+        queue.publish([key])
+
+    assert [post["key"] for post in queue.lease([key])] == [key]
+    assert queue.results([key])[key]["state"] == PENDING
+
+
+class JSONResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+
+class FakeWordPress:
+    def __init__(self):
+        self.posts = {}
+
+    def find_posts(self, slugs):
+        slugs = set(slugs)
+        return {post["slug"]: post for post in self.posts.values() if post["slug"] in slugs}
+
+    def post_to_wordpress(self, title, content, status, scheduled_time, slug):
+        post = {"id": len(self.posts) + 1, "slug": slug, "status": status, "date_gmt": scheduled_time}
+        self.posts[post["id"]] = post
+        return JSONResponse(201, dict(post))
+
+    def update_post(self, post_id, status, scheduled_time=None):
+        self.posts[post_id].update(status=status, date_gmt=scheduled_time)
+        return JSONResponse(200, dict(self.posts[post_id]))
+
+
+@pytest.fixture
+def wordpress(monkeypatch):
+    fake = FakeWordPress()
+    for name in ("find_posts", "post_to_wordpress", "update_post"):
+        monkeypatch.setattr(publish_queue, name, getattr(fake, name))
+    return fake
+
+
+def test_a_draft_is_published_by_updating_the_existing_post(tmp_path, wordpress):
+    queue = PublishQueue(str(tmp_path / "queue.db"))
+
+    draft = queue.publish_post("meeting", BLOG_POST, "draft")
+    published = queue.publish_post("meeting", BLOG_POST, "publish")
+
+    assert (draft["outcome"], published["outcome"]) == ("created", "updated")
+    assert published["status"] == "publish"
+    assert list(wordpress.posts.values()) == [
+        {"id": 1, "slug": draft["wordpress_post"]["slug"], "status": "publish", "date_gmt": None}
+    ]
+
+
+def test_a_published_post_is_not_moved_back_to_draft(tmp_path, wordpress):
+    queue = PublishQueue(str(tmp_path / "queue.db"))
+    queue.publish_post("meeting", BLOG_POST, "publish")
+
+    again = queue.publish_post("meeting", BLOG_POST, "draft")
+
+    assert again["outcome"] == "skipped"
+    assert again["status"] == "publish"
+    assert wordpress.posts[1]["status"] == "publish"
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+
+from rate_limits import BucketStore, RateLimiter
+
+
+def test_a_limiter_without_quotas_is_off():
+    limiter = RateLimiter("provider")
+
+    assert not limiter.enabled
+    assert limiter.acquire(10 ** 6, blocking=False)
+
+
+def test_requests_beyond_the_quota_are_not_allowed(tmp_path):
+    limiter = RateLimiter("provider", requests_per_minute=2, store=BucketStore(str(tmp_path / "limits.db")))
+
+    assert limiter.acquire(blocking=False)
+    assert limiter.acquire(blocking=False)
+    assert not limiter.acquire(blocking=False)
+
+
+def test_tokens_are_given_back_when_settled(tmp_path):
+    limiter = RateLimiter("provider", tokens_per_minute=1000, store=BucketStore(str(tmp_path / "limits.db")))
+
+    assert limiter.acquire(900, blocking=False)
+    assert not limiter.acquire(900, blocking=False)
+    limiter.settle(900, 100)
+    assert limiter.acquire(900, blocking=False)
+
+
+def test_async_acquire_takes_from_the_buckets_off_the_event_loop(tmp_path, monkeypatch):
+    limiter = RateLimiter("provider", requests_per_minute=60, store=BucketStore(str(tmp_path / "limits.db")))
+    threads = []
+    try_take = limiter.try_take
+
+    def recording_try_take(ticket, tokens):
+        threads.append(threading.get_ident())
+        return try_take(ticket, tokens)
+
+    monkeypatch.setattr(limiter, "try_take", recording_try_take)
+
+    assert asyncio.run(limiter.aacquire(key="meeting"))
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,74 @@
+from redaction import Redactor, speaker_names, transcript_speaker_names
+
+
+def test_speaker_names_become_stable_roles():
+    redactor = Redactor(["Alice Johnson", "Bob Smith"])
+
+    text = redactor.redact("Alice Johnson asked Bob Smith, then alice johnson agreed with Bob.")
+
+    assert text == "Participant 1 asked Participant 2, then Participant 1 agreed with Participant 2."
+
+
+def test_name_parts_that_are_ordinary_words_are_kept():
+    redactor = Redactor(["Will Turner", "Mark Lee", "Grace Hopper"])
+
+    text = redactor.redact("We will ship it. Leave a mark, by grace of god. Will and Grace agreed.")
+
+    assert text == "We will ship it. Leave a mark, by grace of god. Participant 1 and Participant 3 agreed."
+
+
+def test_single_word_names_are_only_matched_capitalized():
+    redactor = Redactor(["Will"])
+
+    assert redactor.redact("Will said we will see.") == "Participant 1 said we will see."
+
+
+def test_shared_name_parts_are_ambiguous():
+    redactor = Redactor(["Anna Berg", "Anna Lind"])
+
+    assert redactor.redact("Anna and Berg") == "a participant and Participant 1"
+
+
+def test_placeholder_speaker_names_are_left_alone():
+    redactor = Redactor(["Speaker 1", "Speaker 2", "Carol Diaz"])
+
+    assert redactor.speaker_roles == {"Carol Diaz": "Participant 1"}
+    assert redactor.redact("The speaker thanked Speaker 2 and Carol.") == "The speaker thanked Speaker 2 and Participant 1."
+
+
+def test_dictionary_terms_are_case_insensitive():
+    redactor = Redactor(dictionary={"Acme Corp": "a client"})
+
+    assert redactor.redact("We met ACME corp today.") == "We met a client today."
+
+
+def test_timestamps_are_not_phone_numbers():
+    redactor = Redactor()
+
+    assert redactor.redact("Meeting at 2025-04-11 10:00.") == "Meeting at 2025-04-11 10:00."
+    assert redactor.redact("From 2025-04-11 - 2025-04-12 09:30") == "From 2025-04-11 - 2025-04-12 09:30"
+
+
+def test_phone_numbers_emails_and_amounts_are_replaced():
+    redactor = Redactor()
+
+    text = redactor.redact("Call +46 70 123 45 67 on 2025-04-11 or mail a.b@example.com about $1,200.")
+
+    assert text == "Call [phone number] on 2025-04-11 or mail [email] about [amount]."
+
+
+def test_leaked_terms_finds_what_redact_replaces():
+    redactor = Redactor(["Alice Johnson"])
+
+    assert redactor.leaked_terms("Alice Johnson and alice met Alice.") == ["alice johnson", "alice"]
+    assert redactor.leaked_terms(redactor.redact("Alice Johnson met Alice.")) == []
+
+
+def test_transcript_speaker_names():
+    assert transcript_speaker_names("Alice: hi\nBob: hello\nAlice: bye") == ["Alice", "Bob"]
+
+
+def test_speaker_names():
+    sentences = [{"speaker_name": "Alice"}, {"speaker_name": "Bob"}, {"speaker_name": "Alice"}, {"speaker_name": None}]
+
+    assert speaker_names(sentences) == ["Alice", "Bob"]
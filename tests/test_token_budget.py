@@ -0,0 +1,81 @@
+import json
+import multiprocessing
+
+from token_budget import (
+    COMPRESSED, FULL, OVER_BUDGET, SUMMARY_ONLY, TokenBudget, compress_transcript, estimate_prompt_tokens, plan_transcript
+)
+from transcript_chunks import estimate_tokens
+
+SUMMARY = {"overview": "The team reviewed the release plan and the budget. " * 20}
+TRANSCRIPT = "\n".join(f"Speaker {index % 3}: we discussed the release plan and what comes next in detail" for index in range(400))
+
+
+def summary_tokens():
+    return estimate_prompt_tokens(SUMMARY)["total"]
+
+
+def test_full_transcript_without_a_limit():
+    plan = plan_transcript(SUMMARY, TRANSCRIPT, True, None)
+
+    assert plan["policy"] == FULL
+    assert plan["meeting_transcript"] == TRANSCRIPT
+
+
+def test_compressed_transcript_when_the_full_one_does_not_fit():
+    available = summary_tokens() + 1500
+
+    plan = plan_transcript(SUMMARY, TRANSCRIPT, True, available)
+
+    assert plan["policy"] == COMPRESSED
+    assert plan["estimates"]["total"] <= available
+
+
+def test_summary_only_when_no_transcript_fits():
+    plan = plan_transcript(SUMMARY, TRANSCRIPT, True, summary_tokens() + 100)
+
+    assert plan["policy"] == SUMMARY_ONLY
+    assert not plan["include_transcript"]
+
+
+def test_over_budget_when_not_even_the_summary_fits():
+    assert plan_transcript(SUMMARY, TRANSCRIPT, True, summary_tokens() - 1)["policy"] == OVER_BUDGET
+    assert plan_transcript(SUMMARY, None, False, 0)["policy"] == OVER_BUDGET
+
+
+def test_daily_budget_is_never_exceeded(tmp_path):
+    ledger_path = str(tmp_path / "token_usage.json")
+    per_day = 2 * summary_tokens() + 500
+    budget = TokenBudget(per_day=per_day, ledger_path=ledger_path)
+
+    plans = [budget.plan(SUMMARY, TRANSCRIPT, True) for _ in range(4)]
+
+    assert [plan["policy"] for plan in plans][-1] == OVER_BUDGET
+    with open(ledger_path) as file:
+        spent = sum(json.load(file).values())
+    assert spent <= per_day
+    assert spent == sum(plan["estimates"]["total"] for plan in plans if plan["policy"] != OVER_BUDGET)
+
+
+def plan_in_process(ledger_path, count):
+    budget = TokenBudget(per_day=10 ** 9, ledger_path=ledger_path)
+    for _ in range(count):
+        budget.plan(SUMMARY, None, False)
+
+
+def test_ledger_updates_from_several_processes_are_not_lost(tmp_path):
+    ledger_path = str(tmp_path / "token_usage.json")
+    processes = [multiprocessing.Process(target=plan_in_process, args=(ledger_path, 20)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    with open(ledger_path) as file:
+        assert sum(json.load(file).values()) == 80 * summary_tokens()
+
+
+def test_compress_transcript_fits_the_target():
+    compressed = compress_transcript(TRANSCRIPT, 800)
+
+    assert estimate_tokens(compressed) <= 800
+    assert compressed.splitlines()[0].startswith("Speaker 0: ")
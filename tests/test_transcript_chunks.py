@@ -0,0 +1,41 @@
+from transcript_chunks import estimate_tokens, split_transcript, split_turn
+
+TRANSCRIPT = "\n".join(
+    f"Speaker {index % 3}: This is sentence one of turn {index}. And here is a second, longer sentence about the plan."
+    for index in range(60)
+)
+
+
+def test_chunks_stay_within_the_token_limit():
+    chunks = split_transcript(TRANSCRIPT, max_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+
+
+def test_chunks_are_cut_at_turn_boundaries():
+    chunks = split_transcript(TRANSCRIPT, max_tokens=200)
+
+    assert "\n".join(chunks) == TRANSCRIPT
+
+
+def test_short_transcript_is_one_chunk():
+    assert split_transcript("Alice: hi\nBob: hello", max_tokens=200) == ["Alice: hi\nBob: hello"]
+
+
+def test_long_turn_is_split_and_keeps_its_speaker():
+    turn = "Alice: " + " ".join(f"Sentence number {index} is here." for index in range(100))
+
+    pieces = split_turn(turn, 50)
+
+    assert len(pieces) > 1
+    assert all(piece.startswith("Alice: ") and estimate_tokens(piece) <= 50 for piece in pieces)
+    assert " ".join(piece[len("Alice: "):] for piece in pieces) == turn[len("Alice: "):]
+
+
+def test_very_long_sentence_is_split_at_words():
+    turn = "Bob: " + " ".join(["word"] * 500)
+
+    chunks = split_transcript(turn, max_tokens=40)
+
+    assert all(chunk.startswith("Bob: ") and estimate_tokens(chunk) <= 40 for chunk in chunks)
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+from transcript_store import TranscriptStore
+
+
+def meeting(meeting_id, date_string):
+    return {"id": meeting_id, "title": meeting_id, "dateString": date_string}
+
+
+class FakeFireflies:
+    def __init__(self, meetings):
+        self.meetings = meetings
+        self.calls = []
+
+    def load_meetings(self, from_timestamp, to_timestamp):
+        self.calls.append((from_timestamp[:10], to_timestamp[:10]))
+        start = datetime.fromisoformat(from_timestamp.replace("Z", "+00:00"))
+        end = datetime.fromisoformat(to_timestamp.replace("Z", "+00:00"))
+        return [
+            item for item in self.meetings
+            if start <= datetime.fromisoformat(item["dateString"].replace("Z", "+00:00")) <= end
+        ]
+
+
+def test_repeated_range_is_answered_locally(tmp_path):
+    fireflies = FakeFireflies([meeting("a", "2025-01-05T10:00:00Z")])
+    store = TranscriptStore(path=str(tmp_path / "store.db"))
+
+    first = store.list_meetings("2025-01-01T00:00:00Z", "2025-01-31T00:00:00Z", fireflies.load_meetings)
+    second = store.list_meetings("2025-01-10T00:00:00Z", "2025-01-20T00:00:00Z", fireflies.load_meetings)
+
+    assert [item["id"] for item in first] == ["a"]
+    assert second == []
+    assert len(fireflies.calls) == 1
+
+
+def test_disjoint_ranges_are_both_kept(tmp_path):
+    fireflies = FakeFireflies([meeting("jan", "2025-01-05T10:00:00Z"), meeting("mar", "2025-03-05T10:00:00Z")])
+    store = TranscriptStore(path=str(tmp_path / "store.db"))
+
+    store.list_meetings("2025-01-01T00:00:00Z", "2025-01-31T00:00:00Z", fireflies.load_meetings)
+    store.list_meetings("2025-03-01T00:00:00Z", "2025-03-31T00:00:00Z", fireflies.load_meetings)
+    store.list_meetings("2025-01-01T00:00:00Z", "2025-01-31T00:00:00Z", fireflies.load_meetings)
+
+    assert len(fireflies.calls) == 2
+    assert len(store.synced_ranges()) == 2
+
+
+def test_only_the_gaps_between_listed_ranges_are_requested(tmp_path):
+    fireflies = FakeFireflies([meeting("jan", "2025-01-05T10:00:00Z"), meeting("feb", "2025-02-05T10:00:00Z")])
+    store = TranscriptStore(path=str(tmp_path / "store.db"))
+    store.list_meetings("2025-01-01T00:00:00Z", "2025-01-31T00:00:00Z", fireflies.load_meetings)
+    store.list_meetings("2025-03-01T00:00:00Z", "2025-03-31T00:00:00Z", fireflies.load_meetings)
+
+    meetings = store.list_meetings("2025-01-01T00:00:00Z", "2025-03-31T00:00:00Z", fireflies.load_meetings)
+
+    assert [item["id"] for item in meetings] == ["feb", "jan"]
+    # The gap is requested from the newest meeting stored before it
+    assert fireflies.calls[2:] == [("2025-01-05", "2025-03-01")]
+    assert store.synced_ranges() == [("2025-01-01T00:00:00.000000Z", "2025-03-31T00:00:00.000000Z")]
+
+
+def test_recent_meetings_are_listed_again(tmp_path):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    from_timestamp = (now - timedelta(days=2)).isoformat() + "Z"
+    to_timestamp = now.isoformat() + "Z"
+    fireflies = FakeFireflies([meeting("old", (now - timedelta(days=1)).isoformat() + "Z")])
+    store = TranscriptStore(path=str(tmp_path / "store.db"), max_age=3600)
+
+    store.list_meetings(from_timestamp, to_timestamp, fireflies.load_meetings)
+    # A transcript of a recent meeting shows up after the first listing
+    fireflies.meetings.append(meeting("late", (now - timedelta(minutes=5)).isoformat() + "Z"))
+    meetings = store.list_meetings(from_timestamp, to_timestamp, fireflies.load_meetings)
+
+    assert [item["id"] for item in meetings] == ["late", "old"]
+
+
+def test_recent_meetings_are_listed_again_without_max_age(tmp_path):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    from_timestamp = (now - timedelta(days=7)).isoformat() + "Z"
+    to_timestamp = now.isoformat() + "Z"
+    fireflies = FakeFireflies([meeting("old", (now - timedelta(days=5)).isoformat() + "Z")])
+    store = TranscriptStore(path=str(tmp_path / "store.db"))
+
+    store.list_meetings(from_timestamp, to_timestamp, fireflies.load_meetings)
+    # Fireflies finishes the transcript of yesterday's meeting after the first listing
+    fireflies.meetings.append(meeting("late", (now - timedelta(days=1)).isoformat() + "Z"))
+    meetings = store.list_meetings(from_timestamp, to_timestamp, fireflies.load_meetings)
+
+    assert [item["id"] for item in meetings] == ["late", "old"]
+    # Only the part after the meetings that were already listed is requested again
+    assert fireflies.calls[1][0] == fireflies.meetings[0]["dateString"][:10]
+
+
+def test_listings_expire(tmp_path):
+    fireflies = FakeFireflies([meeting("a", "2025-01-05T10:00:00Z")])
+    store = TranscriptStore(path=str(tmp_path / "store.db"), max_age=3600)
+    store.list_meetings("2025-01-01T00:00:00Z", "2025-01-31T00:00:00Z", fireflies.load_meetings)
+
+    store.max_age = -1
+    store.list_meetings("2025-01-01T00:00:00Z", "2025-01-31T00:00:00Z", fireflies.load_meetings)
+
+    assert len(fireflies.calls) == 2
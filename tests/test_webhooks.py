@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from webhooks import TRANSCRIPTION_COMPLETED, completed_meeting_id, sign_payload, verify_signature
+
+SECRET = "webhook-secret"
+BODY = json.dumps({"meetingId": "meeting-1", "eventType": TRANSCRIPTION_COMPLETED}).encode("utf-8")
+
+
+def test_valid_signatures_are_accepted():
+    signature = sign_payload(BODY, SECRET)
+
+    assert verify_signature(BODY, signature, SECRET)
+    assert verify_signature(BODY, "sha256=" + signature, SECRET)
+
+
+def test_invalid_signatures_are_rejected():
+    signature = sign_payload(BODY, SECRET)
+
+    assert not verify_signature(BODY + b" ", signature, SECRET)
+    assert not verify_signature(BODY, sign_payload(BODY, "other-secret"), SECRET)
+    assert not verify_signature(BODY, None, SECRET)
+    assert not verify_signature(BODY, "", SECRET)
+
+
+def test_requests_are_rejected_without_a_secret():
+    assert not verify_signature(BODY, sign_payload(BODY, SECRET), None)
+
+
+def test_completed_meeting_id():
+    assert completed_meeting_id(BODY) == "meeting-1"
+    assert completed_meeting_id(json.dumps({"meetingId": "meeting-1", "eventType": "Other"})) is None
+    with pytest.raises(ValueError):
+        completed_meeting_id(json.dumps({"eventType": TRANSCRIPTION_COMPLETED}))
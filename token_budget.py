@@ -0,0 +1,247 @@
+import os
+import re
+import json
+import threading
+from contextlib import contextmanager
+from datetime import date
+
+try:
+    import fcntl
+except ImportError:  # Windows: the ledger is only locked within this process
+    fcntl = None
+
+from transcript_chunks import CHUNK_TOKENS, estimate_tokens, split_transcript
+
+# Approximate size of each node's instructions, excluding the meeting data inserted into them
+SUMMARIZER_PROMPT_TOKENS = 200
+CHUNK_PROMPT_TOKENS = 150
+REDUCE_PROMPT_TOKENS = 220
+ANONYMIZER_PROMPT_TOKENS = 230
+WRITER_PROMPT_TOKENS = 200
+
+# Typical length of the LLM outputs that are fed into the next node
+OVERVIEW_TOKENS = int(os.getenv("ESTIMATED_OVERVIEW_TOKENS", "700"))
+CHUNK_NOTES_TOKENS = int(os.getenv("ESTIMATED_CHUNK_NOTES_TOKENS", "300"))
+
+# Compressed transcripts are shortened to fit in a single summarizer call
+COMPRESSED_TRANSCRIPT_TOKENS = int(os.getenv("COMPRESSED_TRANSCRIPT_TOKENS", str(CHUNK_TOKENS)))
+MIN_COMPRESSED_TRANSCRIPT_TOKENS = 500
+
+TOKEN_LEDGER_PATH = os.getenv("TOKEN_LEDGER_PATH", "../output/token_usage.json")
+
+FULL = "full"
+COMPRESSED = "compressed"
+SUMMARY_ONLY = "summary_only"
+OVER_BUDGET = "over_budget"  # Not even the summary fits; the meeting must wait for more budget
+
+FILLER_WORDS = re.compile(r"\b(?:um+|uh+|erm|hmm+|you know|i mean|sort of|kind of)\b,?\s*", re.IGNORECASE)
+TRIVIAL_TURN_WORDS = 3
+
+
+def estimate_prompt_tokens(fireflies_summary, meeting_transcript=None):
+    """
+    Estimates the prompt tokens sent by each of the three nodes for one meeting.
+
+    Parameters:
+    fireflies_summary (dict): The Fireflies summary of the meeting.
+    meeting_transcript (str): The grouped transcript passed to the summarizer, or None for summary-only runs.
+
+    Returns:
+    dict: Estimated prompt tokens for "summarizer", "anonymizer" and "writer", and their "total".
+          Transcripts longer than one chunk are estimated as a map-reduce summarization.
+    """
+
+    summary_tokens = estimate_tokens(json.dumps(fireflies_summary))
+    summarizer_tokens = SUMMARIZER_PROMPT_TOKENS + summary_tokens
+
+    if meeting_transcript:
+        transcript_tokens = estimate_tokens(meeting_transcript)
+
+        if transcript_tokens <= CHUNK_TOKENS:
+            summarizer_tokens += transcript_tokens
+        else:
+            chunk_count = len(split_transcript(meeting_transcript, CHUNK_TOKENS))
+            summarizer_tokens = (
+                chunk_count * CHUNK_PROMPT_TOKENS + transcript_tokens
+                + REDUCE_PROMPT_TOKENS + summary_tokens + chunk_count * CHUNK_NOTES_TOKENS
+            )
+
+    estimates = {
+        "summarizer": summarizer_tokens,
+        "anonymizer": ANONYMIZER_PROMPT_TOKENS + OVERVIEW_TOKENS,
+        "writer": WRITER_PROMPT_TOKENS + OVERVIEW_TOKENS,
+    }
+    estimates["total"] = sum(estimates.values())
+
+    return estimates
+
+
+def compress_transcript(meeting_transcript, max_tokens):
+    """
+    Shortens a grouped transcript to about max_tokens without calling an LLM.
+
+    Filler words and turns of only a few words are dropped first. If the transcript is still
+    too long, every remaining turn keeps the same share of its leading words, so all speakers
+    and the order of the discussion are preserved.
+    """
+
+    turns = []
+    for turn in meeting_transcript.splitlines():
+        speaker, separator, text = turn.partition(": ")
+        text = FILLER_WORDS.sub("", text).strip() if separator else turn
+        if len(text.split()) > TRIVIAL_TURN_WORDS:
+            turns.append((f"{speaker}{separator}" if separator else "", text))
+
+    compressed = "\n".join(prefix + text for prefix, text in turns)
+    if estimate_tokens(compressed) <= max_tokens:
+        return compressed
+
+    # Speaker prefixes are kept whole, so only the text budget is shared between turns
+    prefix_tokens = sum(estimate_tokens(prefix) + 1 for prefix, text in turns)
+    text_tokens = sum(estimate_tokens(text) for prefix, text in turns)
+
+    if prefix_tokens >= max_tokens / 2:
+        # Too many turns to keep them all; keep evenly spaced turns instead
+        step = -(-2 * prefix_tokens // max_tokens)
+        turns = turns[::step]
+        prefix_tokens = sum(estimate_tokens(prefix) + 1 for prefix, text in turns)
+        text_tokens = sum(estimate_tokens(text) for prefix, text in turns)
+
+    # Leave room for the "..." markers added to shortened turns
+    ratio = min(1, 0.9 * (max_tokens - prefix_tokens) / max(1, text_tokens))
+    shortened = []
+    for prefix, text in turns:
+        words = text.split()
+        keep = max(1, int(len(words) * ratio))
+        shortened.append(prefix + " ".join(words[:keep]) + (" ..." if keep < len(words) else ""))
+
+    return "\n".join(shortened)
+
+
+class TokenBudget:
+    """
+    Chooses how much of each meeting transcript to send to the LLM so that a run stays within
+    a per-meeting and/or per-day token budget.
+
+    Tokens planned for a meeting are counted against the per-day budget, which is kept in a
+    small JSON ledger so that several runs on the same day share it. Plans can be requested
+    from several threads or tasks at once, and from several processes: the ledger is read
+    and updated under a file lock. Meetings that do not fit are planned as over_budget and
+    not counted.
+    """
+
+    def __init__(self, per_meeting=None, per_day=None, ledger_path=TOKEN_LEDGER_PATH):
+        self.per_meeting = per_meeting
+        self.per_day = per_day
+        self.ledger_path = ledger_path
+        self.lock = threading.Lock()
+
+    def read_ledger(self):
+        if not self.ledger_path or not os.path.exists(self.ledger_path):
+            return {}
+        with open(self.ledger_path) as file:
+            return json.load(file)
+
+    def write_ledger(self, ledger):
+        directory = os.path.dirname(self.ledger_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # Replaced in one step, so a reader never sees a half-written ledger
+        with open(self.ledger_path + ".tmp", 'w') as file:
+            json.dump(ledger, file, indent=2)
+        os.replace(self.ledger_path + ".tmp", self.ledger_path)
+
+    @contextmanager
+    def locked_ledger(self):
+        # Holds an exclusive lock on a file next to the ledger while it is read and updated
+        if fcntl is None or not self.ledger_path:
+            yield
+            return
+
+        directory = os.path.dirname(self.ledger_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.ledger_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def spent_today(self):
+        return self.read_ledger().get(date.today().isoformat(), 0)
+
+    def available(self):
+        """
+        Returns the number of tokens the next meeting may use, or None if there is no limit.
+        """
+
+        limits = []
+        if self.per_meeting is not None:
+            limits.append(self.per_meeting)
+        if self.per_day is not None:
+            limits.append(max(0, self.per_day - self.spent_today()))
+        return min(limits) if limits else None
+
+    def plan(self, fireflies_summary, meeting_transcript, include_transcript=True):
+        """
+        Picks the transcript policy for one meeting and reserves its estimated tokens.
+
+        The full transcript is used when it fits in the available budget, then a locally
+        compressed transcript, then only the Fireflies summary. If not even the summary fits,
+        the policy is over_budget: the meeting must not be run, and nothing is reserved.
+
+        Returns:
+        dict: "policy" (full, compressed, summary_only or over_budget), "include_transcript" and
+              "meeting_transcript" to put in the graph state, the per-node "estimates" of the
+              chosen policy and the "available" budget at the time of planning.
+        """
+
+        with self.lock, self.locked_ledger():
+            available = self.available()
+            plan = plan_transcript(fireflies_summary, meeting_transcript, include_transcript, available)
+
+            if self.per_day is not None and self.ledger_path and plan["policy"] != OVER_BUDGET:
+                ledger = self.read_ledger()
+                today = date.today().isoformat()
+                ledger[today] = ledger.get(today, 0) + plan["estimates"]["total"]
+                self.write_ledger(ledger)
+
+        return plan
+
+
+def plan_transcript(fireflies_summary, meeting_transcript, include_transcript=True, available=None):
+    """
+    Picks the transcript policy for one meeting given the available token budget (None for no limit).
+    See TokenBudget.plan for the returned dict. Returns the over_budget policy, with the
+    estimates of a summary-only run, when not even the summary fits.
+    """
+
+    def policy(name, transcript):
+        return {
+            "policy": name,
+            "include_transcript": name != SUMMARY_ONLY,
+            "meeting_transcript": meeting_transcript if name == SUMMARY_ONLY else transcript,
+            "estimates": estimate_prompt_tokens(fireflies_summary, transcript if name != SUMMARY_ONLY else None),
+            "available": available,
+        }
+
+    summary_only = policy(SUMMARY_ONLY, None)
+    if available is not None and summary_only["estimates"]["total"] > available:
+        return dict(summary_only, policy=OVER_BUDGET)
+
+    if not include_transcript or not meeting_transcript:
+        return summary_only
+
+    full = policy(FULL, meeting_transcript)
+    if available is None or full["estimates"]["total"] <= available:
+        return full
+
+    target = min(COMPRESSED_TRANSCRIPT_TOKENS, available - summary_only["estimates"]["total"])
+
+    if target >= MIN_COMPRESSED_TRANSCRIPT_TOKENS:
+        compressed = policy(COMPRESSED, compress_transcript(meeting_transcript, target))
+        if compressed["estimates"]["total"] <= available:
+            return compressed
+
+    return summary_only
@@ -0,0 +1,89 @@
+import os
+import re
+
+# Token budget of a single transcript chunk in map-reduce summarization.
+# llama3-70b-8192 has an 8192 token context, which has to fit the prompt, the chunk and the answer.
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+
+# Number of chunks summarized at the same time
+CHUNK_CONCURRENCY = int(os.getenv("SUMMARY_CHUNK_CONCURRENCY", "4"))
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """
+    Roughly estimates the number of LLM tokens in text (about four characters per token for English).
+    """
+
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def split_turn(turn, max_tokens):
+    """
+    Splits a single speaker turn that is longer than max_tokens at sentence boundaries,
+    falling back to word boundaries for very long sentences. Every piece keeps the
+    "Speaker: " prefix so it still reads as that speaker's turn.
+    """
+
+    speaker, separator, text = turn.partition(": ")
+    prefix = f"{speaker}{separator}" if separator else ""
+    budget = max(1, max_tokens - estimate_tokens(prefix))
+
+    pieces = []
+    current = []
+    current_tokens = 0
+
+    for sentence in re.split(r"(?<=[.!?])\s+", text if separator else turn):
+        words = [sentence] if estimate_tokens(sentence) <= budget else sentence.split()
+
+        for word in words:
+            word_tokens = estimate_tokens(word) + 1
+            if current and current_tokens + word_tokens > budget:
+                pieces.append(prefix + " ".join(current))
+                current, current_tokens = [], 0
+            current.append(word)
+            current_tokens += word_tokens
+
+    if current:
+        pieces.append(prefix + " ".join(current))
+
+    return pieces
+
+
+def split_transcript(meeting_transcript, max_tokens=CHUNK_TOKENS):
+    """
+    Splits a transcript produced by group_speaker_text into chunks of at most max_tokens.
+
+    Chunks are cut at speaker-turn boundaries (one turn per line). A turn that does not fit
+    in a chunk on its own is split further with split_turn.
+
+    Parameters:
+    meeting_transcript (str): The grouped transcript, one "Speaker: text" turn per line.
+    max_tokens (int): The estimated token budget of each chunk.
+
+    Returns:
+    list: The transcript chunks, in order.
+    """
+
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for turn in meeting_transcript.splitlines():
+        turn_tokens = estimate_tokens(turn) + 1
+
+        pieces = [turn] if turn_tokens <= max_tokens else split_turn(turn, max_tokens)
+
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece) + 1
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+
+    if current:
+        chunks.append("\n".join(current))
+
+    return chunks
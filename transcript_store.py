@@ -0,0 +1,285 @@
+import os
+import json
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+
+STORE_PATH = os.getenv("TRANSCRIPT_STORE_PATH", "../output/transcripts.db")
+
+# Cached sentences, summaries and meeting listings older than this are fetched again. Unset means they never expire.
+STORE_MAX_AGE = os.getenv("TRANSCRIPT_STORE_MAX_AGE")
+# The last part of every listing is always fetched again, since Fireflies may still be transcribing those meetings
+STORE_RESYNC_WINDOW = float(os.getenv("TRANSCRIPT_STORE_RESYNC_WINDOW", str(48 * 60 * 60)))
+
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def normalize_timestamp(timestamp):
+    """
+    Converts a Fireflies/ISO timestamp into a fixed-width UTC string so that timestamps
+    compare correctly as text, e.g. '2025-04-11T10:00:00Z' -> '2025-04-11T10:00:00.000000Z'.
+    """
+
+    parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime(TIMESTAMP_FORMAT)
+
+
+class TranscriptStore:
+    """
+    SQLite-backed local store of Fireflies transcripts keyed by transcript id.
+
+    The store holds meeting metadata, sentences and the Fireflies summary. It also remembers
+    which date ranges have already been listed, merged into disjoint ranges, so that repeated
+    and overlapping date-range queries are answered locally. Network access is left to the loader callables passed in
+    by the caller.
+    """
+
+    def __init__(self, path=STORE_PATH, max_age=STORE_MAX_AGE, resync_window=STORE_RESYNC_WINDOW):
+        self.path = path
+        self.max_age = float(max_age) if max_age else None
+        self.resync_window = resync_window
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with closing(self.connect()) as connection, connection:
+            connection.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    id TEXT PRIMARY KEY,
+                    date_string TEXT,
+                    metadata TEXT NOT NULL,
+                    sentences TEXT,
+                    sentences_fetched_at REAL,
+                    summary TEXT,
+                    summary_fetched_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS transcripts_date_string ON transcripts (date_string);
+                DROP TABLE IF EXISTS sync_state;
+                CREATE TABLE IF NOT EXISTS synced_ranges (
+                    synced_from TEXT NOT NULL,
+                    synced_to TEXT NOT NULL,
+                    synced_at REAL NOT NULL
+                );
+            """)
+
+    def connect(self):
+        # A connection per operation keeps the store safe to use from worker threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def synced_ranges(self):
+        """
+        Returns:
+        list: The disjoint (from, to) ranges already listed from Fireflies that have not expired, in order.
+        """
+
+        with closing(self.connect()) as connection:
+            rows = connection.execute(
+                "SELECT synced_from, synced_to FROM synced_ranges WHERE synced_at >= ? ORDER BY synced_from",
+                (self.expired_before(),)
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def expired_before(self):
+        return time.time() - self.max_age if self.max_age is not None else float("-inf")
+
+    def newest_date_string(self, from_timestamp, to_timestamp):
+        """
+        Returns the newest dateString stored between the given timestamps, or None.
+        """
+
+        with closing(self.connect()) as connection:
+            row = connection.execute(
+                "SELECT MAX(date_string) FROM transcripts WHERE date_string BETWEEN ? AND ?",
+                (from_timestamp, to_timestamp)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_meetings(self, meetings):
+        """
+        Inserts or updates the metadata of the given meetings. Stored sentences and summaries are kept.
+        """
+
+        with closing(self.connect()) as connection, connection:
+            connection.executemany(
+                """
+                INSERT INTO transcripts (id, date_string, metadata) VALUES (?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET date_string = excluded.date_string, metadata = excluded.metadata
+                """,
+                [(meeting["id"], normalize_timestamp(meeting["dateString"]), json.dumps(meeting)) for meeting in meetings]
+            )
+
+    def save_synced_range(self, synced_from, synced_to, synced_at):
+        """
+        Records a listed range, merged with the ranges it overlaps or touches. The merged range
+        expires with the oldest of them. Expired ranges are dropped.
+        """
+
+        with closing(self.connect()) as connection, connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("DELETE FROM synced_ranges WHERE synced_at < ?", (self.expired_before(),))
+            overlapping = connection.execute(
+                "SELECT synced_from, synced_to, synced_at FROM synced_ranges WHERE synced_from <= ? AND synced_to >= ?",
+                (synced_to, synced_from)
+            ).fetchall()
+            for row in overlapping:
+                synced_from = min(synced_from, row[0])
+                synced_to = max(synced_to, row[1])
+                synced_at = min(synced_at, row[2])
+            connection.execute(
+                "DELETE FROM synced_ranges WHERE synced_from <= ? AND synced_to >= ?", (synced_to, synced_from)
+            )
+            connection.execute(
+                "INSERT INTO synced_ranges (synced_from, synced_to, synced_at) VALUES (?, ?, ?)",
+                (synced_from, synced_to, synced_at)
+            )
+
+    def sync(self, from_timestamp, to_timestamp, load_meetings):
+        """
+        Makes sure every meeting between from_timestamp and to_timestamp is in the store.
+
+        Only the parts of the range that are not covered by earlier listings are requested
+        through load_meetings. A part that follows a listed range is requested from the newest
+        dateString stored in that range, so meetings transcribed after it was listed are still
+        picked up. Listings expire after STORE_MAX_AGE, and the last STORE_RESYNC_WINDOW seconds
+        before now are never recorded as listed, since Fireflies may still add transcripts
+        of recent meetings.
+
+        Parameters:
+        from_timestamp (str): The start date and time in ISO format.
+        to_timestamp (str): The end date and time in ISO format.
+        load_meetings (callable): Called as load_meetings(from_timestamp, to_timestamp) and returns
+                                  a list of meeting metadata. Errors are propagated and leave the
+                                  synced ranges untouched.
+        """
+
+        start = normalize_timestamp(from_timestamp)
+        end = normalize_timestamp(to_timestamp)
+        synced_at = time.time()
+        # Meetings that have not happened yet, or may still get a transcript, cannot be synced
+        settled = datetime.fromtimestamp(synced_at - self.resync_window, timezone.utc)
+        covered_end = min(end, settled.replace(tzinfo=None).strftime(TIMESTAMP_FORMAT))
+
+        listed_to, resume_from = start, from_timestamp
+        overlapping = [
+            (synced_from, synced_to) for synced_from, synced_to in self.synced_ranges()
+            if synced_from <= end and synced_to >= start
+        ]
+        for synced_from, synced_to in overlapping:
+            if synced_from > listed_to:
+                self.save_meetings(load_meetings(resume_from, synced_from))
+            if synced_to > listed_to:
+                listed_to = synced_to
+                resume_from = self.newest_date_string(max(start, synced_from), synced_to) or synced_to
+
+        if listed_to < end or not overlapping:
+            self.save_meetings(load_meetings(resume_from, to_timestamp))
+
+        if covered_end >= start:
+            self.save_synced_range(start, covered_end, synced_at)
+
+    def list_meetings(self, from_timestamp, to_timestamp, load_meetings):
+        """
+        Returns the metadata of the meetings between from_timestamp and to_timestamp, newest first,
+        syncing the store with load_meetings first if the range has not been listed yet.
+        """
+
+        self.sync(from_timestamp, to_timestamp, load_meetings)
+
+        with closing(self.connect()) as connection:
+            rows = connection.execute(
+                "SELECT metadata FROM transcripts WHERE date_string BETWEEN ? AND ? ORDER BY date_string DESC",
+                (normalize_timestamp(from_timestamp), normalize_timestamp(to_timestamp))
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_transcripts(self, transcript_ids, load_transcripts):
+        """
+        Returns the sentences and Fireflies summary of several transcripts.
+        See iter_transcripts for the parameters.
+
+        Returns:
+        dict: A dict mapping each transcript ID to a dict with "sentences" (list) and "summary" (dict).
+        """
+
+        return dict(self.iter_transcripts(transcript_ids, load_transcripts))
+
+    def iter_transcripts(self, transcript_ids, load_transcripts):
+        """
+        Yields the sentences and Fireflies summary of several transcripts one at a time.
+
+        Stored transcripts come first. Transcripts whose sentences or summary are missing or
+        stale are then loaded together with a single call to load_transcripts, and each one is
+        stored and yielded as soon as it arrives, so only one loaded transcript needs to be
+        held in memory at a time.
+
+        Parameters:
+        transcript_ids (list): The IDs of the transcripts.
+        load_transcripts (callable): Called with the list of IDs that need loading and returns an iterable
+                                     of (ID, dict with "sentences" and "summary", or "error") pairs.
+
+        Yields:
+        tuple: The transcript ID and a dict with "sentences" (list) and "summary" (dict).
+               Transcripts that could not be loaded have both empty, and an "error".
+        """
+
+        missing = []
+
+        for transcript_id in transcript_ids:
+            # The connection is closed before yielding, since the caller may take a while
+            with closing(self.connect()) as connection:
+                row = connection.execute(
+                    "SELECT sentences, sentences_fetched_at, summary, summary_fetched_at FROM transcripts WHERE id = ?",
+                    (transcript_id,)
+                ).fetchone()
+
+            if row and self.is_fresh(row[0], row[1]) and self.is_fresh(row[2], row[3]):
+                yield transcript_id, {"sentences": json.loads(row[0]), "summary": json.loads(row[2])}
+            else:
+                missing.append(transcript_id)
+
+        if not missing:
+            return
+
+        unseen = set(missing)
+        for transcript_id, transcript in load_transcripts(missing):
+            if transcript_id not in unseen:
+                continue
+            unseen.discard(transcript_id)
+
+            transcript = transcript or {}
+            sentences = transcript.get("sentences") or []
+            summary = transcript.get("summary") or {}
+
+            # Empty results usually mean Fireflies has not finished processing; do not cache them
+            if sentences:
+                self._save("sentences", transcript_id, sentences)
+            if summary:
+                self._save("summary", transcript_id, summary)
+
+            result = {"sentences": sentences, "summary": summary}
+            if transcript.get("error"):
+                result["error"] = transcript["error"]
+            yield transcript_id, result
+
+        for transcript_id in missing:
+            if transcript_id in unseen:
+                yield transcript_id, {"sentences": [], "summary": {}, "error": "Failed to fetch the meeting: it was not returned"}
+
+    def is_fresh(self, value, fetched_at):
+        return value is not None and (self.max_age is None or time.time() - fetched_at < self.max_age)
+
+    def _save(self, column, transcript_id, value):
+        with closing(self.connect()) as connection, connection:
+            connection.execute(
+                f"""
+                INSERT INTO transcripts (id, metadata, {column}, {column}_fetched_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET {column} = excluded.{column}, {column}_fetched_at = excluded.{column}_fetched_at
+                """,
+                (transcript_id, json.dumps({"id": transcript_id}), json.dumps(value), time.time())
+            )
@@ -0,0 +1,53 @@
+import os
+import hmac
+import json
+import hashlib
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Secret set when registering the webhook in the Fireflies developer settings
+WEBHOOK_SECRET = os.getenv("FIREFLIES_WEBHOOK_SECRET")
+WEBHOOK_INCLUDE_TRANSCRIPT = os.getenv("WEBHOOK_INCLUDE_TRANSCRIPT", "0") == "1"
+
+SIGNATURE_HEADER = "x-hub-signature"
+TRANSCRIPTION_COMPLETED = "Transcription completed"
+
+
+def sign_payload(body, secret=WEBHOOK_SECRET):
+    """
+    Returns the hex HMAC-SHA256 signature Fireflies sends for a raw request body.
+    """
+
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body, signature, secret=WEBHOOK_SECRET):
+    """
+    Checks the signature header of a webhook request against its raw body.
+    Requests are rejected when no secret is configured.
+    """
+
+    if not secret or not signature:
+        return False
+
+    # Accept both the bare digest and the "sha256=<digest>" form
+    signature = signature.split("=", 1)[1] if signature.startswith("sha256=") else signature
+    return hmac.compare_digest(sign_payload(body, secret), signature)
+
+
+def completed_meeting_id(body):
+    """
+    Returns the meeting id of a "Transcription completed" notification, or None for other events.
+
+    Raises:
+    ValueError: If the body is not a JSON object with a meetingId.
+    """
+
+    payload = json.loads(body)
+    if not isinstance(payload, dict) or not payload.get("meetingId"):
+        raise ValueError("The notification has no meetingId.")
+
+    if payload.get("eventType") != TRANSCRIPTION_COMPLETED:
+        return None
+    return payload["meetingId"]
@@ -1,20 +1,30 @@
 import os
 import base64
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
 
+from http_client import wordpress_session
+
 load_dotenv()
 
 WP_USERNAME = os.getenv("WORDPRESS_USERNAME")
 WP_PASSWORD = os.getenv("WORDPRESS_APPLICATION_PASSWORD")
-WP_URL = "https://winniio.io/wp-json/wp/v2/posts"
+WP_URL = os.getenv("WORDPRESS_POSTS_URL", "https://winniio.io/wp-json/wp/v2/posts")
+
+# Every status a post created by this script can have; drafts and scheduled posts are only
+# listed to authenticated users
+WP_STATUSES = "publish,future,draft,pending,private"
+WP_PAGE_SIZE = 100  # The most posts the REST API returns per request
+
 
-WP_CREDENTIALS = WP_USERNAME + ":" + WP_PASSWORD
-WP_TOKEN = base64.b64encode(WP_CREDENTIALS.encode())
-WP_HEADER = {"Authorization": "Basic " + WP_TOKEN.decode("utf-8")}
+def wordpress_header():
+    # Built per request, so importing the module does not need the credentials
+    credentials = WP_USERNAME + ":" + WP_PASSWORD
+    token = base64.b64encode(credentials.encode())
+    return {"Authorization": "Basic " + token.decode("utf-8")}
 
-def post_to_wordpress(title: str, content: str, status: str = "draft", scheduled_time: str = None):
+
+def post_to_wordpress(title: str, content: str, status: str = "draft", scheduled_time: str = None, slug: str = None):
     data = {
         "title": title,
         "content": content,
@@ -22,7 +32,52 @@ def post_to_wordpress(title: str, content: str, status: str = "draft", scheduled
     }
 
     if status == "future" and scheduled_time:
-        data["date"] = scheduled_time  # ISO 8601 format (UTC)
+        data["date_gmt"] = scheduled_time  # ISO 8601 format (UTC)
+
+    if slug:
+        data["slug"] = slug
 
-    response = requests.post(WP_URL, headers=WP_HEADER, json=data)
+    response = wordpress_session.post(WP_URL, headers=wordpress_header(), json=data)
     return response
+
+
+def update_post(post_id, status: str, scheduled_time: str = None):
+    """
+    Changes the status, and for "future" posts the publication date, of an existing post.
+    """
+
+    data = {"status": status}
+
+    if status == "future" and scheduled_time:
+        data["date_gmt"] = scheduled_time  # ISO 8601 format (UTC)
+
+    response = wordpress_session.post(f"{WP_URL.rstrip('/')}/{post_id}", headers=wordpress_header(), json=data)
+    return response
+
+
+def find_posts(slugs):
+    """
+    Looks up the posts with the given slugs, whatever their status, in as few requests as possible.
+
+    Returns:
+    dict: The id, slug, status, date and link of every post found, by slug.
+
+    Raises:
+    requests.exceptions.RequestException: If a lookup fails.
+    """
+
+    slugs = list(slugs)
+    posts = {}
+
+    for start in range(0, len(slugs), WP_PAGE_SIZE):
+        response = wordpress_session.get(WP_URL, headers=wordpress_header(), params={
+            "slug": ",".join(slugs[start:start + WP_PAGE_SIZE]),
+            "status": WP_STATUSES,
+            "context": "edit",
+            "per_page": WP_PAGE_SIZE,
+            "_fields": "id,slug,status,date,link",
+        })
+        response.raise_for_status()
+        posts.update({post["slug"]: post for post in response.json()})
+
+    return posts